@@ -1,5 +1,6 @@
 """Core Business Logic Package"""
 
 from .localization import Localization, get_localization, t
+from .problem import ProblemInstance, load_problem, DEFAULT_PREFERENCE
 
-__all__ = ['Localization', 'get_localization', 't']
\ No newline at end of file
+__all__ = ['Localization', 'get_localization', 't', 'ProblemInstance', 'load_problem', 'DEFAULT_PREFERENCE']
\ No newline at end of file
@@ -51,8 +51,11 @@ class Localization:
                 "time_settings": "Time Settings",
                 "database_statistics": "Database Statistics",
                 "clear_all_schedules": "Clear All Schedules",
+                "schedule_runs": "Schedule Runs",
                 "import_sample_data": "Import Sample Data",
                 "backup_database": "Backup Database",
+                "export_all_timetables_pdf": "Export All Timetables to PDF...",
+                "export_timetables_separate_pdf": "Export Timetables as Separate PDFs...",
                 
                 # Menu Items - Language
                 "menu_language": "Language",
@@ -88,6 +91,11 @@ class Localization:
                 "select_new_time_slot": "Select new time slot:",
                 "select": "Select",
                 "current": "Current",
+                "swap": "Swap",
+                "busy": "Busy",
+                "previous_page": "Previous",
+                "next_page": "Next",
+                "rows_shown": "Rows {first}-{last} of {total}",
                 "close": "Close",
                 
                 # Data management
@@ -179,6 +187,7 @@ class Localization:
                 "fast_greedy": "🎯 Fast Greedy",
                 "ortools": "🔧 OR-Tools (Classic)",
                 "simple": "🔄 Simple Fallback",
+                "portfolio": "🏁 Portfolio",
                 
                 # Algorithm Descriptions
                 "ultra_fast_desc": "Optimized ultra-fast algorithm\n• Typical time: < 0.5 seconds\n• Quality: Very Good\n• Best for: Instant scheduling",
@@ -187,6 +196,7 @@ class Localization:
                 "fast_greedy_desc": "Basic fast greedy algorithm\n• Typical time: < 1 second\n• Quality: Good\n• Best for: Quick results",
                 "ortools_desc": "Google's constraint solver\n• Typical time: 10-30 seconds\n• Quality: Optimal\n• Best for: Guaranteed optimality",
                 "simple_desc": "Basic fallback algorithm\n• Typical time: < 2 seconds\n• Quality: Good\n• Best for: Compatibility",
+                "portfolio_desc": "Runs several algorithms in parallel and keeps the best\n• Typical time: 1-30 seconds\n• Quality: Best of all\n• Best for: Multi-core machines",
                 
                 # Messages
                 "schedule_generated": "Schedule Generated",
@@ -196,6 +206,15 @@ class Localization:
                 "generating_schedule": "Generating Schedule",
                 "running_algorithm": "Running {algorithm} algorithm...",
                 "initializing": "Initializing...",
+                "solution_progress": "Solution {count}: objective {objective:.0f}, bound {bound:.0f} ({time:.1f}s)",
+                "run_solver": "Solver",
+                "run_conflicts": "Conflicts",
+                "run_time": "Time (s)",
+                "run_created": "Created",
+                "activate_run": "Show Selected",
+                "compare_with_active": "Compare with Shown",
+                "pin_run": "Pin / Unpin",
+                "run_diff": "{added} lessons added, {removed} lessons removed compared to the shown run",
                 
                 # Data Management
                 "add": "Add",
@@ -252,8 +271,11 @@ class Localization:
                 "time_settings": "إعدادات الوقت",
                 "database_statistics": "إحصائيات قاعدة البيانات",
                 "clear_all_schedules": "مسح جميع الجداول",
+                "schedule_runs": "سجل الجداول",
                 "import_sample_data": "استيراد بيانات تجريبية",
                 "backup_database": "نسخ احتياطي لقاعدة البيانات",
+                "export_all_timetables_pdf": "تصدير جميع الجداول إلى PDF...",
+                "export_timetables_separate_pdf": "تصدير الجداول كملفات PDF منفصلة...",
                 
                 # Menu Items - Language
                 "menu_language": "اللغة",
@@ -289,6 +311,11 @@ class Localization:
                 "select_new_time_slot": "اختر الفترة الزمنية الجديدة:",
                 "select": "اختيار",
                 "current": "الحالي",
+                "swap": "تبديل",
+                "busy": "مشغول",
+                "previous_page": "السابق",
+                "next_page": "التالي",
+                "rows_shown": "الصفوف {first}-{last} من {total}",
                 "close": "إغلاق",
                 
                 # Data management
@@ -380,6 +407,7 @@ class Localization:
                 "fast_greedy": "🎯 الجشع السريع",
                 "ortools": "🔧 OR-Tools (كلاسيكي)",
                 "simple": "🔄 البديل البسيط",
+                "portfolio": "🏁 المحفظة",
                 
                 # Algorithm Descriptions
                 "ultra_fast_desc": "خوارزمية فائقة السرعة محسّنة\n• الوقت المعتاد: أقل من 0.5 ثانية\n• الجودة: جيد جداً\n• الأفضل لـ: الجدولة الفورية",
@@ -388,6 +416,7 @@ class Localization:
                 "fast_greedy_desc": "خوارزمية الجشع السريع الأساسية\n• الوقت المعتاد: أقل من ثانية واحدة\n• الجودة: جيد\n• الأفضل لـ: النتائج السريعة",
                 "ortools_desc": "حلال القيود من جوجل\n• الوقت المعتاد: 10-30 ثانية\n• الجودة: الأمثل\n• الأفضل لـ: الضمان الأمثل",
                 "simple_desc": "خوارزمية بديلة أساسية\n• الوقت المعتاد: أقل من ثانيتين\n• الجودة: جيد\n• الأفضل لـ: التوافق",
+                "portfolio_desc": "تشغيل عدة خوارزميات بالتوازي والاحتفاظ بالأفضل\n• الوقت المعتاد: 1-30 ثانية\n• الجودة: الأفضل بينها\n• الأفضل لـ: الأجهزة متعددة الأنوية",
                 
                 # Messages
                 "schedule_generated": "تم توليد الجدول",
@@ -397,6 +426,15 @@ class Localization:
                 "generating_schedule": "توليد الجدول",
                 "running_algorithm": "تشغيل خوارزمية {algorithm}...",
                 "initializing": "التهيئة...",
+                "solution_progress": "الحل {count}: الهدف {objective:.0f}، الحد {bound:.0f} ({time:.1f} ثانية)",
+                "run_solver": "الخوارزمية",
+                "run_conflicts": "التعارضات",
+                "run_time": "الوقت (ث)",
+                "run_created": "تاريخ الإنشاء",
+                "activate_run": "عرض المحدد",
+                "compare_with_active": "مقارنة بالمعروض",
+                "pin_run": "تثبيت / إلغاء التثبيت",
+                "run_diff": "{added} حصة مضافة و{removed} حصة محذوفة مقارنة بالجدول المعروض",
                 
                 # Data Management
                 "add": "إضافة",
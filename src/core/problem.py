@@ -0,0 +1,280 @@
+"""
+Problem Instance - Compiled, integer-indexed scheduling problem
+
+Loads the scheduling data from SQLite once and compiles it into dense
+0..N-1 indices and NumPy arrays, so every solver can share one parsed
+copy instead of re-querying the database and re-parsing availability.
+"""
+
+import json
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..database.database_manager import get_database_manager
+from .subject_categories import (DEFAULT_AFFINITY_ROWS, DEFAULT_CATEGORY_ROWS, affinity_matrix,
+                                 classify_subjects)
+
+# Preference score assumed when a teacher has no explicit preference for a class
+DEFAULT_PREFERENCE = 3
+
+
+def _build_index(ids: Sequence[int]) -> Dict[int, int]:
+    """Map database ids to dense 0-based indices"""
+    return {db_id: idx for idx, db_id in enumerate(ids)}
+
+
+class ProblemInstance:
+    """Compiled scheduling problem shared by all solvers
+
+    Every entity is addressed by a dense index. The ``*_ids`` arrays map an
+    index back to its database id and ``*_index`` dicts map the other way.
+    """
+
+    def __init__(self, teacher_rows: Iterable[Tuple], class_rows: Iterable[Tuple],
+                 subject_rows: Iterable[Tuple], room_rows: Iterable[Tuple],
+                 lesson_rows: Iterable[Tuple], preference_rows: Iterable[Tuple],
+                 schedule_rows: Iterable[Tuple] = (), num_days: int = 5,
+                 num_periods: int = 8, db_file: Optional[str] = None,
+                 category_rows: Optional[Iterable[Tuple]] = None,
+                 affinity_rows: Optional[Iterable[Tuple]] = None):
+        """
+        Compile raw database rows into an indexed problem
+
+        Args:
+            teacher_rows: (id, name, availability_json) tuples
+            class_rows: (id, name, grade_level) tuples
+            subject_rows: (id, name, needs_lab) or (id, name, needs_lab, category_id) tuples
+            room_rows: (id, name, is_lab) tuples
+            lesson_rows: (class_id, subject_id, lessons_per_week) tuples
+            preference_rows: (teacher_id, class_id, preference_score) tuples
+            schedule_rows: (class_id, teacher_id, subject_id, room_id, day, period, is_locked) tuples
+            num_days: Number of school days per week
+            num_periods: Number of periods per day
+            db_file: Database the rows were loaded from (informational)
+            category_rows: (id, name, keywords_json, priority) subject categories
+                in matching order; the default categories when omitted
+            affinity_rows: (category_id, day, first_period, last_period, weight)
+                time-affinity ranges; the default ranges when omitted
+        """
+        self.db_file = db_file
+        self.num_days = num_days
+        self.num_periods = num_periods
+        self.num_slots = num_days * num_periods
+
+        teacher_rows = list(teacher_rows)
+        class_rows = list(class_rows)
+        subject_rows = list(subject_rows)
+        room_rows = list(room_rows)
+
+        # Teachers
+        self.teacher_ids = np.array([row[0] for row in teacher_rows], dtype=np.int64)
+        self.teacher_names: List[str] = [row[1] for row in teacher_rows]
+        self.teacher_index = _build_index(self.teacher_ids.tolist())
+
+        # Teacher availability: True where the teacher can teach
+        self.teacher_available = np.ones((len(teacher_rows), num_days, num_periods), dtype=bool)
+        for t, row in enumerate(teacher_rows):
+            if not row[2]:
+                continue
+            for day_str, periods in json.loads(row[2]).items():
+                day = int(day_str)
+                if not 0 <= day < num_days:
+                    continue
+                for period in periods:
+                    if 0 <= period < num_periods:
+                        self.teacher_available[t, day, period] = False
+
+        # Classes
+        self.class_ids = np.array([row[0] for row in class_rows], dtype=np.int64)
+        self.class_names: List[str] = [row[1] for row in class_rows]
+        self.class_grades = np.array([row[2] or 0 for row in class_rows], dtype=np.int64)
+        self.class_index = _build_index(self.class_ids.tolist())
+
+        # Subjects
+        self.subject_ids = np.array([row[0] for row in subject_rows], dtype=np.int64)
+        self.subject_names: List[str] = [row[1] for row in subject_rows]
+        self.subject_needs_lab = np.array([bool(row[2]) for row in subject_rows], dtype=bool)
+        self.subject_index = _build_index(self.subject_ids.tolist())
+
+        # Subject categories, priorities and (subject, day, period) time affinity, computed once
+        category_rows = list(DEFAULT_CATEGORY_ROWS if category_rows is None else category_rows)
+        self.category_names, self.subject_category, self.subject_priority = classify_subjects(
+            self.subject_names, [row[3] if len(row) > 3 else None for row in subject_rows], category_rows)
+        self.time_affinity = affinity_matrix(
+            self.subject_category, [row[0] for row in category_rows],
+            DEFAULT_AFFINITY_ROWS if affinity_rows is None else affinity_rows, num_days, num_periods)
+
+        # Rooms
+        self.room_ids = np.array([row[0] for row in room_rows], dtype=np.int64)
+        self.room_names: List[str] = [row[1] for row in room_rows]
+        self.room_is_lab = np.array([bool(row[2]) for row in room_rows], dtype=bool)
+        self.room_index = _build_index(self.room_ids.tolist())
+        self.lab_rooms: List[int] = np.flatnonzero(self.room_is_lab).tolist()
+        self.regular_rooms: List[int] = np.flatnonzero(~self.room_is_lab).tolist()
+
+        # Lesson demand, keeping database order for deterministic solvers
+        self.lesson_demand = np.zeros((self.num_classes, self.num_subjects), dtype=np.int64)
+        self.lesson_requirements: List[Tuple[int, int, int]] = []
+        for class_id, subject_id, lessons_per_week in lesson_rows:
+            c = self.class_index.get(class_id)
+            s = self.subject_index.get(subject_id)
+            if c is None or s is None:
+                continue
+            self.lesson_demand[c, s] = lessons_per_week
+            self.lesson_requirements.append((c, s, lessons_per_week))
+
+        # Teacher -> class preferences (DEFAULT_PREFERENCE where unset)
+        self.preferences = np.full((self.num_teachers, self.num_classes), DEFAULT_PREFERENCE, dtype=np.int64)
+        self.preference_set = np.zeros((self.num_teachers, self.num_classes), dtype=bool)
+        for teacher_id, class_id, score in preference_rows:
+            t = self.teacher_index.get(teacher_id)
+            c = self.class_index.get(class_id)
+            if t is None or c is None:
+                continue
+            self.preferences[t, c] = score
+            self.preference_set[t, c] = True
+
+        # Existing timetable rows as (class, teacher, subject, room, day, period, is_locked)
+        self.existing_lessons: List[Tuple[int, int, int, int, int, int, bool]] = []
+        for class_id, teacher_id, subject_id, room_id, day, period, is_locked in schedule_rows:
+            c = self.class_index.get(class_id)
+            t = self.teacher_index.get(teacher_id)
+            s = self.subject_index.get(subject_id)
+            r = self.room_index.get(room_id)
+            if None in (c, t, s, r):
+                continue
+            if not (0 <= day < num_days and 0 <= period < num_periods):
+                continue
+            self.existing_lessons.append((c, t, s, r, day, period, bool(is_locked)))
+
+    # Sizes
+
+    @property
+    def num_teachers(self) -> int:
+        return len(self.teacher_ids)
+
+    @property
+    def num_classes(self) -> int:
+        return len(self.class_ids)
+
+    @property
+    def num_subjects(self) -> int:
+        return len(self.subject_ids)
+
+    @property
+    def num_rooms(self) -> int:
+        return len(self.room_ids)
+
+    @property
+    def total_demand(self) -> int:
+        """Total number of lessons required per week"""
+        return int(self.lesson_demand.sum())
+
+    # Derived lookups
+
+    def slot(self, day: int, period: int) -> int:
+        """Flatten a (day, period) pair into a slot index"""
+        return day * self.num_periods + period
+
+    def preference_scores(self, default: int = DEFAULT_PREFERENCE) -> np.ndarray:
+        """Teacher x class preference matrix using ``default`` where unset"""
+        if default == DEFAULT_PREFERENCE:
+            return self.preferences
+        return np.where(self.preference_set, self.preferences, default)
+
+    def qualified_teachers(self, min_score: int = 3, explicit_only: bool = False) -> np.ndarray:
+        """
+        Teacher x subject qualification matrix
+
+        A teacher qualifies for a subject when their preference for at least
+        one class requiring that subject reaches ``min_score``.
+
+        Args:
+            min_score: Minimum preference score
+            explicit_only: Ignore classes without an explicit preference
+
+        Returns:
+            Boolean array of shape (num_teachers, num_subjects)
+        """
+        acceptable = self.preferences >= min_score
+        if explicit_only:
+            acceptable &= self.preference_set
+        requires = self.lesson_demand > 0
+        return (acceptable.astype(np.int64) @ requires.astype(np.int64)) > 0
+
+    def rooms_for_subject(self, subject: int) -> List[int]:
+        """Rooms matching a subject's lab requirement, falling back to all rooms"""
+        rooms = self.lab_rooms if self.subject_needs_lab[subject] else self.regular_rooms
+        return rooms if rooms else list(range(self.num_rooms))
+
+    def assignment_rows(self, assignments: Iterable[Tuple[int, int, int, int, int, int]]) -> List[List[int]]:
+        """
+        Map (class, teacher, subject, room, day, period) index tuples to database ids
+
+        Returns:
+            Rows of (class_id, teacher_id, subject_id, room_id, day, period)
+        """
+        indices = np.asarray(list(assignments), dtype=np.int64).reshape(-1, 6)
+        return np.column_stack([
+            self.class_ids[indices[:, 0]], self.teacher_ids[indices[:, 1]],
+            self.subject_ids[indices[:, 2]], self.room_ids[indices[:, 3]],
+            indices[:, 4], indices[:, 5]
+        ]).tolist()
+
+    def schedule_rows(self, schedule: Dict[Tuple[int, int, int, int, int], Tuple[int, int]]) -> List[List[int]]:
+        """Map a solver schedule {(teacher, class, room, day, period): (subject, _)} to database-id rows"""
+        return self.assignment_rows((c, t, s, r, d, p) for (t, c, r, d, p), (s, _) in schedule.items())
+
+
+def load_problem(db_file: str = "school_timetable.db", num_days: Optional[int] = None,
+                 num_periods: Optional[int] = None) -> ProblemInstance:
+    """
+    Load and compile the scheduling problem from the database
+
+    Args:
+        db_file: Path to database file
+        num_days: Number of school days per week; the stored grid when None
+        num_periods: Number of periods per day; the stored grid when None
+
+    Returns:
+        Compiled ProblemInstance
+    """
+    conn = get_database_manager(db_file).connect()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT num_days, num_periods FROM timetable_grid WHERE id = 1")
+        grid = cursor.fetchone() or (5, 8)
+        num_days = grid[0] if num_days is None else num_days
+        num_periods = grid[1] if num_periods is None else num_periods
+        cursor.execute("SELECT id, name, availability_json FROM teachers ORDER BY id")
+        teacher_rows = cursor.fetchall()
+        cursor.execute("SELECT id, name, grade_level FROM classes ORDER BY id")
+        class_rows = cursor.fetchall()
+        cursor.execute("SELECT id, name, needs_lab, category_id FROM subjects ORDER BY id")
+        subject_rows = cursor.fetchall()
+        cursor.execute("SELECT id, name, keywords_json, priority FROM subject_categories ORDER BY position, id")
+        category_rows = cursor.fetchall()
+        cursor.execute("""
+            SELECT category_id, day_of_week, first_period, last_period, weight
+            FROM category_time_affinity ORDER BY id
+        """)
+        affinity_rows = cursor.fetchall()
+        cursor.execute("SELECT id, name, is_lab FROM rooms ORDER BY id")
+        room_rows = cursor.fetchall()
+        cursor.execute("SELECT class_id, subject_id, lessons_per_week FROM lessons ORDER BY id")
+        lesson_rows = cursor.fetchall()
+        cursor.execute("SELECT teacher_id, class_id, preference_score FROM teacher_preferences ORDER BY id")
+        preference_rows = cursor.fetchall()
+        cursor.execute("""
+            SELECT class_id, teacher_id, subject_id, room_id, day_of_week, timeslot, is_locked
+            FROM active_schedules ORDER BY id
+        """)
+        schedule_rows = cursor.fetchall()
+    finally:
+        conn.close()
+
+    return ProblemInstance(teacher_rows, class_rows, subject_rows, room_rows,
+                           lesson_rows, preference_rows, schedule_rows,
+                           num_days=num_days, num_periods=num_periods, db_file=db_file,
+                           category_rows=category_rows, affinity_rows=affinity_rows)
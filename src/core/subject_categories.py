@@ -0,0 +1,98 @@
+"""
+Subject Categories - One-time subject classification and time affinity
+
+Subjects are sorted into categories (mathematics, sciences, languages,
+PE, arts, ...) once per problem load, either through an explicit
+``subjects.category_id`` or by the first category whose keywords appear in
+the subject name. Each category carries a scheduling priority and a set of
+time-affinity ranges, which are expanded into a dense subject x day x period
+matrix so the solvers' scoring loops only index arrays.
+
+Categories and affinities live in the ``subject_categories`` and
+``category_time_affinity`` tables; the defaults below match the rows the
+schema migration seeds and are used for problems built without them.
+"""
+
+import json
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# (id, name, keywords_json, priority), in matching order
+DEFAULT_CATEGORY_ROWS: List[Tuple[int, str, str, int]] = [
+    (1, 'math', '["math", "algebra", "geometry", "calculus"]', 50),
+    (2, 'physical_science', '["physics", "chemistry"]', 40),
+    (3, 'life_science', '["biology"]', 40),
+    (4, 'language', '["english", "literature", "language"]', 30),
+    (5, 'physical_education', '["physical"]', 0),
+    (6, 'arts', '["art", "music", "drama"]', 0),
+]
+
+# (category_id, day or None for every day, first_period, last_period or None for the end of the day, weight)
+DEFAULT_AFFINITY_ROWS: List[Tuple[int, Optional[int], int, Optional[int], float]] = [
+    # Mathematics and physical sciences in the morning
+    (1, None, 0, 3, 20), (1, None, 4, None, -5),
+    (2, None, 0, 3, 20), (2, None, 4, None, -5),
+    # PE and arts in the afternoon
+    (5, None, 0, 3, -5), (5, None, 4, None, 15),
+    (6, None, 0, 3, -5), (6, None, 4, None, 15),
+]
+
+def classify_subjects(subject_names: Sequence[str], explicit_ids: Sequence[Optional[int]],
+                      category_rows: Iterable[Tuple]) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    """
+    Assign every subject to a category
+
+    Args:
+        subject_names: Subject names by subject index
+        explicit_ids: Category id set on each subject, or None to match keywords
+        category_rows: (id, name, keywords_json, priority) in matching order
+
+    Returns:
+        (category names by category index, category index per subject with -1
+        for none, priority per subject)
+    """
+    category_rows = list(category_rows)
+    names = [row[1] for row in category_rows]
+    index = {row[0]: i for i, row in enumerate(category_rows)}
+    keywords = [[word.lower() for word in json.loads(row[2] or '[]')] for row in category_rows]
+    priorities = np.array([row[3] or 0 for row in category_rows] + [0], dtype=np.int64)
+
+    categories = np.full(len(subject_names), -1, dtype=np.int64)
+    for s, (name, explicit) in enumerate(zip(subject_names, explicit_ids)):
+        if explicit in index:
+            categories[s] = index[explicit]
+            continue
+        name = name.lower()
+        categories[s] = next((c for c, words in enumerate(keywords) if any(word in name for word in words)), -1)
+
+    # Index -1 picks the trailing zero priority
+    return names, categories, priorities[categories]
+
+def affinity_matrix(subject_categories: np.ndarray, category_ids: Sequence[int],
+                    affinity_rows: Iterable[Tuple], num_days: int, num_periods: int) -> np.ndarray:
+    """
+    Expand category affinity ranges into a subject x day x period matrix
+
+    Overlapping ranges add up; uncategorized subjects have no affinity.
+
+    Args:
+        subject_categories: Category index per subject (-1 for none)
+        category_ids: Database id of each category index
+        affinity_rows: (category_id, day, first_period, last_period, weight) rows
+        num_days: School days per week
+        num_periods: Periods per day
+
+    Returns:
+        Float array of shape (subjects, num_days, num_periods)
+    """
+    index = {category_id: i for i, category_id in enumerate(category_ids)}
+    category_affinity = np.zeros((len(category_ids) + 1, num_days, num_periods))
+    for category_id, day, first, last, weight in affinity_rows:
+        if category_id not in index:
+            continue
+        days = slice(None) if day is None else slice(day, day + 1)
+        periods = slice(first or 0, num_periods if last is None else last + 1)
+        category_affinity[index[category_id], days, periods] += weight
+    # The extra last row is the zero affinity of uncategorized subjects
+    return category_affinity[subject_categories]
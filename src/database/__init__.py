@@ -2,5 +2,10 @@
 
 from .database_manager import DatabaseManager
 from .database_setup import setup_database
+from .schedule_writer import write_schedule, save_schedule, save_assignments
+from .schedule_runs import list_runs, get_active_run, activate_run, diff_runs
+from .schedule_model import ScheduleModel
+from .paged_query import PagedQuery
 
-__all__ = ['DatabaseManager', 'setup_database']
\ No newline at end of file
+__all__ = ['DatabaseManager', 'setup_database', 'write_schedule', 'save_schedule', 'save_assignments',
+           'list_runs', 'get_active_run', 'activate_run', 'diff_runs', 'ScheduleModel', 'PagedQuery']
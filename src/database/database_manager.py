@@ -3,37 +3,107 @@ Database Manager - Central database operations
 
 This module provides a unified interface to all database operations,
 ensuring consistent connection handling and query execution.
+
+Connections are pooled per thread and tuned for concurrent use: WAL
+journaling lets the GUI read while a solver process writes, and the page
+cache, memory map and statement cache survive between calls.
 """
 
 import sqlite3
 import os
-from typing import List, Dict, Any, Optional, Tuple
+import threading
+from typing import Callable, List, Dict, Any, Optional, Tuple
 from contextlib import contextmanager
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Pragmas applied to every pooled connection
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-16000",      # 16 MB page cache
+    "PRAGMA mmap_size=268435456",    # 256 MB memory map
+    "PRAGMA temp_store=MEMORY",
+)
+STATEMENT_CACHE_SIZE = 256
+BUSY_TIMEOUT = 10.0
+
+class PooledConnection:
+    """A borrowed pooled connection
+
+    Behaves like ``sqlite3.Connection``, except that ``close()`` returns the
+    connection to the pool. Borrows on one thread share a connection, so only
+    releasing the outermost borrow rolls back an open transaction and resets
+    the row factory; the underlying connection stays open.
+    """
+    
+    def __init__(self, conn: sqlite3.Connection, release: Callable[[sqlite3.Connection], bool]):
+        object.__setattr__(self, '_conn', conn)
+        object.__setattr__(self, '_release', release)
+        object.__setattr__(self, '_released', False)
+    
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+    
+    def __setattr__(self, name, value):
+        setattr(self._conn, name, value)
+    
+    def __enter__(self):
+        self._conn.__enter__()
+        return self
+    
+    def __exit__(self, *exc_info):
+        return self._conn.__exit__(*exc_info)
+    
+    def __del__(self):
+        # A borrow that is never closed is released when it is collected
+        if not self.__dict__.get('_released', True):
+            self.close()
+    
+    def close(self):
+        """Release the connection back to the pool"""
+        if self._released:
+            return
+        object.__setattr__(self, '_released', True)
+        if self._release(self._conn):
+            if self._conn.in_transaction:
+                self._conn.rollback()
+            self._conn.row_factory = None
+
 class DatabaseManager:
     """Central database management class"""
     
-    def __init__(self, db_path: str = "data/database/school_timetable.db"):
+    def __init__(self, db_path: str = "data/database/school_timetable.db",
+                 create_if_missing: bool = True):
         """
         Initialize database manager
         
         Args:
             db_path: Path to the database file
+            create_if_missing: Create the database with sample data if the file does not exist
         """
         self.db_path = db_path
+        self.create_if_missing = create_if_missing
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
         self.ensure_database_exists()
     
     def ensure_database_exists(self):
-        """Ensure database file and directory exist"""
+        """Ensure database file and directory exist and the schema is current"""
         # Create directory if it doesn't exist
-        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
         
-        # Create database if it doesn't exist
+        # Create database if it doesn't exist, otherwise upgrade its schema in place
         if not os.path.exists(self.db_path):
-            self.initialize_database()
+            if self.create_if_missing:
+                self.initialize_database()
+        else:
+            from .migrations import migrate_database
+            migrate_database(self.db_path)
     
     def initialize_database(self):
         """Initialize database with all required tables"""
@@ -45,22 +115,60 @@ class DatabaseManager:
             logger.error(f"Failed to initialize database: {e}")
             raise
     
+    def _open_connection(self) -> sqlite3.Connection:
+        """Open and tune a new connection for the pool"""
+        conn = sqlite3.connect(self.db_path, timeout=BUSY_TIMEOUT,
+                               cached_statements=STATEMENT_CACHE_SIZE)
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        with self._lock:
+            self._connections.append(conn)
+        return conn
+    
+    def connect(self) -> PooledConnection:
+        """
+        Borrow this thread's pooled connection
+        
+        Drop-in replacement for ``sqlite3.connect(db_path)``: rows are plain
+        tuples and ``close()`` hands the connection back instead of closing it.
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = self._open_connection()
+            self._local.borrows = 0
+        self._local.borrows += 1
+        return PooledConnection(conn, self._release)
+    
+    def _release(self, conn: sqlite3.Connection) -> bool:
+        """Count a borrow as returned; True when it was this thread's outermost one"""
+        if getattr(self._local, 'conn', None) is not conn:
+            return False  # Already closed by close_all
+        self._local.borrows -= 1
+        return self._local.borrows == 0
+    
+    def close_all(self):
+        """Close every pooled connection (e.g. on application exit)"""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.ProgrammingError:
+                pass  # Owned by another thread that has already exited
+        self._local = threading.local()
+    
     @contextmanager
     def get_connection(self):
-        """Get database connection with automatic cleanup"""
-        conn = None
+        """Borrow a pooled connection, rolling back if the block raises"""
+        conn = self.connect()
         try:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row  # Enable column access by name
             yield conn
         except Exception as e:
-            if conn:
-                conn.rollback()
+            conn.rollback()
             logger.error(f"Database error: {e}")
             raise
         finally:
-            if conn:
-                conn.close()
+            conn.close()
     
     def execute_query(self, query: str, params: tuple = ()) -> List[sqlite3.Row]:
         """
@@ -75,6 +183,7 @@ class DatabaseManager:
         """
         with self.get_connection() as conn:
             cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row  # Enable column access by name
             cursor.execute(query, params)
             return cursor.fetchall()
     
@@ -156,7 +265,7 @@ class DatabaseManager:
             SELECT s.*, c.name as class_name, t.name as teacher_name,
                    sub.name as subject_name, r.name as room_name,
                    ts.day_of_week, ts.start_time, ts.end_time
-            FROM schedules s
+            FROM active_schedules s
             JOIN classes c ON s.class_id = c.id
             JOIN teachers t ON s.teacher_id = t.id  
             JOIN subjects sub ON s.subject_id = sub.id
@@ -173,16 +282,18 @@ class DatabaseManager:
         return [dict(row) for row in rows]
     
     def clear_unlocked_schedule(self) -> int:
-        """Clear all unlocked scheduled lessons"""
-        return self.execute_update("DELETE FROM schedules WHERE is_locked = 0")
+        """Clear all generated lessons together with their schedule runs"""
+        from .schedule_runs import clear_runs
+        return clear_runs(self.db_path)
     
     def clear_all_schedule(self) -> int:
-        """Clear all scheduled lessons (including locked)"""
-        return self.execute_update("DELETE FROM schedules")
+        """Clear all scheduled lessons (including locked) and schedule runs"""
+        deleted = self.clear_unlocked_schedule()
+        return deleted + self.execute_update("DELETE FROM schedules")
     
     def get_schedule_count(self, include_locked: bool = True) -> int:
-        """Get count of scheduled lessons"""
-        query = "SELECT COUNT(*) FROM schedules"
+        """Get count of lessons in the active schedule"""
+        query = "SELECT COUNT(*) FROM active_schedules"
         if not include_locked:
             query += " WHERE is_locked = 0"
             
@@ -201,19 +312,29 @@ class DatabaseManager:
         return stats
     
     def backup_database(self, backup_path: str):
-        """Create a backup of the database"""
-        import shutil
-        shutil.copy2(self.db_path, backup_path)
+        """Create a consistent backup of the database, including WAL content"""
+        with self.get_connection() as conn:
+            target = sqlite3.connect(backup_path)
+            try:
+                conn.backup(target)
+            finally:
+                target.close()
         logger.info(f"Database backed up to {backup_path}")
     
     def restore_database(self, backup_path: str):
         """Restore database from backup"""
-        import shutil
-        if os.path.exists(backup_path):
-            shutil.copy2(backup_path, self.db_path)
-            logger.info(f"Database restored from {backup_path}")
-        else:
+        if not os.path.exists(backup_path):
             raise FileNotFoundError(f"Backup file not found: {backup_path}")
+        # Release pooled connections so no reader holds a stale snapshot
+        self.close_all()
+        source = sqlite3.connect(backup_path)
+        target = sqlite3.connect(self.db_path, timeout=BUSY_TIMEOUT)
+        try:
+            source.backup(target)
+        finally:
+            source.close()
+            target.close()
+        logger.info(f"Database restored from {backup_path}")
     
     def vacuum_database(self):
         """Optimize database (VACUUM)"""
@@ -225,4 +346,21 @@ class DatabaseManager:
     def get_table_info(self, table_name: str) -> List[Dict[str, Any]]:
         """Get information about a table's structure"""
         rows = self.execute_query(f"PRAGMA table_info({table_name})")
-        return [dict(row) for row in rows]
\ No newline at end of file
+        return [dict(row) for row in rows]
+
+_managers: Dict[str, DatabaseManager] = {}
+_managers_lock = threading.Lock()
+
+def get_database_manager(db_path: str = "data/database/school_timetable.db") -> DatabaseManager:
+    """
+    Shared DatabaseManager for a database file, one per process
+    
+    Unlike ``DatabaseManager(db_path)`` this never creates sample data: a
+    missing file is left to the caller, as with ``sqlite3.connect``.
+    """
+    key = os.path.abspath(db_path)
+    with _managers_lock:
+        manager = _managers.get(key)
+        if manager is None:
+            manager = _managers[key] = DatabaseManager(db_path, create_if_missing=False)
+        return manager
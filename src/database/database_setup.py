@@ -1,5 +1,30 @@
 import sqlite3
 
+from .migrations import migrate
+
+# Sample school catalogue, also used by the synthetic data generator
+SUBJECTS_BY_GRADE = {
+    9: ['Mathematics', 'English', 'Science', 'History', 'Geography', 'Physical Education', 'Art'],
+    10: ['Algebra', 'Literature', 'Biology', 'World History', 'Chemistry', 'Physical Education', 'Music'],
+    11: ['Geometry', 'Advanced English', 'Physics', 'Modern History', 'Environmental Science', 'Health', 'Drama'],
+    12: ['Calculus', 'Philosophy', 'Advanced Physics', 'Economics', 'Advanced Chemistry', 'Psychology', 'Computer Science'],
+    13: ['Statistics', 'Creative Writing', 'Advanced Biology', 'Political Science', 'Organic Chemistry', 'Sociology', 'Engineering']
+}
+
+LAB_SUBJECTS = {'Science', 'Biology', 'Chemistry', 'Physics', 'Advanced Physics', 
+                'Environmental Science', 'Advanced Chemistry', 'Advanced Biology', 
+                'Organic Chemistry', 'Computer Science', 'Engineering'}
+
+LESSON_COUNTS = {
+    'Mathematics': 5, 'Algebra': 5, 'Geometry': 4, 'Calculus': 4, 'Statistics': 3,
+    'English': 4, 'Literature': 4, 'Advanced English': 3, 'Philosophy': 2, 'Creative Writing': 2,
+    'Science': 4, 'Biology': 4, 'Physics': 4, 'Chemistry': 4, 'Advanced Physics': 3,
+    'Advanced Biology': 3, 'Advanced Chemistry': 3, 'Environmental Science': 3, 'Organic Chemistry': 3,
+    'History': 3, 'World History': 3, 'Modern History': 3, 'Economics': 3, 'Political Science': 2,
+    'Geography': 3, 'Physical Education': 2, 'Health': 2, 'Psychology': 2, 'Sociology': 2,
+    'Art': 2, 'Music': 2, 'Drama': 2, 'Computer Science': 3, 'Engineering': 3
+}
+
 def create_connection(db_file="school_timetable.db"):
     """ Create a database connection to a SQLite database """
     conn = None
@@ -88,12 +113,18 @@ def create_tables(conn):
         c.execute(sql_create_lessons_table)
         c.execute(sql_create_teacher_preferences_table)
         c.execute(sql_create_schedule_table)
+        conn.commit()
+        migrate(conn)
         print("Tables created successfully.")
     except sqlite3.Error as e:
         print(e)
 
-def add_sample_data(conn):
-    """Add comprehensive sample data with 50 teachers, 20 classes, and 7 subjects"""
+def add_sample_data(conn, seed=None):
+    """Add comprehensive sample data with 50 teachers, 20 classes, and 7 subjects
+
+    Pass ``seed`` to get the same availabilities and preferences on every run.
+    For larger or differently shaped schools use ``data_generator.generate_school``.
+    """
     cursor = conn.cursor()
     try:
         # Clear existing data to avoid duplicates on re-run
@@ -124,13 +155,14 @@ def add_sample_data(conn):
         
         import random
         import json
+        rng = random.Random(seed)
         
         for i, name in enumerate(teacher_names):
             # Some teachers have availability restrictions
             availability = {}
-            if random.random() < 0.3:  # 30% of teachers have some restrictions
-                day = random.randint(0, 4)
-                periods = random.sample(range(6), random.randint(1, 2))
+            if rng.random() < 0.3:  # 30% of teachers have some restrictions
+                day = rng.randint(0, 4)
+                periods = rng.sample(range(6), rng.randint(1, 2))
                 availability[str(day)] = periods
             
             cursor.execute("INSERT INTO teachers (name, availability_json) VALUES (?, ?)", 
@@ -146,24 +178,12 @@ def add_sample_data(conn):
                              (class_name, grade))
 
         # Add 7 Subjects per grade level
-        subjects_by_grade = {
-            9: ['Mathematics', 'English', 'Science', 'History', 'Geography', 'Physical Education', 'Art'],
-            10: ['Algebra', 'Literature', 'Biology', 'World History', 'Chemistry', 'Physical Education', 'Music'],
-            11: ['Geometry', 'Advanced English', 'Physics', 'Modern History', 'Environmental Science', 'Health', 'Drama'],
-            12: ['Calculus', 'Philosophy', 'Advanced Physics', 'Economics', 'Advanced Chemistry', 'Psychology', 'Computer Science'],
-            13: ['Statistics', 'Creative Writing', 'Advanced Biology', 'Political Science', 'Organic Chemistry', 'Sociology', 'Engineering']
-        }
-        
         all_subjects = set()
-        for grade_subjects in subjects_by_grade.values():
+        for grade_subjects in SUBJECTS_BY_GRADE.values():
             all_subjects.update(grade_subjects)
         
-        lab_subjects = {'Science', 'Biology', 'Chemistry', 'Physics', 'Advanced Physics', 
-                       'Environmental Science', 'Advanced Chemistry', 'Advanced Biology', 
-                       'Organic Chemistry', 'Computer Science', 'Engineering'}
-        
         for subject in sorted(all_subjects):
-            needs_lab = 1 if subject in lab_subjects else 0
+            needs_lab = 1 if subject in LAB_SUBJECTS else 0
             cursor.execute("INSERT INTO subjects (name, needs_lab) VALUES (?, ?)", 
                          (subject, needs_lab))
 
@@ -182,16 +202,6 @@ def add_sample_data(conn):
                          (lab_name, 1))
 
         # Add Lesson Requirements (each class needs lessons for their grade's subjects)
-        lesson_counts = {
-            'Mathematics': 5, 'Algebra': 5, 'Geometry': 4, 'Calculus': 4, 'Statistics': 3,
-            'English': 4, 'Literature': 4, 'Advanced English': 3, 'Philosophy': 2, 'Creative Writing': 2,
-            'Science': 4, 'Biology': 4, 'Physics': 4, 'Chemistry': 4, 'Advanced Physics': 3,
-            'Advanced Biology': 3, 'Advanced Chemistry': 3, 'Environmental Science': 3, 'Organic Chemistry': 3,
-            'History': 3, 'World History': 3, 'Modern History': 3, 'Economics': 3, 'Political Science': 2,
-            'Geography': 3, 'Physical Education': 2, 'Health': 2, 'Psychology': 2, 'Sociology': 2,
-            'Art': 2, 'Music': 2, 'Drama': 2, 'Computer Science': 3, 'Engineering': 3
-        }
-
         # Get subject IDs
         cursor.execute("SELECT id, name FROM subjects")
         subject_id_map = {name: id for id, name in cursor.fetchall()}
@@ -201,11 +211,11 @@ def add_sample_data(conn):
         class_data = cursor.fetchall()
         
         for class_id, class_name, grade_level in class_data:
-            grade_subjects = subjects_by_grade[grade_level]
+            grade_subjects = SUBJECTS_BY_GRADE[grade_level]
             for subject_name in grade_subjects:
                 if subject_name in subject_id_map:
                     subject_id = subject_id_map[subject_name]
-                    lessons_per_week = lesson_counts.get(subject_name, 3)
+                    lessons_per_week = LESSON_COUNTS.get(subject_name, 3)
                     cursor.execute("INSERT INTO lessons (class_id, subject_id, lessons_per_week) VALUES (?, ?, ?)", 
                                  (class_id, subject_id, lessons_per_week))
 
@@ -219,9 +229,9 @@ def add_sample_data(conn):
         # Generate random preferences for about 40% of teacher-class combinations
         for teacher_id in teacher_ids:
             # Each teacher has preferences for 3-8 classes
-            preferred_classes = random.sample(class_ids, random.randint(3, 8))
+            preferred_classes = rng.sample(class_ids, rng.randint(3, 8))
             for class_id in preferred_classes:
-                preference_score = random.randint(1, 5)
+                preference_score = rng.randint(1, 5)
                 cursor.execute("INSERT INTO teacher_preferences (teacher_id, class_id, preference_score) VALUES (?, ?, ?)", 
                              (teacher_id, class_id, preference_score))
 
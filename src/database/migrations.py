@@ -0,0 +1,172 @@
+"""
+Schema Migrations - Versioned in-place upgrades of existing databases
+
+Each migration has a version number and a list of SQL statements. The
+versions already applied are recorded in ``schema_version``, so ``migrate``
+only runs what a database is missing and existing user databases are
+upgraded without being recreated.
+"""
+
+import sqlite3
+from typing import List, Tuple
+
+# (version, description, statements), in ascending version order
+MIGRATIONS: List[Tuple[int, str, List[str]]] = [
+    (1, "Index schedule, lesson and preference lookups", [
+        # Timetable views, move conflict checks and per-slot lookups
+        "CREATE INDEX IF NOT EXISTS idx_schedules_class_slot ON schedules (class_id, day_of_week, timeslot)",
+        "CREATE INDEX IF NOT EXISTS idx_schedules_teacher_slot ON schedules (teacher_id, day_of_week, timeslot)",
+        "CREATE INDEX IF NOT EXISTS idx_schedules_room_slot ON schedules (room_id, day_of_week, timeslot)",
+        # DELETE FROM schedules WHERE is_locked = 0 before every solver save
+        "CREATE INDEX IF NOT EXISTS idx_schedules_locked ON schedules (is_locked)",
+        # Lesson requirement and preference editors
+        "CREATE INDEX IF NOT EXISTS idx_lessons_class_subject ON lessons (class_id, subject_id)",
+        "CREATE INDEX IF NOT EXISTS idx_teacher_preferences_teacher_class ON teacher_preferences (teacher_id, class_id)",
+    ]),
+    (2, "Keep a history of schedule runs with an active-run pointer", [
+        """CREATE TABLE IF NOT EXISTS schedule_runs (
+            id INTEGER PRIMARY KEY,
+            solver TEXT NOT NULL,
+            params_json TEXT NOT NULL DEFAULT '{}',
+            seed INTEGER,
+            timings_json TEXT NOT NULL DEFAULT '{}',
+            quality_json TEXT NOT NULL DEFAULT '{}',
+            pinned BOOLEAN NOT NULL DEFAULT 0,
+            created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )""",
+        """CREATE TABLE IF NOT EXISTS active_run (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            run_id INTEGER REFERENCES schedule_runs (id)
+        )""",
+        "INSERT OR IGNORE INTO active_run (id, run_id) VALUES (1, NULL)",
+        # Locked lessons have no run; generated lessons belong to exactly one
+        "ALTER TABLE schedules ADD COLUMN run_id INTEGER REFERENCES schedule_runs (id)",
+        # Lookups go through active_schedules, so lead the slot and locked
+        # indexes with the run and only the locked lessons and one run are read
+        "DROP INDEX IF EXISTS idx_schedules_class_slot",
+        "DROP INDEX IF EXISTS idx_schedules_teacher_slot",
+        "DROP INDEX IF EXISTS idx_schedules_room_slot",
+        "DROP INDEX IF EXISTS idx_schedules_locked",
+        "CREATE INDEX IF NOT EXISTS idx_schedules_class_slot ON schedules (run_id, class_id, day_of_week, timeslot)",
+        "CREATE INDEX IF NOT EXISTS idx_schedules_teacher_slot ON schedules (run_id, teacher_id, day_of_week, timeslot)",
+        "CREATE INDEX IF NOT EXISTS idx_schedules_room_slot ON schedules (run_id, room_id, day_of_week, timeslot)",
+        "CREATE INDEX IF NOT EXISTS idx_schedules_locked ON schedules (run_id, is_locked)",
+        # Existing generated lessons become the first, active run
+        """INSERT INTO schedule_runs (solver)
+           SELECT 'imported' FROM schedules WHERE is_locked = 0 GROUP BY is_locked""",
+        "UPDATE schedules SET run_id = (SELECT MAX(id) FROM schedule_runs) WHERE is_locked = 0",
+        "UPDATE active_run SET run_id = (SELECT MAX(id) FROM schedule_runs)",
+        """CREATE VIEW IF NOT EXISTS active_schedules AS
+           SELECT * FROM schedules
+           WHERE run_id IS NULL OR run_id = (SELECT run_id FROM active_run WHERE id = 1)""",
+    ]),
+    (3, "Configurable subject categories and time affinity", [
+        # Categories are matched in position order against the lowercased subject name
+        """CREATE TABLE IF NOT EXISTS subject_categories (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE,
+            keywords_json TEXT NOT NULL DEFAULT '[]',
+            priority INTEGER NOT NULL DEFAULT 0,
+            position INTEGER NOT NULL DEFAULT 0
+        )""",
+        # Weight added to lessons of a category in a period range; NULL day is every day,
+        # NULL last_period runs to the end of the day
+        """CREATE TABLE IF NOT EXISTS category_time_affinity (
+            id INTEGER PRIMARY KEY,
+            category_id INTEGER NOT NULL REFERENCES subject_categories (id) ON DELETE CASCADE,
+            day_of_week INTEGER,
+            first_period INTEGER NOT NULL DEFAULT 0,
+            last_period INTEGER,
+            weight REAL NOT NULL
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_category_time_affinity_category ON category_time_affinity (category_id)",
+        # Explicit category, overriding the keyword match
+        "ALTER TABLE subjects ADD COLUMN category_id INTEGER REFERENCES subject_categories (id)",
+        """INSERT OR IGNORE INTO subject_categories (id, name, keywords_json, priority, position) VALUES
+           (1, 'math', '["math", "algebra", "geometry", "calculus"]', 50, 1),
+           (2, 'physical_science', '["physics", "chemistry"]', 40, 2),
+           (3, 'life_science', '["biology"]', 40, 3),
+           (4, 'language', '["english", "literature", "language"]', 30, 4),
+           (5, 'physical_education', '["physical"]', 0, 5),
+           (6, 'arts', '["art", "music", "drama"]', 0, 6)""",
+        """INSERT INTO category_time_affinity (category_id, day_of_week, first_period, last_period, weight) VALUES
+           (1, NULL, 0, 3, 20), (1, NULL, 4, NULL, -5),
+           (2, NULL, 0, 3, 20), (2, NULL, 4, NULL, -5),
+           (5, NULL, 0, 3, -5), (5, NULL, 4, NULL, 15),
+           (6, NULL, 0, 3, -5), (6, NULL, 4, NULL, 15)""",
+    ]),
+    (4, "Store the weekly timetable grid", [
+        """CREATE TABLE IF NOT EXISTS timetable_grid (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            num_days INTEGER NOT NULL DEFAULT 5 CHECK (num_days > 0),
+            num_periods INTEGER NOT NULL DEFAULT 8 CHECK (num_periods > 0)
+        )""",
+        "INSERT OR IGNORE INTO timetable_grid (id, num_days, num_periods) VALUES (1, 5, 8)",
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+def ensure_version_table(conn: sqlite3.Connection):
+    """Create the schema_version table if needed"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT,
+            applied_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    """Highest migration version applied to a database (0 if none)"""
+    ensure_version_table(conn)
+    row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    return row[0] or 0
+
+def migrate(conn: sqlite3.Connection, target_version: int = LATEST_VERSION) -> int:
+    """
+    Apply pending migrations up to ``target_version``
+
+    Each migration runs in its own transaction together with its
+    schema_version record, so a failure leaves the database at the last
+    completed version.
+
+    Args:
+        conn: Open connection to a database whose tables already exist
+        target_version: Version to upgrade to
+
+    Returns:
+        Schema version after migrating
+    """
+    current = get_schema_version(conn)
+    conn.commit()
+    # The legacy isolation level does not open a transaction for DDL, so
+    # manage BEGIN/COMMIT explicitly while migrating
+    isolation_level = conn.isolation_level
+    conn.isolation_level = None
+    try:
+        for version, description, statements in MIGRATIONS:
+            if version <= current or version > target_version:
+                continue
+            conn.execute("BEGIN")
+            try:
+                for statement in statements:
+                    conn.execute(statement)
+                conn.execute("INSERT INTO schema_version (version, description) VALUES (?, ?)",
+                             (version, description))
+                conn.execute("COMMIT")
+            except sqlite3.Error:
+                conn.execute("ROLLBACK")
+                raise
+            current = version
+    finally:
+        conn.isolation_level = isolation_level
+    return current
+
+def migrate_database(db_file: str) -> int:
+    """Open a database file, apply pending migrations and return its schema version"""
+    conn = sqlite3.connect(db_file)
+    try:
+        return migrate(conn)
+    finally:
+        conn.close()
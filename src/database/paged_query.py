@@ -0,0 +1,134 @@
+"""
+Paged Query - Keyset pagination over a table or join
+
+Data-management windows show a window of rows at a time instead of loading
+whole tables. Pages are fetched with keyset pagination on (sort column, id)
+over the raw expressions, so when the sort column is indexed (the id always
+is) a page is an index seek however deep it is; filtering (LIKE over the
+displayed columns) and sorting run in SQL, and single rows can be re-read
+after an edit instead of reloading everything.
+"""
+
+from typing import Any, List, Optional, Sequence, Tuple
+
+from .database_manager import get_database_manager
+
+# (id, value per column)
+Row = Tuple[Any, ...]
+
+class PagedQuery:
+    """Pages of ``SELECT id, <columns> FROM <source>`` in a chosen order"""
+
+    def __init__(self, db_file: str, source: str, columns: Sequence[Tuple[str, str]], id_expr: str = "id"):
+        """
+        Describe the rows to page through
+
+        Args:
+            db_file: Path to database file
+            source: FROM clause body, e.g. "lessons l JOIN classes c ON l.class_id = c.id"
+            columns: (name, SQL expression) of each displayed column
+            id_expr: SQL expression of the unique row id, the pagination tie-breaker
+        """
+        self.db_file = db_file
+        self.source = source
+        self.columns = list(columns)
+        self.id_expr = id_expr
+        self.expressions = dict(self.columns)
+
+    def _where(self, filter_text: str) -> Tuple[List[str], List[Any]]:
+        if not filter_text:
+            return [], []
+        pattern = f"%{filter_text}%"
+        return ["(" + " OR ".join(f"CAST({expr} AS TEXT) LIKE ?" for _, expr in self.columns) + ")"], \
+            [pattern] * len(self.columns)
+
+    def _keyset(self, sort: Optional[str], ascending: bool,
+                key: Optional[Tuple[Any, Any]]) -> List[Tuple[Optional[str], List[Any]]]:
+        """Conditions for the rows past a keyset position, one per index range
+
+        The raw expressions are compared so an index on the sort column can
+        be used. NULLs sort first ascending and last descending, as in
+        SQLite, so the rows past a position can span two ranges; they are
+        returned in display order.
+        """
+        if key is None:
+            return [(None, [])]
+        value, row_id = key
+        op = '>' if ascending else '<'
+        if sort is None:
+            return [(f"{self.id_expr} {op} ?", [row_id])]
+        expr = self.expressions[sort]
+        if value is None:
+            nulls = (f"{expr} IS NULL AND {self.id_expr} {op} ?", [row_id])
+            return [nulls, (f"{expr} IS NOT NULL", [])] if ascending else [nulls]
+        values = (f"({expr}, {self.id_expr}) {op} (?, ?)", [value, row_id])
+        return [values] if ascending else [values, (f"{expr} IS NULL", [])]
+
+    def _select(self, conditions: List[str], order: str = "", limit: Optional[int] = None) -> str:
+        query = f"SELECT {self.id_expr}, {', '.join(expr for _, expr in self.columns)} FROM {self.source}"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        if order:
+            query += f" ORDER BY {order}"
+        if limit is not None:
+            query += f" LIMIT {int(limit)}"
+        return query
+
+    def _fetch(self, query: str, params: List[Any]) -> List[Row]:
+        conn = get_database_manager(self.db_file).connect()
+        try:
+            return conn.execute(query, params).fetchall()
+        finally:
+            conn.close()
+
+    def sort_key(self, row: Row, sort: Optional[str]) -> Tuple[Any, Any]:
+        """The (sort value, id) keyset position of a fetched row"""
+        value = row[0] if sort is None else row[1 + [name for name, _ in self.columns].index(sort)]
+        return value, row[0]
+
+    def page(self, limit: int = 200, sort: Optional[str] = None, descending: bool = False,
+             filter_text: str = "", after: Optional[Tuple[Any, Any]] = None,
+             before: Optional[Tuple[Any, Any]] = None) -> List[Row]:
+        """
+        One page of rows in display order
+
+        Args:
+            limit: Rows per page
+            sort: Column name to sort by; None sorts by id
+            descending: Reverse the order
+            filter_text: Only rows with this text in one of the columns
+            after: ``sort_key`` of the last row of the previous page, for the next page
+            before: ``sort_key`` of the first row of the current page, for the previous page
+
+        Returns:
+            Up to ``limit`` (id, values...) rows
+        """
+        where, where_params = self._where(filter_text)
+        # Walking backwards flips the comparison and the order, then the page is flipped back
+        backwards = before is not None
+        ascending = descending == backwards
+        direction = "ASC" if ascending else "DESC"
+        order = f"{self.id_expr} {direction}"
+        if sort is not None:
+            # Only known columns can be sorted on
+            order = f"{self.expressions[sort]} {direction}, {order}"
+        rows = []
+        for condition, key_params in self._keyset(sort, ascending, after if after is not None else before):
+            conditions = where + ([condition] if condition else [])
+            rows += self._fetch(self._select(conditions, order, limit - len(rows)), where_params + key_params)
+            if len(rows) >= limit:
+                break
+        return rows[::-1] if backwards else rows
+
+    def count(self, filter_text: str = "") -> int:
+        """Number of rows matching a filter"""
+        conditions, params = self._where(filter_text)
+        query = f"SELECT COUNT(*) FROM {self.source}"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        return self._fetch(query, params)[0][0]
+
+    def row(self, row_id: Any) -> Optional[Row]:
+        """A single row by id, e.g. after it was edited; None if it no longer exists"""
+        rows = self._fetch(self._select([f"{self.id_expr} = ?"]), [row_id])
+        return rows[0] if rows else None
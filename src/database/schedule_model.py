@@ -0,0 +1,204 @@
+"""
+Schedule Model - In-memory copy of the active timetable
+
+Loads every lesson of ``active_schedules`` with its class, teacher, subject
+and room names in one join and indexes them by class, teacher, room and
+(day, period) slot. Timetable views, slot lookups, move conflict checks and
+the valid targets of a move are answered from memory; moving, swapping or
+removing lessons writes only their rows and updates the indexes in place
+instead of reloading.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from .database_manager import get_database_manager
+
+# Entities lessons are indexed by, as used in ``timetable``
+KINDS = ('class', 'teacher', 'room')
+
+LESSON_QUERY = """
+    SELECT s.id, s.class_id, c.name, s.teacher_id, t.name, s.subject_id, sub.name,
+           s.room_id, r.name, s.day_of_week, s.timeslot, s.is_locked
+    FROM active_schedules s
+    JOIN classes c ON s.class_id = c.id
+    JOIN teachers t ON s.teacher_id = t.id
+    JOIN subjects sub ON s.subject_id = sub.id
+    JOIN rooms r ON s.room_id = r.id
+    ORDER BY s.day_of_week, s.timeslot, s.id
+"""
+
+Slot = Tuple[int, int]
+
+class ScheduleModel:
+    """Lessons of the active run indexed by class, teacher, room and slot"""
+
+    def __init__(self, db_file: str):
+        self.db_file = db_file
+        # Lesson dicts by schedule id
+        self.lessons: Dict[int, Dict[str, Any]] = {}
+        # kind -> entity name -> (day, period) -> lesson
+        self.index: Dict[str, Dict[str, Dict[Slot, Dict[str, Any]]]] = {kind: {} for kind in KINDS}
+        self.by_slot: Dict[Slot, List[Dict[str, Any]]] = {}
+
+    def load(self) -> 'ScheduleModel':
+        """(Re)load the active schedule from the database"""
+        conn = get_database_manager(self.db_file).connect()
+        try:
+            rows = conn.execute(LESSON_QUERY).fetchall()
+        finally:
+            conn.close()
+
+        self.lessons = {}
+        self.index = {kind: {} for kind in KINDS}
+        self.by_slot = {}
+        for (lesson_id, class_id, class_name, teacher_id, teacher_name, subject_id, subject_name,
+             room_id, room_name, day, period, locked) in rows:
+            lesson = {
+                'id': lesson_id,
+                'class_id': class_id, 'class': class_name,
+                'teacher_id': teacher_id, 'teacher': teacher_name,
+                'subject_id': subject_id, 'subject': subject_name,
+                'room_id': room_id, 'room': room_name,
+                'day': day, 'period': period, 'locked': bool(locked),
+            }
+            self.lessons[lesson_id] = lesson
+            self._add(lesson)
+        return self
+
+    def timetable(self, kind: str, name: str) -> Dict[Slot, Dict[str, Any]]:
+        """
+        Lessons of one class, teacher or room
+
+        Args:
+            kind: One of ``KINDS``
+            name: Class, teacher or room name
+
+        Returns:
+            Lesson dict by (day, period); do not modify it
+        """
+        return self.index[kind].get(name, {})
+
+    def lessons_at(self, day: int, period: int) -> List[Dict[str, Any]]:
+        """All lessons taught in a slot"""
+        return self.by_slot.get((day, period), [])
+
+    def move_conflict(self, lesson: Dict[str, Any], day: int, period: int) -> Optional[str]:
+        """
+        Why a lesson cannot move to a slot
+
+        Returns:
+            Message naming the busy teacher, class or room, or None if the move is possible
+        """
+        for kind, label in (('teacher', 'Teacher'), ('class', 'Class'), ('room', 'Room')):
+            other = self.timetable(kind, lesson[kind]).get((day, period))
+            if other is not None and other['id'] != lesson['id']:
+                return f"{label} {lesson[kind]} is already busy at this time"
+        return None
+
+    def swap_partner(self, lesson: Dict[str, Any], day: int, period: int) -> Optional[Dict[str, Any]]:
+        """
+        The lesson to trade slots with when moving a lesson to a busy slot
+
+        Returns:
+            The only lesson in the way, if it is not locked and can take the
+            lesson's current slot without a clash; otherwise None
+        """
+        blockers = {}
+        for kind in KINDS:
+            other = self.timetable(kind, lesson[kind]).get((day, period))
+            if other is not None and other['id'] != lesson['id']:
+                blockers[other['id']] = other
+        if len(blockers) != 1:
+            return None
+        other = next(iter(blockers.values()))
+        if other['locked']:
+            return None
+        source = (lesson['day'], lesson['period'])
+        for kind in KINDS:
+            occupant = self.timetable(kind, other[kind]).get(source)
+            if occupant is not None and occupant['id'] != lesson['id']:
+                return None
+        return other
+
+    def move_targets(self, lesson: Dict[str, Any], num_days: int, num_periods: int) -> Dict[Slot, str]:
+        """
+        Where a lesson can go, for every slot of the week
+
+        Returns:
+            Status by (day, period): 'current', 'free' (its teacher, class and
+            room are all free), 'swap' (one unlocked lesson is in the way and
+            can take the current slot) or 'busy'
+        """
+        timetables = [self.timetable(kind, lesson[kind]) for kind in KINDS]
+        targets = {}
+        for day in range(num_days):
+            for period in range(num_periods):
+                slot = (day, period)
+                if slot == (lesson['day'], lesson['period']):
+                    targets[slot] = 'current'
+                elif all(timetable.get(slot, lesson) is lesson for timetable in timetables):
+                    targets[slot] = 'free'
+                elif self.swap_partner(lesson, day, period) is not None:
+                    targets[slot] = 'swap'
+                else:
+                    targets[slot] = 'busy'
+        return targets
+
+    def move(self, lesson_id: int, day: int, period: int):
+        """Move a lesson to another slot in the database and in memory"""
+        lesson = self.lessons[lesson_id]
+        self._execute("UPDATE schedules SET day_of_week = ?, timeslot = ? WHERE id = ?",
+                      [(day, period, lesson_id)])
+        self._discard(lesson)
+        lesson['day'], lesson['period'] = day, period
+        self._add(lesson)
+
+    def swap(self, lesson_id: int, other_id: int):
+        """Exchange the slots of two lessons in one transaction"""
+        lesson, other = self.lessons[lesson_id], self.lessons[other_id]
+        source, target = (lesson['day'], lesson['period']), (other['day'], other['period'])
+        self._execute("UPDATE schedules SET day_of_week = ?, timeslot = ? WHERE id = ?",
+                      [(*target, lesson_id), (*source, other_id)])
+        self._discard(lesson)
+        self._discard(other)
+        lesson['day'], lesson['period'] = target
+        other['day'], other['period'] = source
+        self._add(lesson)
+        self._add(other)
+
+    def remove(self, lesson_id: int):
+        """Delete a lesson from the database and from memory"""
+        lesson = self.lessons.pop(lesson_id)
+        self._execute("DELETE FROM schedules WHERE id = ?", [(lesson_id,)])
+        self._discard(lesson)
+
+    def _execute(self, query: str, rows: List[tuple]):
+        conn = get_database_manager(self.db_file).connect()
+        try:
+            conn.executemany(query, rows)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _add(self, lesson: Dict[str, Any]):
+        slot = (lesson['day'], lesson['period'])
+        self.by_slot.setdefault(slot, []).append(lesson)
+        for kind in KINDS:
+            self.index[kind].setdefault(lesson[kind], {})[slot] = lesson
+
+    def _discard(self, lesson: Dict[str, Any]):
+        slot = (lesson['day'], lesson['period'])
+        remaining = self.by_slot[slot]
+        remaining.remove(lesson)
+        if not remaining:
+            del self.by_slot[slot]
+        for kind in KINDS:
+            timetable = self.index[kind][lesson[kind]]
+            if timetable.get(slot) is not lesson:
+                continue
+            # A clashing lesson of the same entity takes over the slot
+            other = next((o for o in remaining if o[kind] == lesson[kind]), None)
+            if other is None:
+                del timetable[slot]
+            else:
+                timetable[slot] = other
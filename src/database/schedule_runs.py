@@ -0,0 +1,217 @@
+"""
+Schedule Runs - History of solver results
+
+Every save creates a row in ``schedule_runs`` (solver, parameters, seed,
+timings and quality metrics) and tags its lessons in ``schedules`` with the
+run id. Locked lessons have no run. The ``active_run`` pointer selects which
+run the ``active_schedules`` view shows, so switching between the results of
+two solvers is a single UPDATE and old results stay available for comparison.
+Only the newest ``RUN_RETENTION`` runs are kept, plus the active run and any
+pinned ones.
+"""
+
+import json
+import sqlite3
+from typing import Any, Dict, List, Optional, Tuple
+
+from .database_manager import get_database_manager
+
+RUN_LESSON_COLUMNS = "class_id, teacher_id, subject_id, room_id, day_of_week, timeslot"
+# Unpinned runs kept when a new run is saved
+RUN_RETENTION = 20
+
+def run_quality(conn: sqlite3.Connection, run_id: int) -> Dict[str, int]:
+    """
+    Lesson and clash counts of a run together with the locked lessons
+
+    Args:
+        conn: Open database connection
+        run_id: Run to measure
+
+    Returns:
+        Dict with lessons, teacher_conflicts, class_conflicts and room_conflicts
+    """
+    lessons = "SELECT * FROM schedules WHERE run_id IS NULL OR run_id = :run"
+    quality = {
+        'lessons': conn.execute("SELECT COUNT(*) FROM schedules WHERE run_id = ?", (run_id,)).fetchone()[0]
+    }
+    for name, column in (('teacher', 'teacher_id'), ('class', 'class_id'), ('room', 'room_id')):
+        quality[f'{name}_conflicts'] = conn.execute(f"""
+            SELECT COALESCE(SUM(n - 1), 0) FROM (
+                SELECT COUNT(*) AS n FROM ({lessons})
+                GROUP BY {column}, day_of_week, timeslot HAVING n > 1
+            )
+        """, {'run': run_id}).fetchone()[0]
+    return quality
+
+def _run_from_row(row) -> Dict[str, Any]:
+    run_id, solver, params, seed, timings, quality, pinned, created_at, active = row
+    return {
+        'id': run_id,
+        'solver': solver,
+        'params': json.loads(params),
+        'seed': seed,
+        'timings': json.loads(timings),
+        'quality': json.loads(quality),
+        'pinned': bool(pinned),
+        'created_at': created_at,
+        'active': bool(active),
+    }
+
+RUN_QUERY = """
+    SELECT r.id, r.solver, r.params_json, r.seed, r.timings_json, r.quality_json, r.pinned, r.created_at,
+           r.id = (SELECT run_id FROM active_run WHERE id = 1)
+    FROM schedule_runs r
+"""
+
+def list_runs(db_file: str) -> List[Dict[str, Any]]:
+    """All runs, newest first, with their decoded params, timings and quality"""
+    conn = get_database_manager(db_file).connect()
+    try:
+        rows = conn.execute(RUN_QUERY + " ORDER BY r.id DESC").fetchall()
+    finally:
+        conn.close()
+    return [_run_from_row(row) for row in rows]
+
+def get_run(db_file: str, run_id: int) -> Optional[Dict[str, Any]]:
+    """A single run, or None if it does not exist"""
+    conn = get_database_manager(db_file).connect()
+    try:
+        row = conn.execute(RUN_QUERY + " WHERE r.id = ?", (run_id,)).fetchone()
+    finally:
+        conn.close()
+    return _run_from_row(row) if row else None
+
+def get_active_run(db_file: str) -> Optional[int]:
+    """Id of the run shown in the timetable, or None"""
+    conn = get_database_manager(db_file).connect()
+    try:
+        row = conn.execute("SELECT run_id FROM active_run WHERE id = 1").fetchone()
+    finally:
+        conn.close()
+    return row[0] if row else None
+
+def activate_run(db_file: str, run_id: Optional[int]):
+    """
+    Show another run in the timetable
+
+    Args:
+        db_file: Path to database file
+        run_id: Run to activate; None shows only the locked lessons
+    """
+    conn = get_database_manager(db_file).connect()
+    try:
+        if run_id is not None and not conn.execute(
+                "SELECT 1 FROM schedule_runs WHERE id = ?", (run_id,)).fetchone():
+            raise ValueError(f"Unknown schedule run: {run_id}")
+        conn.execute("UPDATE active_run SET run_id = ? WHERE id = 1", (run_id,))
+        conn.commit()
+    finally:
+        conn.close()
+
+def update_run(db_file: str, run_id: int, solver: str = None, params: Dict[str, Any] = None,
+               seed: int = None, timings: Dict[str, Any] = None, quality: Dict[str, Any] = None):
+    """
+    Record more about a run after it was saved
+
+    ``timings`` and ``quality`` are merged into the stored values; the other
+    fields are replaced when given.
+    """
+    conn = get_database_manager(db_file).connect()
+    try:
+        row = conn.execute("SELECT timings_json, quality_json FROM schedule_runs WHERE id = ?",
+                           (run_id,)).fetchone()
+        if row is None:
+            raise ValueError(f"Unknown schedule run: {run_id}")
+        stored_timings, stored_quality = json.loads(row[0]), json.loads(row[1])
+        stored_timings.update(timings or {})
+        stored_quality.update(quality or {})
+        conn.execute("""
+            UPDATE schedule_runs
+            SET solver = COALESCE(?, solver), params_json = COALESCE(?, params_json),
+                seed = COALESCE(?, seed), timings_json = ?, quality_json = ?
+            WHERE id = ?
+        """, (solver, json.dumps(params, default=str) if params is not None else None, seed,
+              json.dumps(stored_timings), json.dumps(stored_quality, default=float), run_id))
+        conn.commit()
+    finally:
+        conn.close()
+
+def pin_run(db_file: str, run_id: int, pinned: bool = True):
+    """Keep a run when old runs are pruned, or let it be pruned again"""
+    conn = get_database_manager(db_file).connect()
+    try:
+        if conn.execute("UPDATE schedule_runs SET pinned = ? WHERE id = ?", (pinned, run_id)).rowcount == 0:
+            raise ValueError(f"Unknown schedule run: {run_id}")
+        conn.commit()
+    finally:
+        conn.close()
+
+def prune_runs(conn: sqlite3.Connection, keep: int = RUN_RETENTION) -> int:
+    """
+    Delete all but the newest ``keep`` unpinned runs, without committing
+
+    The active run and pinned runs are never deleted.
+
+    Args:
+        conn: Open database connection
+        keep: Number of unpinned runs to keep
+
+    Returns:
+        Number of runs deleted
+    """
+    stale = """
+        SELECT id FROM schedule_runs
+        WHERE pinned = 0 AND id IS NOT (SELECT run_id FROM active_run WHERE id = 1)
+        ORDER BY id DESC LIMIT -1 OFFSET ?
+    """
+    run_ids = [row[0] for row in conn.execute(stale, (keep,))]
+    if run_ids:
+        conn.executemany("DELETE FROM schedules WHERE run_id = ?", [(run_id,) for run_id in run_ids])
+        conn.executemany("DELETE FROM schedule_runs WHERE id = ?", [(run_id,) for run_id in run_ids])
+    return len(run_ids)
+
+def delete_run(db_file: str, run_id: int):
+    """Delete a run and its lessons; deleting the active run leaves none active"""
+    conn = get_database_manager(db_file).connect()
+    try:
+        conn.execute("UPDATE active_run SET run_id = NULL WHERE run_id = ?", (run_id,))
+        conn.execute("DELETE FROM schedules WHERE run_id = ?", (run_id,))
+        conn.execute("DELETE FROM schedule_runs WHERE id = ?", (run_id,))
+        conn.commit()
+    finally:
+        conn.close()
+
+def clear_runs(db_file: str) -> int:
+    """Delete every run and all generated lessons, keeping the locked ones"""
+    conn = get_database_manager(db_file).connect()
+    try:
+        conn.execute("UPDATE active_run SET run_id = NULL")
+        deleted = conn.execute("DELETE FROM schedules WHERE is_locked = 0").rowcount
+        conn.execute("DELETE FROM schedule_runs")
+        conn.commit()
+    finally:
+        conn.close()
+    return deleted
+
+def diff_runs(db_file: str, old_run: int, new_run: int) -> Dict[str, List[Tuple[int, ...]]]:
+    """
+    Lessons that differ between two runs
+
+    Returns:
+        Dict with "added" (in ``new_run`` only) and "removed" (in ``old_run``
+        only) lists of (class_id, teacher_id, subject_id, room_id, day, period)
+    """
+    query = f"""
+        SELECT {RUN_LESSON_COLUMNS} FROM schedules WHERE run_id = ?
+        EXCEPT
+        SELECT {RUN_LESSON_COLUMNS} FROM schedules WHERE run_id = ?
+        ORDER BY day_of_week, timeslot, class_id
+    """
+    conn = get_database_manager(db_file).connect()
+    try:
+        added = conn.execute(query, (new_run, old_run)).fetchall()
+        removed = conn.execute(query, (old_run, new_run)).fetchall()
+    finally:
+        conn.close()
+    return {'added': added, 'removed': removed}
@@ -0,0 +1,163 @@
+"""
+Schedule Writer - Bulk persistence of solver output
+
+All solvers save through this module. Rows are keyed on database ids and
+stored as a new schedule run inside a single transaction with one
+executemany; the new run becomes the active one, the newest previous runs
+are kept, and the time spent in each phase is returned to the caller.
+"""
+
+import json
+import time
+from typing import Any, Dict, Iterable, Sequence
+
+from .database_manager import get_database_manager
+from .schedule_runs import RUN_RETENTION, prune_runs, run_quality
+
+INSERT_SCHEDULE_SQL = """
+    INSERT INTO schedules (class_id, teacher_id, subject_id, room_id, day_of_week, timeslot, is_locked, run_id)
+    VALUES (?, ?, ?, ?, ?, ?, 0, ?)
+"""
+
+def write_schedule(db_file: str, rows: Iterable[Sequence[int]], solver: str = "unknown",
+                   params: Dict[str, Any] = None, seed: int = None,
+                   keep_runs: int = RUN_RETENTION) -> Dict[str, float]:
+    """
+    Write schedule rows as a new active run in one transaction
+
+    Args:
+        db_file: Path to database file
+        rows: (class_id, teacher_id, subject_id, room_id, day, period) database-id rows
+        solver: Name of the solver that produced the rows
+        params: Solver parameters to record with the run
+        seed: Random seed to record with the run
+        keep_runs: Unpinned runs kept besides the new one; older ones are pruned
+
+    Returns:
+        Seconds spent per phase: connect, run, insert, quality, prune, commit and total
+    """
+    timings = {}
+    start = time.perf_counter()
+    conn = get_database_manager(db_file).connect()
+    timings['connect'] = time.perf_counter() - start
+    try:
+        cursor = conn.cursor()
+
+        phase = time.perf_counter()
+        cursor.execute("INSERT INTO schedule_runs (solver, params_json, seed) VALUES (?, ?, ?)",
+                       (solver, json.dumps(params or {}, default=str), seed))
+        run_id = cursor.lastrowid
+        cursor.execute("UPDATE active_run SET run_id = ? WHERE id = 1", (run_id,))
+        timings['run'] = time.perf_counter() - phase
+
+        phase = time.perf_counter()
+        cursor.executemany(INSERT_SCHEDULE_SQL, (tuple(row) + (run_id,) for row in rows))
+        timings['insert'] = time.perf_counter() - phase
+
+        phase = time.perf_counter()
+        cursor.execute("UPDATE schedule_runs SET quality_json = ? WHERE id = ?",
+                       (json.dumps(run_quality(conn, run_id)), run_id))
+        timings['quality'] = time.perf_counter() - phase
+
+        phase = time.perf_counter()
+        prune_runs(conn, keep_runs)
+        timings['prune'] = time.perf_counter() - phase
+
+        phase = time.perf_counter()
+        conn.commit()
+        timings['commit'] = time.perf_counter() - phase
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    timings['total'] = time.perf_counter() - start
+    return timings
+
+def patch_schedule(db_file: str, removed_ids: Sequence[int], rows: Iterable[Sequence[int]],
+                   solver: str = "repair") -> Dict[str, float]:
+    """
+    Edit the active run in place in one transaction
+
+    Used by incremental repair: only the changed lessons are written. When
+    no run is active a new one is created for the added rows.
+
+    Args:
+        db_file: Path to database file
+        removed_ids: ``schedules`` row ids to delete
+        rows: (class_id, teacher_id, subject_id, room_id, day, period) database-id rows to add
+        solver: Solver recorded if a new run has to be created
+
+    Returns:
+        Seconds spent per phase: connect, delete, insert, quality, commit and total
+    """
+    timings = {}
+    start = time.perf_counter()
+    conn = get_database_manager(db_file).connect()
+    timings['connect'] = time.perf_counter() - start
+    try:
+        cursor = conn.cursor()
+        run_id = cursor.execute("SELECT run_id FROM active_run WHERE id = 1").fetchone()[0]
+        if run_id is None:
+            cursor.execute("INSERT INTO schedule_runs (solver) VALUES (?)", (solver,))
+            run_id = cursor.lastrowid
+            cursor.execute("UPDATE active_run SET run_id = ? WHERE id = 1", (run_id,))
+
+        phase = time.perf_counter()
+        cursor.executemany("DELETE FROM schedules WHERE id = ? AND is_locked = 0",
+                           ((row_id,) for row_id in removed_ids))
+        timings['delete'] = time.perf_counter() - phase
+
+        phase = time.perf_counter()
+        cursor.executemany(INSERT_SCHEDULE_SQL, (tuple(row) + (run_id,) for row in rows))
+        timings['insert'] = time.perf_counter() - phase
+
+        phase = time.perf_counter()
+        cursor.execute("UPDATE schedule_runs SET quality_json = ? WHERE id = ?",
+                       (json.dumps(run_quality(conn, run_id)), run_id))
+        timings['quality'] = time.perf_counter() - phase
+
+        phase = time.perf_counter()
+        conn.commit()
+        timings['commit'] = time.perf_counter() - phase
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    timings['total'] = time.perf_counter() - start
+    return timings
+
+def save_schedule(db_file: str, problem, schedule: Dict, solver: str = "unknown") -> Dict[str, float]:
+    """
+    Save a solver schedule {(teacher, class, room, day, period): (subject, _)}
+
+    Returns:
+        Per-phase timings of ``write_schedule`` plus the id mapping ("prepare")
+    """
+    start = time.perf_counter()
+    rows = problem.schedule_rows(schedule)
+    prepare = time.perf_counter() - start
+
+    timings = write_schedule(db_file, rows, solver)
+    timings['prepare'] = prepare
+    timings['total'] += prepare
+    return timings
+
+def save_assignments(db_file: str, problem, assignments, solver: str = "unknown") -> Dict[str, float]:
+    """
+    Save (class, teacher, subject, room, day, period) index tuples
+
+    Returns:
+        Per-phase timings of ``write_schedule`` plus the id mapping ("prepare")
+    """
+    start = time.perf_counter()
+    rows = problem.assignment_rows(assignments)
+    prepare = time.perf_counter() - start
+
+    timings = write_schedule(db_file, rows, solver)
+    timings['prepare'] = prepare
+    timings['total'] += prepare
+    return timings
@@ -1,8 +1,12 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import sqlite3
 import json
 from ..core import get_localization, t
+from ..database.database_manager import get_database_manager
+from ..database.paged_query import PagedQuery
+from ..database.schedule_model import ScheduleModel
+from .paged_table import PagedTable
+from .timetable_grid import TimetableGrid
 
 class TimetableApp(tk.Tk):
     def __init__(self):
@@ -16,6 +20,13 @@ class TimetableApp(tk.Tk):
         
         # Database path
         self.db_path = "data/database/school_timetable.db"
+        self.db = get_database_manager(self.db_path)
+        
+        # Hard deadline for a scheduling run, in seconds
+        self.solver_timeout = 300
+        
+        # In-memory copy of the active schedule, answering every timetable lookup
+        self.schedule = ScheduleModel(self.db_path)
 
         # --- Style ---
         self.style = ttk.Style(self)
@@ -37,6 +48,8 @@ class TimetableApp(tk.Tk):
         self.style.configure("Bold.TRadiobutton", font=(font_family, 10, 'bold'))
         self.style.configure("Header.TLabel", background="#007acc", foreground="white", padding=10, font=(font_family, 12, 'bold'))
         self.style.configure("Slot.TButton", font=(font_family, 9), width=15)
+        self.style.configure("FreeSlot.TButton", font=(font_family, 9), width=15, background="#eef7fb", foreground="#666666")
+        self.style.configure("Swap.TButton", background="#ffe0a3")
         self.style.configure("Time.TLabel", background="#f0f0f0", font=(font_family, 10, 'bold'))
         
         # Configure for RTL support if needed
@@ -71,6 +84,9 @@ class TimetableApp(tk.Tk):
         self.item_selector = ttk.Combobox(controls_frame, state="readonly", width=20)
         self.item_selector.pack(side=view_side, padx=20)
         self.item_selector.bind("<<ComboboxSelected>>", self.draw_timetable)
+        # Step through classes or teachers with the arrow keys
+        self.item_selector.bind("<Up>", lambda e: self.select_adjacent_item(-1))
+        self.item_selector.bind("<Down>", lambda e: self.select_adjacent_item(1))
 
         generate_btn = ttk.Button(controls_frame, text=t("generate_schedule"), command=self.generate_schedule)
         generate_btn.pack(side=button_side, padx=5)
@@ -82,18 +98,21 @@ class TimetableApp(tk.Tk):
         export_pdf_btn.pack(side=button_side, padx=5)
 
 
-        # --- Timetable Frame ---
-        self.timetable_frame = ttk.Frame(main_frame)
-        self.timetable_frame.pack(fill=tk.BOTH, expand=True, pady=10)
+        # --- Timetable Grid (built once, refreshed in place) ---
+        days = [t("monday"), t("tuesday"), t("wednesday"), t("thursday"), t("friday")]
+        times = ["08:00-09:00", "09:00-10:00", "10:00-11:00", "11:00-12:00", "12:00-13:00", "13:00-14:00", "14:00-15:00", "15:00-16:00"]
+        self.timetable_grid = TimetableGrid(main_frame, days, times, on_click=self.on_slot_click)
+        self.timetable_grid.pack(fill=tk.BOTH, expand=True, pady=10)
 
         self.ensure_database_exists()
+        self.schedule.load()
         self.load_initial_data()
         self.draw_timetable()
 
     def ensure_database_exists(self):
         """Ensure the database exists with sample data"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self.db.connect()
             cursor = conn.cursor()
             # Check if tables exist
             cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='teachers'")
@@ -101,13 +120,16 @@ class TimetableApp(tk.Tk):
                 # Database doesn't exist, create it
                 conn.close()
                 from ..database.database_setup import create_connection, create_tables, add_sample_data
-                conn = create_connection()
+                conn = create_connection(self.db_path)
                 if conn:
                     create_tables(conn)
                     add_sample_data(conn)
                     conn.close()
                     print("Database created with sample data")
             else:
+                # Bring existing databases up to the current schema version
+                from ..database.migrations import migrate
+                migrate(conn)
                 conn.close()
         except Exception as e:
             print(f"Error ensuring database exists: {e}")
@@ -115,7 +137,7 @@ class TimetableApp(tk.Tk):
     def load_initial_data(self):
         """Loads data into the combobox based on the view selected"""
         view = self.view_var.get()
-        conn = sqlite3.connect(self.db_path)
+        conn = self.db.connect()
         cursor = conn.cursor()
         if view == "Classes":
             cursor.execute("SELECT name FROM classes ORDER BY name")
@@ -133,112 +155,43 @@ class TimetableApp(tk.Tk):
         self.load_initial_data()  # Update dropdown contents
         self.draw_timetable()     # Redraw timetable with new selection
 
+    def select_adjacent_item(self, step):
+        """Show the previous (step -1) or next (step 1) class or teacher"""
+        items = self.item_selector['values']
+        if not items:
+            return "break"
+        current = self.item_selector.current()
+        index = min(max(current + step, 0), len(items) - 1) if current >= 0 else 0
+        if index != current:
+            self.item_selector.current(index)
+            self.draw_timetable()
+        return "break"
 
     def draw_timetable(self, event=None):
-        """Clears and redraws the timetable grid."""
-        for widget in self.timetable_frame.winfo_children():
-            widget.destroy()
-
-        # Define headers with localization
-        days = [t("monday"), t("tuesday"), t("wednesday"), t("thursday"), t("friday")]
-        times = ["08:00-09:00", "09:00-10:00", "10:00-11:00", "11:00-12:00", "12:00-13:00", "13:00-14:00", "14:00-15:00", "15:00-16:00"]
-
-        # Create Day Headers
-        for i, day in enumerate(days):
-            ttk.Label(self.timetable_frame, text=day, style="Header.TLabel", anchor="center").grid(row=0, column=i + 1, sticky="nsew", padx=1, pady=1)
-
-        # Create Time Headers
-        for i, time in enumerate(times):
-            ttk.Label(self.timetable_frame, text=time, style="Time.TLabel", anchor="center").grid(row=i + 1, column=0, sticky="nsew", padx=5)
-
-        # Get current selection
+        """Refreshes the timetable grid for the selected class or teacher."""
         selected_item = self.item_selector.get()
         view_type = self.view_var.get()
         
-        # Load schedule data from database
-        schedule_data = self.load_schedule_data(selected_item, view_type)
-
-        # Create Timetable Slots (Buttons)
-        for r, time in enumerate(times):
-            for c, day in enumerate(days):
-                # Look for lesson at this time slot
-                lesson_info = ""
-                slot_data = schedule_data.get((c, r), None)  # (day, period)
-                
-                if slot_data:
-                    if view_type == "Classes":
-                        lesson_info = f"{slot_data['subject']}\n{slot_data['teacher']}\n{slot_data['room']}"
-                    else:  # Teachers view
-                        lesson_info = f"{slot_data['subject']}\n{slot_data['class']}\n{slot_data['room']}"
-                else:
-                    lesson_info = t("free")
-                
-                slot_btn = ttk.Button(self.timetable_frame, text=lesson_info, style="Slot.TButton")
-                slot_btn.grid(row=r + 1, column=c + 1, sticky="nsew", padx=1, pady=1)
-                
-                # Add click binding for editing (will implement later)
-                slot_btn.bind("<Button-1>", lambda e, d=c, p=r: self.on_slot_click(d, p))
+        schedule_data = self.get_schedule_data(selected_item, view_type)
+        
+        lessons = {}
+        for slot, slot_data in schedule_data.items():
+            if view_type == "Classes":
+                lessons[slot] = f"{slot_data['subject']}\n{slot_data['teacher']}\n{slot_data['room']}"
+            else:  # Teachers view
+                lessons[slot] = f"{slot_data['subject']}\n{slot_data['class']}\n{slot_data['room']}"
+        self.timetable_grid.show(lessons, free_text=t("free"))
 
-        # Configure grid weights to make it expand
-        for i in range(len(days) + 1):
-            self.timetable_frame.grid_columnconfigure(i, weight=1)
-        for i in range(len(times) + 1):
-            self.timetable_frame.grid_rowconfigure(i, weight=1)
+    def refresh_timetable(self):
+        """Reload the schedule model after lessons changed outside it and redraw"""
+        self.schedule.load()
+        self.draw_timetable()
 
-    def load_schedule_data(self, selected_item, view_type):
-        """Load schedule data for the selected item from database"""
+    def get_schedule_data(self, selected_item, view_type):
+        """Lessons of the selected class or teacher by (day, period), from the schedule model"""
         if not selected_item:
             return {}
-        
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        schedule_data = {}
-        
-        if view_type == "Classes":
-            # Load schedule for specific class
-            cursor.execute("""
-                SELECT s.day_of_week, s.timeslot, sub.name as subject, t.name as teacher, r.name as room
-                FROM schedules s
-                JOIN classes c ON s.class_id = c.id
-                JOIN subjects sub ON s.subject_id = sub.id
-                JOIN teachers t ON s.teacher_id = t.id
-                JOIN rooms r ON s.room_id = r.id
-                WHERE c.name = ?
-                ORDER BY s.day_of_week, s.timeslot
-            """, (selected_item,))
-        else:  # Teachers view
-            # Load schedule for specific teacher
-            cursor.execute("""
-                SELECT s.day_of_week, s.timeslot, sub.name as subject, c.name as class, r.name as room
-                FROM schedules s
-                JOIN classes c ON s.class_id = c.id
-                JOIN subjects sub ON s.subject_id = sub.id
-                JOIN teachers t ON s.teacher_id = t.id
-                JOIN rooms r ON s.room_id = r.id
-                WHERE t.name = ?
-                ORDER BY s.day_of_week, s.timeslot
-            """, (selected_item,))
-        
-        results = cursor.fetchall()
-        conn.close()
-        
-        for row in results:
-            day, period = row[0], row[1]
-            if view_type == "Classes":
-                schedule_data[(day, period)] = {
-                    'subject': row[2],
-                    'teacher': row[3],
-                    'room': row[4]
-                }
-            else:
-                schedule_data[(day, period)] = {
-                    'subject': row[2],
-                    'class': row[3],
-                    'room': row[4]
-                }
-        
-        return schedule_data
+        return self.schedule.timetable("class" if view_type == "Classes" else "teacher", selected_item)
 
     def on_slot_click(self, day, period):
         """Handle click on a timetable slot for editing"""
@@ -248,7 +201,7 @@ class TimetableApp(tk.Tk):
         if not selected_item:
             return
         
-        schedule_data = self.load_schedule_data(selected_item, view_type)
+        schedule_data = self.get_schedule_data(selected_item, view_type)
         slot_data = schedule_data.get((day, period), None)
         
         # Open edit dialog
@@ -310,24 +263,10 @@ class TimetableApp(tk.Tk):
     def remove_lesson(self, day, period, selected_item, view_type, parent_window):
         """Remove a lesson from the schedule"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            if view_type == "Classes":
-                cursor.execute("""
-                    DELETE FROM schedules 
-                    WHERE class_id = (SELECT id FROM classes WHERE name = ?) 
-                    AND day_of_week = ? AND timeslot = ?
-                """, (selected_item, day, period))
-            else:
-                cursor.execute("""
-                    DELETE FROM schedules 
-                    WHERE teacher_id = (SELECT id FROM teachers WHERE name = ?) 
-                    AND day_of_week = ? AND timeslot = ?
-                """, (selected_item, day, period))
-            
-            conn.commit()
-            conn.close()
+            lesson = self.get_schedule_data(selected_item, view_type).get((day, period))
+            if lesson is None:
+                return
+            self.schedule.remove(lesson['id'])
             
             parent_window.destroy()
             self.draw_timetable()
@@ -368,50 +307,38 @@ class TimetableApp(tk.Tk):
         for i, time in enumerate(times):
             ttk.Label(frame, text=time, font=(font_family, 9)).grid(row=i + 1, column=0, padx=2, pady=2, sticky="e")
         
+        # Where the lesson can go: free targets move it, "swap" targets trade
+        # slots with the one lesson in the way, busy slots are disabled
+        targets = self.schedule.move_targets(lesson_data, len(days), len(times))
+        
         # Create buttons for each slot
         for r, time in enumerate(times):
             for c, day in enumerate(days):
-                btn = ttk.Button(frame, text=t("select"), width=8,
-                               command=lambda d=c, p=r: self.move_lesson(old_day, old_period, d, p, selected_item, view_type, lesson_data, window, parent_window))
+                status = targets[(c, r)]
+                if status == 'free':
+                    btn = ttk.Button(frame, text=t("select"), width=8,
+                                   command=lambda d=c, p=r: self.move_lesson(old_day, old_period, d, p, selected_item, view_type, lesson_data, window, parent_window))
+                elif status == 'swap':
+                    btn = ttk.Button(frame, text=t("swap"), width=8, style="Swap.TButton",
+                                   command=lambda d=c, p=r: self.swap_lesson(d, p, lesson_data, window, parent_window))
+                else:
+                    btn = ttk.Button(frame, text=t("current") if status == 'current' else t("busy"), width=8, state="disabled")
                 btn.grid(row=r + 1, column=c + 1, padx=1, pady=1)
-                
-                # Disable current slot
-                if c == old_day and r == old_period:
-                    btn.config(state="disabled", text=t("current"))
         
         ttk.Button(window, text=t("cancel"), command=window.destroy).pack(pady=10)
 
     def move_lesson(self, old_day, old_period, new_day, new_period, selected_item, view_type, lesson_data, move_window, edit_window):
         """Move a lesson to a new time slot"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
             # Check for conflicts at the new time slot
-            conflict_check = self.check_move_conflicts(new_day, new_period, lesson_data, cursor)
+            conflict_check = self.schedule.move_conflict(lesson_data, new_day, new_period)
             
             if conflict_check:
-                print(f"Cannot move lesson: {conflict_check}")
+                messagebox.showerror(t("error"), conflict_check, parent=move_window)
                 return
             
             # Update the lesson time
-            if view_type == "Classes":
-                cursor.execute("""
-                    UPDATE schedules 
-                    SET day_of_week = ?, timeslot = ?
-                    WHERE class_id = (SELECT id FROM classes WHERE name = ?) 
-                    AND day_of_week = ? AND timeslot = ?
-                """, (new_day, new_period, selected_item, old_day, old_period))
-            else:
-                cursor.execute("""
-                    UPDATE schedules 
-                    SET day_of_week = ?, timeslot = ?
-                    WHERE teacher_id = (SELECT id FROM teachers WHERE name = ?) 
-                    AND day_of_week = ? AND timeslot = ?
-                """, (new_day, new_period, selected_item, old_day, old_period))
-            
-            conn.commit()
-            conn.close()
+            self.schedule.move(lesson_data['id'], new_day, new_period)
             
             move_window.destroy()
             edit_window.destroy()
@@ -420,44 +347,24 @@ class TimetableApp(tk.Tk):
             
         except Exception as e:
             print(f"Error moving lesson: {e}")
-
-    def check_move_conflicts(self, day, period, lesson_data, cursor):
-        """Check for conflicts when moving a lesson"""
-        # Check if teacher is already busy
-        if 'teacher' in lesson_data:
-            cursor.execute("""
-                SELECT COUNT(*) FROM schedules s
-                JOIN teachers t ON s.teacher_id = t.id
-                WHERE t.name = ? AND s.day_of_week = ? AND s.timeslot = ?
-            """, (lesson_data['teacher'], day, period))
             
-            if cursor.fetchone()[0] > 0:
-                return f"Teacher {lesson_data['teacher']} is already busy at this time"
-        
-        # Check if class is already busy (if we know the class)
-        if 'class' in lesson_data:
-            cursor.execute("""
-                SELECT COUNT(*) FROM schedules s
-                JOIN classes c ON s.class_id = c.id
-                WHERE c.name = ? AND s.day_of_week = ? AND s.timeslot = ?
-            """, (lesson_data['class'], day, period))
-            
-            if cursor.fetchone()[0] > 0:
-                return f"Class {lesson_data['class']} is already busy at this time"
-        
-        # Check if room is already busy
-        if 'room' in lesson_data:
-            cursor.execute("""
-                SELECT COUNT(*) FROM schedules s
-                JOIN rooms r ON s.room_id = r.id
-                WHERE r.name = ? AND s.day_of_week = ? AND s.timeslot = ?
-            """, (lesson_data['room'], day, period))
+    def swap_lesson(self, day, period, lesson_data, move_window, edit_window):
+        """Trade slots with the lesson blocking a move"""
+        try:
+            other = self.schedule.swap_partner(lesson_data, day, period)
+            if other is None:
+                messagebox.showerror(t("error"), self.schedule.move_conflict(lesson_data, day, period), parent=move_window)
+                return
+            self.schedule.swap(lesson_data['id'], other['id'])
             
-            if cursor.fetchone()[0] > 0:
-                return f"Room {lesson_data['room']} is already busy at this time"
-        
-        return None  # No conflicts
+            move_window.destroy()
+            edit_window.destroy()
+            self.draw_timetable()
+            print("Lessons swapped successfully")
             
+        except Exception as e:
+            print(f"Error swapping lessons: {e}")
+
     def generate_schedule(self):
         """Generate a new schedule with algorithm selection"""
         # Create algorithm selection dialog
@@ -488,7 +395,8 @@ class TimetableApp(tk.Tk):
             ("ml_inspired", t("ml_inspired"), t("ml_inspired_desc")),
             ("fast_greedy", t("fast_greedy"), t("fast_greedy_desc")),
             ("ortools", t("ortools"), t("ortools_desc")),
-            ("simple", t("simple"), t("simple_desc"))
+            ("simple", t("simple"), t("simple_desc")),
+            ("portfolio", t("portfolio"), t("portfolio_desc"))
         ]
         
         # Create scrollable frame for algorithms
@@ -574,7 +482,7 @@ class TimetableApp(tk.Tk):
         # Show progress
         progress_window = tk.Toplevel(self)
         progress_window.title(t("generating_schedule"))
-        progress_window.geometry("400x150")
+        progress_window.geometry("400x190")
         progress_window.grab_set()
         
         # Apply RTL layout if Arabic
@@ -585,8 +493,8 @@ class TimetableApp(tk.Tk):
         progress_window.transient(self)
         self.update_idletasks()
         x = (self.winfo_x() + (self.winfo_width() // 2)) - 200
-        y = (self.winfo_y() + (self.winfo_height() // 2)) - 75
-        progress_window.geometry(f"400x150+{x}+{y}")
+        y = (self.winfo_y() + (self.winfo_height() // 2)) - 95
+        progress_window.geometry(f"400x190+{x}+{y}")
         
         ttk.Label(progress_window, text=f"{t('running_algorithm')}: {algorithm.replace('_', ' ').title()}...", 
                  font=(self.localization.get_font_family(), 12)).pack(pady=20)
@@ -599,31 +507,18 @@ class TimetableApp(tk.Tk):
                                 font=(self.localization.get_font_family(), 10))
         status_label.pack(pady=10)
         
-        # Update display
-        progress_window.update()
+        # Map algorithm names to SolverType enum
+        solver_map = {
+            "ultra_fast": SolverType.ULTRA_FAST,
+            "smart_greedy": SolverType.SMART_GREEDY,
+            "ml_inspired": SolverType.ML_INSPIRED,
+            "fast_greedy": SolverType.FAST_GREEDY,
+            "ortools": SolverType.ORTOOLS,
+            "simple": SolverType.SIMPLE,
+            "portfolio": SolverType.PORTFOLIO
+        }
         
-        try:
-            # Map algorithm names to SolverType enum
-            solver_map = {
-                "ultra_fast": SolverType.ULTRA_FAST,
-                "smart_greedy": SolverType.SMART_GREEDY,
-                "ml_inspired": SolverType.ML_INSPIRED,
-                "fast_greedy": SolverType.FAST_GREEDY,
-                "ortools": SolverType.ORTOOLS,
-                "simple": SolverType.SIMPLE
-            }
-            
-            solver_type = solver_map.get(algorithm)
-            if not solver_type:
-                raise ValueError(f"Unknown algorithm: {algorithm}")
-            
-            status_label.config(text=t("running_algorithm_status"))
-            progress_window.update()
-            
-            # Use the solver factory
-            db_path = "data/database/school_timetable.db"
-            result = SolverFactory.solve(solver_type, db_path)
-            
+        def show_result(result):
             progress_bar.stop()
             progress_window.destroy()
             
@@ -637,7 +532,7 @@ class TimetableApp(tk.Tk):
                 tk.messagebox.showinfo(t("schedule_generated"), success_msg)
                 
                 # Refresh the timetable display
-                self.draw_timetable()
+                self.refresh_timetable()
             else:
                 error_msg = f"❌ {t('failed_to_generate_schedule')}\n\n"
                 error_msg += f"{t('algorithm')}: {result.algorithm.replace('_', ' ').title()}\n"
@@ -648,11 +543,38 @@ class TimetableApp(tk.Tk):
                 
                 tk.messagebox.showerror(t("scheduling_failed"), error_msg)
         
+        try:
+            solver_type = solver_map.get(algorithm)
+            if not solver_type:
+                raise ValueError(f"Unknown algorithm: {algorithm}")
+            
+            # Run the solver in a worker process so the UI stays responsive;
+            # runaway solves are killed after the deadline or on cancel
+            db_path = "data/database/school_timetable.db"
+            job = SolverFactory.submit(solver_type, db_path, timeout=self.solver_timeout)
         except Exception as e:
             progress_bar.stop()
             progress_window.destroy()
             tk.messagebox.showerror(t("error"), f"{t('an_error_occurred')}:\n{str(e)}")
             print(f"Error in scheduling: {e}")  # Debug info
+            return
+        
+        status_label.config(text=t("running_algorithm_status"))
+        cancel_btn = ttk.Button(progress_window, text=t("cancel"), command=job.cancel)
+        cancel_btn.pack(pady=5)
+        progress_window.protocol("WM_DELETE_WINDOW", job.cancel)
+        
+        def poll_job():
+            for event in job.poll():
+                status_label.config(text=t("solution_progress", count=event['solution'],
+                                           objective=event['objective'], bound=event['bound'],
+                                           time=event['wall_time']))
+            if job.done():
+                show_result(job.result)
+            else:
+                self.after(100, poll_job)
+        
+        self.after(100, poll_job)
         
     def create_menu(self):
         """Create the application menu bar"""
@@ -682,6 +604,9 @@ class TimetableApp(tk.Tk):
         tools_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label=t("menu_tools"), menu=tools_menu)
         tools_menu.add_command(label=t("database_statistics"), command=self.show_database_stats)
+        tools_menu.add_command(label=t("schedule_runs"), command=self.manage_schedule_runs)
+        tools_menu.add_command(label=t("export_all_timetables_pdf"), command=self.export_all_pdf)
+        tools_menu.add_command(label=t("export_timetables_separate_pdf"), command=lambda: self.export_all_pdf(separate=True))
         tools_menu.add_command(label=t("clear_all_schedules"), command=self.clear_schedules)
         tools_menu.add_command(label=t("import_sample_data"), command=self.import_sample_data)
         tools_menu.add_command(label=t("backup_database"), command=self.backup_database)
@@ -733,63 +658,40 @@ class TimetableApp(tk.Tk):
         if self.localization.is_rtl():
             window.option_add('*TLabel*font', font_family)
         
-        # Create treeview for data display
-        tree_frame = ttk.Frame(window)
-        tree_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-        
-        tree = ttk.Treeview(tree_frame, columns=columns, show='tree headings')
-        tree.pack(fill=tk.BOTH, expand=True)
-        
-        # Configure columns
-        tree.heading('#0', text=t("id"))
-        tree.column('#0', width=50)
-        for col in columns:
-            # Try to get localized column name, fallback to formatted column name
-            col_text = t(col) if col in ['name', 'subject', 'teacher', 'class', 'room'] else col.replace('_', ' ').title()
-            tree.heading(col, text=col_text)
-            tree.column(col, width=150)
-        
-        # Load data
-        self.refresh_data_tree(tree, table_name, columns)
+        # Paged table; sorting, filtering and paging run in SQL
+        headings = [t(col) if col in ['name', 'subject', 'teacher', 'class', 'room'] else col.replace('_', ' ').title()
+                    for col in columns]
+        query = PagedQuery(self.db_path, table_name, [(col, col) for col in columns])
+        table = PagedTable(window, query, headings, show_id=True)
+        table.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
         
         # Buttons frame
         buttons_frame = ttk.Frame(window)
         buttons_frame.pack(fill=tk.X, padx=10, pady=5)
         
-        ttk.Button(buttons_frame, text=t("add"), command=lambda: self.add_record(table_name, columns, tree)).pack(side=tk.LEFT, padx=5)
-        ttk.Button(buttons_frame, text=t("edit"), command=lambda: self.edit_record(table_name, columns, tree)).pack(side=tk.LEFT, padx=5)
-        ttk.Button(buttons_frame, text=t("delete"), command=lambda: self.delete_record(table_name, tree)).pack(side=tk.LEFT, padx=5)
-        ttk.Button(buttons_frame, text=t("refresh"), command=lambda: self.refresh_data_tree(tree, table_name, columns)).pack(side=tk.LEFT, padx=5)
-
-    def refresh_data_tree(self, tree, table_name, columns):
-        """Refresh the data in a treeview"""
-        for item in tree.get_children():
-            tree.delete(item)
-        
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute(f"SELECT id, {', '.join(columns)} FROM {table_name}")
-        for row in cursor.fetchall():
-            tree.insert('', 'end', text=row[0], values=row[1:])
-        conn.close()
+        ttk.Button(buttons_frame, text=t("add"), command=lambda: self.add_record(table_name, columns, table)).pack(side=tk.LEFT, padx=5)
+        ttk.Button(buttons_frame, text=t("edit"), command=lambda: self.edit_record(table_name, columns, table)).pack(side=tk.LEFT, padx=5)
+        ttk.Button(buttons_frame, text=t("delete"), command=lambda: self.delete_record(table_name, table)).pack(side=tk.LEFT, padx=5)
+        ttk.Button(buttons_frame, text=t("refresh"), command=table.reload).pack(side=tk.LEFT, padx=5)
 
-    def add_record(self, table_name, columns, tree):
+    def add_record(self, table_name, columns, table):
         """Add a new record"""
-        self.edit_record_window(table_name, columns, tree, None)
+        self.edit_record_window(table_name, columns, table, None)
 
-    def edit_record(self, table_name, columns, tree):
+    def edit_record(self, table_name, columns, table):
         """Edit selected record"""
-        selection = tree.selection()
-        if not selection:
+        record_id = table.selected_id()
+        if record_id is None:
             return
         
-        item = tree.item(selection[0])
-        record_id = item['text']
-        values = item['values']
+        row = table.query.row(record_id)
+        if row is None:
+            table.remove_row(record_id)
+            return
         
-        self.edit_record_window(table_name, columns, tree, record_id, values)
+        self.edit_record_window(table_name, columns, table, record_id, row[1:])
 
-    def edit_record_window(self, table_name, columns, tree, record_id=None, values=None):
+    def edit_record_window(self, table_name, columns, table, record_id=None, values=None):
         """Open edit/add record window"""
         window = tk.Toplevel(self)
         window.title(f"{t('edit') if record_id else t('add')} {table_name.title()[:-1]}")
@@ -800,12 +702,12 @@ class TimetableApp(tk.Tk):
             ttk.Label(window, text=col.replace('_', ' ').title() + ":").pack(pady=5)
             entry = ttk.Entry(window, width=30)
             entry.pack(pady=5)
-            if values:
+            if values and values[i] is not None:
                 entry.insert(0, str(values[i]))
             entries[col] = entry
         
         def save_record():
-            conn = sqlite3.connect(self.db_path)
+            conn = self.db.connect()
             cursor = conn.cursor()
             
             field_values = [entries[col].get() for col in columns]
@@ -813,35 +715,38 @@ class TimetableApp(tk.Tk):
             if record_id:  # Edit
                 placeholders = ', '.join([f"{col} = ?" for col in columns])
                 cursor.execute(f"UPDATE {table_name} SET {placeholders} WHERE id = ?", field_values + [record_id])
+                saved_id = record_id
             else:  # Add
                 placeholders = ', '.join(['?' for _ in columns])
                 cursor.execute(f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({placeholders})", field_values)
+                saved_id = cursor.lastrowid
             
             conn.commit()
             conn.close()
             
-            self.refresh_data_tree(tree, table_name, columns)
+            # Only the saved row is re-read, not the whole table
+            table.refresh_row(saved_id)
             self.load_initial_data()  # Refresh main window data
+            self.refresh_timetable()
             window.destroy()
         
         ttk.Button(window, text=t("save"), command=save_record).pack(pady=10)
 
-    def delete_record(self, table_name, tree):
+    def delete_record(self, table_name, table):
         """Delete selected record"""
-        selection = tree.selection()
-        if not selection:
+        record_id = table.selected_id()
+        if record_id is None:
             return
         
-        record_id = tree.item(selection[0])['text']
-        
-        conn = sqlite3.connect(self.db_path)
+        conn = self.db.connect()
         cursor = conn.cursor()
         cursor.execute(f"DELETE FROM {table_name} WHERE id = ?", (record_id,))
         conn.commit()
         conn.close()
         
-        self.refresh_data_tree(tree, table_name, tree.cget('columns'))
+        table.remove_row(record_id)
         self.load_initial_data()  # Refresh main window data
+        self.refresh_timetable()
 
     def export_pdf(self):
         """Export current view to PDF"""
@@ -859,7 +764,7 @@ class TimetableApp(tk.Tk):
             days = [t("monday"), t("tuesday"), t("wednesday"), t("thursday"), t("friday")]
             times = ["08:00-09:00", "09:00-10:00", "10:00-11:00", "11:00-12:00", "12:00-13:00", "13:00-14:00", "14:00-15:00", "15:00-16:00"]
             
-            schedule_data = self.load_schedule_data(selected_item, view_type)
+            schedule_data = self.get_schedule_data(selected_item, view_type)
             
             # Create table data
             table_data = [[t('time_slot')] + days]
@@ -885,74 +790,52 @@ class TimetableApp(tk.Tk):
         except Exception as e:
             print(f"Error exporting PDF: {e}")
 
-    def export_excel(self):
-        """Export all schedules to Excel"""
+    def export_all_pdf(self, separate=False):
+        """Export every class, teacher and room timetable to one PDF, or to one PDF each"""
+        from tkinter import filedialog
+        
+        if separate:
+            output = filedialog.askdirectory(parent=self, title=t("export_timetables_separate_pdf"))
+        else:
+            output = filedialog.asksaveasfilename(parent=self, title=t("export_all_timetables_pdf"),
+                                                  defaultextension=".pdf", initialfile="school_timetables.pdf",
+                                                  filetypes=[("PDF", "*.pdf")])
+        if not output:
+            return
         try:
-            import openpyxl
-            from openpyxl.styles import Font, PatternFill, Alignment
-            
-            # Create workbook
-            wb = openpyxl.Workbook()
-            # Remove default sheet
-            wb.remove(wb.active)
+            from ..utils.pdf_export import export_timetables_to_pdf
             
             days = [t("monday"), t("tuesday"), t("wednesday"), t("thursday"), t("friday")]
             times = ["08:00-09:00", "09:00-10:00", "10:00-11:00", "11:00-12:00", "12:00-13:00", "13:00-14:00", "14:00-15:00", "15:00-16:00"]
+            labels = {'class': t("class"), 'teacher': t("teacher"), 'room': t("room")}
             
-            # Create sheets for each class
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute("SELECT name FROM classes ORDER BY name")
-            classes = [row[0] for row in cursor.fetchall()]
+            self.config(cursor="watch")
+            self.update_idletasks()
+            export_timetables_to_pdf(self.db_path, output, separate=separate, days=days, times=times,
+                                     corner=t("time_slot"), labels=labels)
+            print(f"{t('pdf_exported')} {output}")
             
-            for class_name in classes:
-                ws = wb.create_sheet(title=class_name)
-                
-                # Headers
-                ws.cell(row=1, column=1, value=t("time_slot"))
-                for c, day in enumerate(days):
-                    ws.cell(row=1, column=c + 2, value=day)
-                
-                # Style headers
-                for col in range(1, len(days) + 2):
-                    cell = ws.cell(row=1, column=col)
-                    cell.font = Font(bold=True)
-                    cell.fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-                    cell.alignment = Alignment(horizontal="center")
-                
-                # Get schedule data for this class
-                schedule_data = self.load_schedule_data(class_name, "Classes")
-                
-                # Fill in timetable
-                for r, time in enumerate(times):
-                    ws.cell(row=r + 2, column=1, value=time)
-                    
-                    for c, day in enumerate(days):
-                        slot_data = schedule_data.get((c, r), None)
-                        if slot_data:
-                            cell_text = f"{slot_data['subject']}\n{slot_data['teacher']}\n{slot_data['room']}"
-                        else:
-                            cell_text = ""
-                        
-                        cell = ws.cell(row=r + 2, column=c + 2, value=cell_text)
-                        cell.alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
-                        
-                        if slot_data:
-                            cell.fill = PatternFill(start_color="E7E6E6", end_color="E7E6E6", fill_type="solid")
-                
-                # Adjust column widths
-                for col in range(1, len(days) + 2):
-                    ws.column_dimensions[openpyxl.utils.get_column_letter(col)].width = 20
-                
-                # Adjust row heights
-                for row in range(2, len(times) + 2):
-                    ws.row_dimensions[row].height = 60
+        except Exception as e:
+            print(f"Error exporting PDF: {e}")
+        finally:
+            self.config(cursor="")
+
+    def export_excel(self):
+        """Export every class, teacher and room timetable to Excel"""
+        from tkinter import filedialog
+        
+        filename = filedialog.asksaveasfilename(parent=self, title=t("export_to_excel"), defaultextension=".xlsx",
+                                                initialfile="school_timetable.xlsx",
+                                                filetypes=[("Excel", "*.xlsx")])
+        if not filename:
+            return
+        try:
+            from ..utils.excel_export import export_schedule_to_excel
             
-            conn.close()
+            days = [t("monday"), t("tuesday"), t("wednesday"), t("thursday"), t("friday")]
+            times = ["08:00-09:00", "09:00-10:00", "10:00-11:00", "11:00-12:00", "12:00-13:00", "13:00-14:00", "14:00-15:00", "15:00-16:00"]
             
-            # Save file
-            filename = "school_timetable.xlsx"
-            wb.save(filename)
+            export_schedule_to_excel(self.db_path, filename, days=days, times=times, corner=t("time_slot"))
             print(f"{t('export_to_excel')} {filename}")
             
         except ImportError:
@@ -974,54 +857,27 @@ class TimetableApp(tk.Tk):
         ttk.Label(main_frame, text="Set teacher preferences for classes (1-5 scale, 5=highest preference):", 
                  font=('Helvetica', 12, 'bold')).pack(pady=10)
         
-        # Create treeview
-        columns = (t('teacher'), t('class'), t('preference'))
-        tree = ttk.Treeview(main_frame, columns=columns, show='headings', height=15)
-        
-        for col in columns:
-            tree.heading(col, text=col)
-            tree.column(col, width=200)
-        
-        # Scrollbar
-        scrollbar = ttk.Scrollbar(main_frame, orient=tk.VERTICAL, command=tree.yview)
-        tree.configure(yscrollcommand=scrollbar.set)
-        
-        tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        
-        # Load preferences
-        def refresh_preferences():
-            for item in tree.get_children():
-                tree.delete(item)
-            
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT t.name, c.name, tp.preference_score, tp.id
-                FROM teacher_preferences tp
-                JOIN teachers t ON tp.teacher_id = t.id
-                JOIN classes c ON tp.class_id = c.id
-                ORDER BY t.name, c.name
-            """)
-            
-            for row in cursor.fetchall():
-                tree.insert('', 'end', values=row[:3], tags=(row[3],))
-            conn.close()
-        
-        refresh_preferences()
+        # Paged table; sorting, filtering and paging run in SQL
+        query = PagedQuery(self.db_path, """teacher_preferences tp
+            JOIN teachers t ON tp.teacher_id = t.id
+            JOIN classes c ON tp.class_id = c.id""",
+                           [('teacher', 't.name'), ('class', 'c.name'), ('preference', 'tp.preference_score')],
+                           id_expr="tp.id")
+        table = PagedTable(main_frame, query, (t('teacher'), t('class'), t('preference')), column_width=200)
+        table.pack(fill=tk.BOTH, expand=True)
         
         # Buttons frame
         btn_frame = ttk.Frame(window)
         btn_frame.pack(fill=tk.X, padx=10, pady=5)
         
         ttk.Button(btn_frame, text=t("add_preference"), 
-                  command=lambda: self.add_teacher_preference(tree, refresh_preferences)).pack(side=tk.LEFT, padx=5)
+                  command=lambda: self.add_teacher_preference(table)).pack(side=tk.LEFT, padx=5)
         ttk.Button(btn_frame, text=t("edit_selected"), 
-                  command=lambda: self.edit_teacher_preference(tree, refresh_preferences)).pack(side=tk.LEFT, padx=5)
+                  command=lambda: self.edit_teacher_preference(table)).pack(side=tk.LEFT, padx=5)
         ttk.Button(btn_frame, text=t("delete_selected"), 
-                  command=lambda: self.delete_teacher_preference(tree, refresh_preferences)).pack(side=tk.LEFT, padx=5)
+                  command=lambda: self.delete_teacher_preference(table)).pack(side=tk.LEFT, padx=5)
 
-    def add_teacher_preference(self, tree, refresh_callback):
+    def add_teacher_preference(self, table):
         """Add new teacher preference"""
         window = tk.Toplevel(self)
         window.title(t("add_teacher_preference"))
@@ -1043,7 +899,7 @@ class TimetableApp(tk.Tk):
         score_spin.pack(pady=5)
         
         # Load teachers and classes
-        conn = sqlite3.connect(self.db_path)
+        conn = self.db.connect()
         cursor = conn.cursor()
         
         cursor.execute("SELECT name FROM teachers ORDER BY name")
@@ -1060,7 +916,7 @@ class TimetableApp(tk.Tk):
             if not teacher_var.get() or not class_var.get():
                 return
             
-            conn = sqlite3.connect(self.db_path)
+            conn = self.db.connect()
             cursor = conn.cursor()
             
             # Get IDs
@@ -1075,24 +931,23 @@ class TimetableApp(tk.Tk):
                 INSERT OR REPLACE INTO teacher_preferences (teacher_id, class_id, preference_score)
                 VALUES (?, ?, ?)
             """, (teacher_id, class_id, int(score_var.get())))
+            preference_id = cursor.lastrowid
             
             conn.commit()
             conn.close()
             
-            refresh_callback()
+            table.refresh_row(preference_id)
             window.destroy()
         
         ttk.Button(window, text=t("save"), command=save_preference).pack(pady=20)
 
-    def edit_teacher_preference(self, tree, refresh_callback):
+    def edit_teacher_preference(self, table):
         """Edit selected teacher preference"""
-        selection = tree.selection()
-        if not selection:
+        pref_id = table.selected_id()
+        if pref_id is None:
             return
         
-        item = tree.item(selection[0])
-        pref_id = item['tags'][0]
-        values = item['values']
+        values = table.selected_values()
         
         window = tk.Toplevel(self)
         window.title(t("edit_teacher_preference"))
@@ -1107,34 +962,31 @@ class TimetableApp(tk.Tk):
         score_spin.pack(pady=5)
         
         def save_preference():
-            conn = sqlite3.connect(self.db_path)
+            conn = self.db.connect()
             cursor = conn.cursor()
             cursor.execute("UPDATE teacher_preferences SET preference_score = ? WHERE id = ?", 
                          (int(score_var.get()), pref_id))
             conn.commit()
             conn.close()
             
-            refresh_callback()
+            table.refresh_row(pref_id)
             window.destroy()
         
         ttk.Button(window, text=t("save"), command=save_preference).pack(pady=20)
 
-    def delete_teacher_preference(self, tree, refresh_callback):
+    def delete_teacher_preference(self, table):
         """Delete selected teacher preference"""
-        selection = tree.selection()
-        if not selection:
+        pref_id = table.selected_id()
+        if pref_id is None:
             return
         
-        item = tree.item(selection[0])
-        pref_id = item['tags'][0]
-        
-        conn = sqlite3.connect(self.db_path)
+        conn = self.db.connect()
         cursor = conn.cursor()
         cursor.execute("DELETE FROM teacher_preferences WHERE id = ?", (pref_id,))
         conn.commit()
         conn.close()
         
-        refresh_callback()
+        table.remove_row(pref_id)
 
     def manage_teacher_availability(self):
         """Open teacher availability management window"""
@@ -1152,7 +1004,7 @@ class TimetableApp(tk.Tk):
         teacher_combo.pack(side=tk.LEFT, padx=10)
         
         # Load teachers
-        conn = sqlite3.connect(self.db_path)
+        conn = self.db.connect()
         cursor = conn.cursor()
         cursor.execute("SELECT name FROM teachers ORDER BY name")
         teachers = [row[0] for row in cursor.fetchall()]
@@ -1192,7 +1044,7 @@ class TimetableApp(tk.Tk):
             for var in availability_vars.values():
                 var.set(True)
             
-            conn = sqlite3.connect(self.db_path)
+            conn = self.db.connect()
             cursor = conn.cursor()
             cursor.execute("SELECT availability_json FROM teachers WHERE name = ?", (teacher_var.get(),))
             result = cursor.fetchone()
@@ -1219,14 +1071,17 @@ class TimetableApp(tk.Tk):
                         unavailable[day] = []
                     unavailable[day].append(period)
             
-            conn = sqlite3.connect(self.db_path)
+            conn = self.db.connect()
             cursor = conn.cursor()
             cursor.execute("UPDATE teachers SET availability_json = ? WHERE name = ?", 
                          (json.dumps(unavailable), teacher_var.get()))
+            cursor.execute("SELECT id FROM teachers WHERE name = ?", (teacher_var.get(),))
+            teacher_id = cursor.fetchone()[0]
             conn.commit()
             conn.close()
             
             print(f"Availability updated for {teacher_var.get()}")
+            self.repair_schedule(teachers=[teacher_id])
         
         teacher_combo.bind("<<ComboboxSelected>>", lambda e: load_teacher_availability())
         
@@ -1246,50 +1101,30 @@ class TimetableApp(tk.Tk):
         window.title(t("lesson_requirements"))
         window.geometry("800x600")
         
-        # Create treeview
-        columns = (t('class'), t('subject'), t('lessons_per_week'))
-        tree = ttk.Treeview(window, columns=columns, show='headings', height=20)
-        
-        for col in columns:
-            tree.heading(col, text=col)
-            tree.column(col, width=200)
-        
-        tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-        
-        def refresh_lessons():
-            for item in tree.get_children():
-                tree.delete(item)
-            
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT c.name, s.name, l.lessons_per_week, l.id
-                FROM lessons l
-                JOIN classes c ON l.class_id = c.id
-                JOIN subjects s ON l.subject_id = s.id
-                ORDER BY c.name, s.name
-            """)
-            
-            for row in cursor.fetchall():
-                tree.insert('', 'end', values=row[:3], tags=(row[3],))
-            conn.close()
-        
-        refresh_lessons()
+        # Paged table; sorting, filtering and paging run in SQL
+        query = PagedQuery(self.db_path, """lessons l
+            JOIN classes c ON l.class_id = c.id
+            JOIN subjects s ON l.subject_id = s.id""",
+                           [('class', 'c.name'), ('subject', 's.name'), ('lessons_per_week', 'l.lessons_per_week')],
+                           id_expr="l.id")
+        table = PagedTable(window, query, (t('class'), t('subject'), t('lessons_per_week')), height=20,
+                           column_width=200)
+        table.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
         
         # Buttons
         btn_frame = ttk.Frame(window)
         btn_frame.pack(fill=tk.X, padx=10, pady=5)
         
         ttk.Button(btn_frame, text=t("add_requirement"), 
-                  command=lambda: self.add_lesson_requirement(tree, refresh_lessons)).pack(side=tk.LEFT, padx=5)
+                  command=lambda: self.add_lesson_requirement(table)).pack(side=tk.LEFT, padx=5)
         ttk.Button(btn_frame, text=t("edit_selected"), 
-                  command=lambda: self.edit_lesson_requirement(tree, refresh_lessons)).pack(side=tk.LEFT, padx=5)
+                  command=lambda: self.edit_lesson_requirement(table)).pack(side=tk.LEFT, padx=5)
         ttk.Button(btn_frame, text=t("delete_selected"), 
-                  command=lambda: self.delete_lesson_requirement(tree, refresh_lessons)).pack(side=tk.LEFT, padx=5)
+                  command=lambda: self.delete_lesson_requirement(table)).pack(side=tk.LEFT, padx=5)
         ttk.Button(btn_frame, text="Auto-Generate", 
-                  command=lambda: self.auto_generate_lessons(refresh_lessons)).pack(side=tk.LEFT, padx=5)
+                  command=lambda: self.auto_generate_lessons(table)).pack(side=tk.LEFT, padx=5)
 
-    def add_lesson_requirement(self, tree, refresh_callback):
+    def add_lesson_requirement(self, table):
         """Add new lesson requirement"""
         window = tk.Toplevel(self)
         window.title(t("add_lesson_requirement"))
@@ -1311,7 +1146,7 @@ class TimetableApp(tk.Tk):
         lessons_spin.pack(pady=5)
         
         # Load classes and subjects
-        conn = sqlite3.connect(self.db_path)
+        conn = self.db.connect()
         cursor = conn.cursor()
         
         cursor.execute("SELECT name FROM classes ORDER BY name")
@@ -1328,7 +1163,7 @@ class TimetableApp(tk.Tk):
             if not class_var.get() or not subject_var.get():
                 return
             
-            conn = sqlite3.connect(self.db_path)
+            conn = self.db.connect()
             cursor = conn.cursor()
             
             # Get IDs
@@ -1343,24 +1178,24 @@ class TimetableApp(tk.Tk):
                 INSERT OR REPLACE INTO lessons (class_id, subject_id, lessons_per_week)
                 VALUES (?, ?, ?)
             """, (class_id, subject_id, int(lessons_var.get())))
+            requirement_id = cursor.lastrowid
             
             conn.commit()
             conn.close()
             
-            refresh_callback()
+            table.refresh_row(requirement_id)
             window.destroy()
+            self.repair_schedule(classes=[class_id])
         
         ttk.Button(window, text=t("save"), command=save_requirement).pack(pady=20)
 
-    def edit_lesson_requirement(self, tree, refresh_callback):
+    def edit_lesson_requirement(self, table):
         """Edit selected lesson requirement"""
-        selection = tree.selection()
-        if not selection:
+        lesson_id = table.selected_id()
+        if lesson_id is None:
             return
         
-        item = tree.item(selection[0])
-        lesson_id = item['tags'][0]
-        values = item['values']
+        values = table.selected_values()
         
         window = tk.Toplevel(self)
         window.title(t("edit_lesson_requirement"))
@@ -1375,43 +1210,46 @@ class TimetableApp(tk.Tk):
         lessons_spin.pack(pady=5)
         
         def save_requirement():
-            conn = sqlite3.connect(self.db_path)
+            conn = self.db.connect()
             cursor = conn.cursor()
             cursor.execute("UPDATE lessons SET lessons_per_week = ? WHERE id = ?", 
                          (int(lessons_var.get()), lesson_id))
+            cursor.execute("SELECT class_id FROM lessons WHERE id = ?", (lesson_id,))
+            class_id = cursor.fetchone()[0]
             conn.commit()
             conn.close()
             
-            refresh_callback()
+            table.refresh_row(lesson_id)
             window.destroy()
+            self.repair_schedule(classes=[class_id])
         
         ttk.Button(window, text=t("save"), command=save_requirement).pack(pady=20)
 
-    def delete_lesson_requirement(self, tree, refresh_callback):
+    def delete_lesson_requirement(self, table):
         """Delete selected lesson requirement"""
-        selection = tree.selection()
-        if not selection:
+        lesson_id = table.selected_id()
+        if lesson_id is None:
             return
         
-        item = tree.item(selection[0])
-        lesson_id = item['tags'][0]
-        
-        conn = sqlite3.connect(self.db_path)
+        conn = self.db.connect()
         cursor = conn.cursor()
+        cursor.execute("SELECT class_id FROM lessons WHERE id = ?", (lesson_id,))
+        class_id = cursor.fetchone()[0]
         cursor.execute("DELETE FROM lessons WHERE id = ?", (lesson_id,))
         conn.commit()
         conn.close()
         
-        refresh_callback()
+        table.remove_row(lesson_id)
+        self.repair_schedule(classes=[class_id])
 
-    def auto_generate_lessons(self, refresh_callback):
+    def auto_generate_lessons(self, table):
         """Auto-generate standard lesson requirements"""
         result = tk.messagebox.askyesno("Auto-Generate Lessons", 
                                        "This will generate standard lesson requirements for all classes based on their grade level. Continue?")
         if not result:
             return
         
-        conn = sqlite3.connect(self.db_path)
+        conn = self.db.connect()
         cursor = conn.cursor()
         
         # Clear existing lessons
@@ -1460,7 +1298,7 @@ class TimetableApp(tk.Tk):
         conn.commit()
         conn.close()
         
-        refresh_callback()
+        table.reload(recount=True)
         tk.messagebox.showinfo(t("success"), t("lesson_requirements_generated"))
 
     def manage_scheduling_rules(self):
@@ -1576,15 +1414,17 @@ class TimetableApp(tk.Tk):
         window.geometry("500x400")
         
         # Get statistics
-        conn = sqlite3.connect(self.db_path)
+        conn = self.db.connect()
         cursor = conn.cursor()
         
         stats = {}
-        tables = ['teachers', 'classes', 'subjects', 'rooms', 'lessons', 'teacher_preferences', 'schedules']
+        tables = ['teachers', 'classes', 'subjects', 'rooms', 'lessons', 'teacher_preferences']
         
         for table in tables:
             cursor.execute(f"SELECT COUNT(*) FROM {table}")
             stats[table] = cursor.fetchone()[0]
+        cursor.execute("SELECT COUNT(*) FROM active_schedules")
+        stats['schedules'] = cursor.fetchone()[0]
         
         # Get additional stats
         cursor.execute("SELECT COUNT(*) FROM subjects WHERE needs_lab = 1")
@@ -1627,15 +1467,103 @@ class TimetableApp(tk.Tk):
         result = tk.messagebox.askyesno("Clear Schedules", 
                                        "This will delete all generated schedules. Continue?")
         if result:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM schedules WHERE is_locked = 0")
-            conn.commit()
-            conn.close()
+            from ..database.schedule_runs import clear_runs
+            clear_runs(self.db_path)
             
-            self.draw_timetable()
+            self.refresh_timetable()
             tk.messagebox.showinfo(t("success"), t("all_schedules_cleared"))
 
+    def repair_schedule(self, teachers=None, classes=None):
+        """Repair the shown timetable after an edit instead of regenerating it"""
+        from ..database.schedule_runs import get_active_run
+        from ..solvers import SolverFactory, SolverType
+        
+        if get_active_run(self.db_path) is None:
+            return
+        result = SolverFactory.solve(SolverType.REPAIR, self.db_path,
+                                     options={"teachers": teachers, "classes": classes})
+        if not result.success:
+            print(f"Repair failed: {result.error}")
+            return
+        if result.details.get("unplaced"):
+            print(f"Repair could not place {result.details['unplaced']} lessons")
+        self.refresh_timetable()
+
+    def manage_schedule_runs(self):
+        """Browse earlier solver runs and switch the displayed one"""
+        from ..database.schedule_runs import (activate_run, delete_run, diff_runs, get_active_run, get_run,
+                                              list_runs, pin_run)
+        
+        window = tk.Toplevel(self)
+        window.title(t("schedule_runs"))
+        window.geometry("800x400")
+        
+        main_frame = ttk.Frame(window)
+        main_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+        columns = ("#", t("run_solver"), t("lessons"), t("run_conflicts"), t("run_time"), t("run_created"))
+        tree = ttk.Treeview(main_frame, columns=columns, show='headings', height=12)
+        for col in columns:
+            tree.heading(col, text=col)
+            tree.column(col, width=60 if col == "#" else 140)
+        
+        scrollbar = ttk.Scrollbar(main_frame, orient=tk.VERTICAL, command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        def refresh_runs():
+            for item in tree.get_children():
+                tree.delete(item)
+            for run in list_runs(self.db_path):
+                quality = run['quality']
+                conflicts = sum(quality.get(key, 0) for key in ('teacher_conflicts', 'class_conflicts', 'room_conflicts'))
+                solve_time = run['timings'].get('solve')
+                marks = ("✔" if run['active'] else "") + ("📌" if run['pinned'] else "")
+                tree.insert('', 'end', iid=str(run['id']), values=(
+                    f"{run['id']} {marks}".strip(), run['solver'], quality.get('lessons', ''),
+                    conflicts, f"{solve_time:.2f}" if solve_time is not None else '', run['created_at']))
+        
+        def selected_run():
+            selection = tree.selection()
+            return int(selection[0]) if selection else None
+        
+        def show_selected():
+            run_id = selected_run()
+            if run_id is not None:
+                activate_run(self.db_path, run_id)
+                refresh_runs()
+                self.refresh_timetable()
+        
+        def compare_selected():
+            run_id, active = selected_run(), get_active_run(self.db_path)
+            if run_id is not None and active is not None:
+                diff = diff_runs(self.db_path, active, run_id)
+                messagebox.showinfo(t("schedule_runs"), t("run_diff", added=len(diff['added']),
+                                                           removed=len(diff['removed'])), parent=window)
+        
+        def pin_selected():
+            run_id = selected_run()
+            if run_id is not None:
+                pin_run(self.db_path, run_id, not get_run(self.db_path, run_id)['pinned'])
+                refresh_runs()
+        
+        def delete_selected():
+            run_id = selected_run()
+            if run_id is not None:
+                delete_run(self.db_path, run_id)
+                refresh_runs()
+                self.refresh_timetable()
+        
+        refresh_runs()
+        
+        btn_frame = ttk.Frame(window)
+        btn_frame.pack(fill=tk.X, padx=10, pady=5)
+        ttk.Button(btn_frame, text=t("activate_run"), command=show_selected).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text=t("compare_with_active"), command=compare_selected).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text=t("pin_run"), command=pin_selected).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text=t("delete_selected"), command=delete_selected).pack(side=tk.LEFT, padx=5)
+
     def import_sample_data(self):
         """Import fresh sample data"""
         result = tk.messagebox.askyesno("Import Sample Data", 
@@ -1647,19 +1575,18 @@ class TimetableApp(tk.Tk):
                 add_sample_data(conn)
                 conn.close()
                 self.load_initial_data()
-                self.draw_timetable()
+                self.refresh_timetable()
                 tk.messagebox.showinfo(t("success"), t("sample_data_imported"))
 
     def backup_database(self):
         """Create a backup of the database"""
-        import shutil
         from datetime import datetime
         
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         backup_name = f"school_timetable_backup_{timestamp}.db"
         
         try:
-            shutil.copy2("school_timetable.db", backup_name)
+            self.db.backup_database(backup_name)
             tk.messagebox.showinfo(t("backup_created"), f"{t('database_backed_up')}: {backup_name}")
         except Exception as e:
             tk.messagebox.showerror(t("backup_failed"), f"{t('failed_to_create_backup')}: {e}")
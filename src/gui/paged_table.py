@@ -0,0 +1,202 @@
+"""
+Paged Table - Virtualized Treeview over a PagedQuery
+
+Only one page of rows exists as Treeview items at a time. Paging, sorting
+(click a heading) and filtering are done by the database through keyset
+queries, and edits update the affected row in place instead of reloading
+the whole table.
+"""
+
+import tkinter as tk
+from tkinter import ttk
+from typing import Dict, Optional, Sequence
+
+from ..core import t
+from ..database.paged_query import PagedQuery
+
+class PagedTable(ttk.Frame):
+    """Filter box, one page of rows and previous/next controls"""
+
+    def __init__(self, parent, query: PagedQuery, headings: Sequence[str], page_size: int = 200,
+                 show_id: bool = False, height: int = 15, column_width: int = 150):
+        """
+        Build the table and show the first page
+
+        Args:
+            parent: Parent widget
+            query: Rows to page through
+            headings: Heading text of each query column
+            page_size: Rows per page
+            show_id: Show the row id in the tree column
+            height: Visible rows
+            column_width: Initial width of each column
+        """
+        super().__init__(parent)
+        self.query = query
+        self.page_size = page_size
+        self.sort: Optional[str] = None
+        self.descending = False
+        self.offset = 0
+        self.has_next = False
+        self.filter_job = None
+        # Row count of the current filter; counting runs over the whole join
+        self.total: Optional[int] = None
+        self.total_filter: Optional[str] = None
+        # Fetched rows by Treeview item id; keyset positions need their typed values
+        self.rows: Dict[str, tuple] = {}
+
+        filter_frame = ttk.Frame(self)
+        filter_frame.pack(fill=tk.X, pady=(0, 5))
+        ttk.Label(filter_frame, text=f"{t('filter')}:").pack(side=tk.LEFT, padx=5)
+        self.filter_var = tk.StringVar()
+        self.filter_var.trace_add("write", lambda *args: self.schedule_filter())
+        ttk.Entry(filter_frame, textvariable=self.filter_var, width=30).pack(side=tk.LEFT, padx=5)
+
+        tree_frame = ttk.Frame(self)
+        tree_frame.pack(fill=tk.BOTH, expand=True)
+        names = [name for name, _ in query.columns]
+        self.tree = ttk.Treeview(tree_frame, columns=names, show='tree headings' if show_id else 'headings',
+                                 height=height)
+        if show_id:
+            self.tree.heading('#0', text=t("id"))
+            self.tree.column('#0', width=50)
+        for name, heading in zip(names, headings):
+            self.tree.heading(name, text=heading, command=lambda n=name: self.sort_by(n))
+            self.tree.column(name, width=column_width)
+        scrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        nav_frame = ttk.Frame(self)
+        nav_frame.pack(fill=tk.X, pady=(5, 0))
+        self.prev_btn = ttk.Button(nav_frame, text=t("previous_page"), command=self.previous_page)
+        self.prev_btn.pack(side=tk.LEFT, padx=5)
+        self.next_btn = ttk.Button(nav_frame, text=t("next_page"), command=self.next_page)
+        self.next_btn.pack(side=tk.LEFT, padx=5)
+        self.status_label = ttk.Label(nav_frame)
+        self.status_label.pack(side=tk.LEFT, padx=10)
+
+        self.reload()
+
+    # Paging
+
+    def reload(self, recount: bool = False):
+        """Show the first page for the current sort and filter; recount after bulk changes"""
+        if recount:
+            self.total = None
+        self.offset = 0
+        self.show_page(self.fetch())
+
+    def next_page(self):
+        children = self.tree.get_children()
+        if not self.has_next or not children:
+            return
+        rows = self.fetch(after=self.query.sort_key(self.rows[children[-1]], self.sort))
+        if rows:
+            self.offset += len(children)
+            self.show_page(rows)
+
+    def previous_page(self):
+        children = self.tree.get_children()
+        if self.offset == 0 or not children:
+            return
+        rows = self.query.page(self.page_size, self.sort, self.descending, self.filter_var.get(),
+                               before=self.query.sort_key(self.rows[children[0]], self.sort))
+        if len(rows) < self.page_size:
+            # Rows were added or removed before this page; start over
+            self.reload()
+            return
+        self.offset = max(0, self.offset - len(rows))
+        self.has_next = True
+        self.show_page(rows)
+
+    def fetch(self, after=None):
+        """Fetch one row more than a page to learn whether another page follows"""
+        rows = self.query.page(self.page_size + 1, self.sort, self.descending, self.filter_var.get(), after=after)
+        self.has_next = len(rows) > self.page_size
+        return rows[:self.page_size]
+
+    def show_page(self, rows):
+        self.tree.delete(*self.tree.get_children())
+        self.rows = {}
+        for row in rows:
+            self.insert_row(row)
+        self.update_status()
+
+    def update_status(self):
+        shown = len(self.tree.get_children())
+        filter_text = self.filter_var.get()
+        if self.total is None or self.total_filter != filter_text:
+            self.total, self.total_filter = self.query.count(filter_text), filter_text
+        total = self.total
+        first = self.offset + 1 if shown else 0
+        self.status_label.config(text=t("rows_shown", first=first, last=self.offset + shown, total=total))
+        self.prev_btn.config(state="normal" if self.offset > 0 else "disabled")
+        self.next_btn.config(state="normal" if self.has_next else "disabled")
+
+    # Sorting and filtering
+
+    def sort_by(self, name: str):
+        """Sort by a column; clicking the same heading again reverses the order"""
+        self.descending = not self.descending if self.sort == name else False
+        self.sort = name
+        self.reload()
+
+    def schedule_filter(self):
+        """Re-query shortly after typing stops"""
+        if self.filter_job is not None:
+            self.after_cancel(self.filter_job)
+        self.filter_job = self.after(300, self.apply_filter)
+
+    def apply_filter(self):
+        self.filter_job = None
+        self.reload()
+
+    # Rows
+
+    def insert_row(self, row, index='end'):
+        item = str(row[0])
+        self.tree.insert('', index, iid=item, text=row[0], values=row[1:])
+        self.rows[item] = row
+
+    def selected_id(self):
+        """Id of the selected row, or None"""
+        selection = self.tree.selection()
+        return self.rows[selection[0]][0] if selection else None
+
+    def selected_values(self):
+        """Displayed values of the selected row, or None"""
+        selection = self.tree.selection()
+        return self.tree.item(selection[0], 'values') if selection else None
+
+    def refresh_row(self, row_id):
+        """Re-read one row after an edit; a new row is added to the page and selected"""
+        row = self.query.row(row_id)
+        item = str(row_id)
+        if row is None:
+            self.remove_row(row_id)
+            return
+        if self.tree.exists(item):
+            self.tree.item(item, values=row[1:])
+            self.rows[item] = row
+        else:
+            self.insert_row(row)
+            self.adjust_total(1)
+            self.update_status()
+        self.tree.selection_set(item)
+        self.tree.see(item)
+
+    def remove_row(self, row_id):
+        """Drop a deleted row from the page"""
+        item = str(row_id)
+        if self.tree.exists(item):
+            self.tree.delete(item)
+            del self.rows[item]
+            self.adjust_total(-1)
+            self.update_status()
+
+    def adjust_total(self, change: int):
+        """Keep the cached row count in step with an added or deleted row"""
+        if self.total is not None:
+            self.total += change
@@ -0,0 +1,69 @@
+"""
+Timetable Grid - Persistent day x period grid for the main window
+
+The header labels and one button per slot are created once; refreshing the
+grid only reconfigures the cells whose text or style changed, so switching
+between classes or teachers does not destroy and recreate Tk widgets.
+"""
+
+from tkinter import ttk
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+class TimetableGrid(ttk.Frame):
+    """Grid of slot buttons with day and time headers"""
+
+    def __init__(self, parent, days: Sequence[str], times: Sequence[str],
+                 on_click: Optional[Callable[[int, int], None]] = None,
+                 lesson_style: str = "Slot.TButton", free_style: str = "FreeSlot.TButton"):
+        """
+        Build the headers and slot buttons
+
+        Args:
+            parent: Parent widget
+            days: Day header texts, one column each
+            times: Period header texts, one row each
+            on_click: Called with (day, period) when a slot is clicked
+            lesson_style: Button style of slots holding a lesson
+            free_style: Button style of free slots
+        """
+        super().__init__(parent)
+        self.lesson_style = lesson_style
+        self.free_style = free_style
+        # (text, style) currently shown in each slot
+        self.shown: Dict[Tuple[int, int], Tuple[str, str]] = {}
+        self.cells: Dict[Tuple[int, int], ttk.Button] = {}
+
+        for i, day in enumerate(days):
+            ttk.Label(self, text=day, style="Header.TLabel", anchor="center").grid(row=0, column=i + 1, sticky="nsew", padx=1, pady=1)
+        for i, time in enumerate(times):
+            ttk.Label(self, text=time, style="Time.TLabel", anchor="center").grid(row=i + 1, column=0, sticky="nsew", padx=5)
+
+        for period in range(len(times)):
+            for day in range(len(days)):
+                cell = ttk.Button(self, text="", style=free_style)
+                cell.grid(row=period + 1, column=day + 1, sticky="nsew", padx=1, pady=1)
+                if on_click is not None:
+                    cell.bind("<Button-1>", lambda e, d=day, p=period: on_click(d, p))
+                self.cells[(day, period)] = cell
+                self.shown[(day, period)] = ("", free_style)
+
+        # Make the grid expand with the window
+        for i in range(len(days) + 1):
+            self.grid_columnconfigure(i, weight=1)
+        for i in range(len(times) + 1):
+            self.grid_rowconfigure(i, weight=1)
+
+    def show(self, lessons: Dict[Tuple[int, int], str], free_text: str = ""):
+        """
+        Display lesson texts, leaving unchanged cells untouched
+
+        Args:
+            lessons: Cell text by (day, period); slots not in it are free
+            free_text: Text of free slots
+        """
+        for slot, cell in self.cells.items():
+            text = lessons.get(slot)
+            wanted = (free_text, self.free_style) if text is None else (text, self.lesson_style)
+            if self.shown[slot] != wanted:
+                cell.configure(text=wanted[0], style=wanted[1])
+                self.shown[slot] = wanted
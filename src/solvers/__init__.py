@@ -1,6 +1,7 @@
 """Scheduling Solvers Package"""
 
-from .solver_factory import SolverFactory, SolverType, SolverResult
+from .solver_factory import SolverFactory, SolverType, SolverResult, SolverJob
+from .profile import SolverProfile
 
 # Import individual solvers for direct access if needed
 from .fast_solver import solve_with_fast_scheduler
@@ -17,6 +18,8 @@ __all__ = [
     'SolverFactory',
     'SolverType', 
     'SolverResult',
+    'SolverJob',
+    'SolverProfile',
     'solve_with_fast_scheduler',
     'solve_school_scheduling_from_db', 
     'solve_with_ml_scheduler',
@@ -3,130 +3,62 @@ Fast Scheduling Engine with Multiple Optimization Strategies
 Implements various fast scheduling algorithms including ML-inspired approaches
 """
 
-import sqlite3
-import json
-import random
 import time
 from typing import Dict, List, Tuple, Set
 import numpy as np
 
+from ..core.problem import ProblemInstance, load_problem
+from ..database.schedule_writer import save_schedule
+from .occupancy import Occupancy
+from .profile import SolverProfile
+
 class FastScheduler:
-    def __init__(self, db_file="school_timetable.db"):
+    def __init__(self, db_file="school_timetable.db", problem: ProblemInstance = None,
+                 profile: SolverProfile = None):
         self.db_file = db_file
+        self.problem = problem if problem is not None else load_problem(db_file)
+        self.profile = profile if profile is not None else SolverProfile()
         self.data = self.load_data()
         self.schedule = {}
+        self.occupancy = Occupancy.for_problem(self.problem)
         self.conflicts = set()
         
         # Scheduling parameters
-        self.num_days = 5
-        self.num_periods = 8
+        self.num_days = self.problem.num_days
+        self.num_periods = self.problem.num_periods
         self.all_days = range(self.num_days)
         self.all_periods = range(self.num_periods)
         
     def load_data(self):
-        """Load and preprocess data for fast access"""
-        conn = sqlite3.connect(self.db_file)
-        cursor = conn.cursor()
-        
+        """Derive solver-specific lookups from the compiled problem"""
+        problem = self.problem
         data = {}
         
-        # Load teachers with availability preprocessing
-        cursor.execute("SELECT id, name, availability_json FROM teachers")
-        teachers_data = cursor.fetchall()
-        data['teachers'] = {row[0]: row[1] for row in teachers_data}
-        data['teacher_availability'] = {}
-        
-        for row in teachers_data:
-            teacher_id = row[0]
-            # Initialize all slots as available
-            data['teacher_availability'][teacher_id] = set()
-            if row[2]:  # Parse unavailable times
-                avail_data = json.loads(row[2])
-                for day_str, periods in avail_data.items():
-                    day = int(day_str)
-                    for period in periods:
-                        data['teacher_availability'][teacher_id].add((day, period))
-        
-        # Load classes
-        cursor.execute("SELECT id, name, grade_level FROM classes")
-        data['classes'] = {row[0]: {'name': row[1], 'grade': row[2]} for row in cursor.fetchall()}
-        
-        # Load subjects with lab requirements
-        cursor.execute("SELECT id, name, needs_lab FROM subjects")
-        data['subjects'] = {row[0]: {'name': row[1], 'needs_lab': bool(row[2])} for row in cursor.fetchall()}
-        
-        # Load rooms with lab flags
-        cursor.execute("SELECT id, name, is_lab FROM rooms")
-        data['rooms'] = {row[0]: {'name': row[1], 'is_lab': bool(row[2])} for row in cursor.fetchall()}
-        
         # Precompute lab/regular room lists
-        data['lab_rooms'] = [rid for rid, room in data['rooms'].items() if room['is_lab']]
-        data['regular_rooms'] = [rid for rid, room in data['rooms'].items() if not room['is_lab']]
-        
-        # Load lesson requirements
-        cursor.execute("SELECT class_id, subject_id, lessons_per_week FROM lessons")
-        data['lesson_requirements'] = cursor.fetchall()
-        
-        # Load teacher preferences and preprocess
-        cursor.execute("SELECT teacher_id, class_id, preference_score FROM teacher_preferences")
-        data['preferences'] = {}
-        for teacher_id, class_id, score in cursor.fetchall():
-            data['preferences'][(teacher_id, class_id)] = score
-        
-        # Find qualified teachers for each subject (based on preferences)
-        data['subject_teachers'] = {}
-        for (teacher_id, class_id), score in data['preferences'].items():
-            if score >= 3:  # Only consider teachers with decent preference
-                for class_id2, subject_id, _ in data['lesson_requirements']:
-                    if class_id2 == class_id:
-                        if subject_id not in data['subject_teachers']:
-                            data['subject_teachers'][subject_id] = []
-                        if teacher_id not in data['subject_teachers'][subject_id]:
-                            data['subject_teachers'][subject_id].append(teacher_id)
-        
-        conn.close()
+        data['lab_rooms'] = problem.lab_rooms
+        data['regular_rooms'] = problem.regular_rooms
+        
+        # Find qualified teachers for each subject (based on explicit preferences)
+        qualified = problem.qualified_teachers(min_score=3, explicit_only=True)
+        data['subject_teachers'] = {
+            s: np.flatnonzero(qualified[:, s]).tolist()
+            for s in range(problem.num_subjects) if qualified[:, s].any()
+        }
+        
         return data
     
     def is_teacher_available(self, teacher_id: int, day: int, period: int) -> bool:
         """Check if teacher is available at given time"""
-        return (day, period) not in self.data['teacher_availability'].get(teacher_id, set())
+        return bool(self.problem.teacher_available[teacher_id, day, period])
     
     def is_time_slot_free(self, teacher_id: int, class_id: int, room_id: int, day: int, period: int) -> bool:
         """Check if time slot is free for all resources"""
-        key = (day, period)
-        
-        # Check if teacher is already scheduled
-        for (t, c, r, d, p) in self.schedule.keys():
-            if d == day and p == period and t == teacher_id:
-                return False
-        
-        # Check if class is already scheduled
-        for (t, c, r, d, p) in self.schedule.keys():
-            if d == day and p == period and c == class_id:
-                return False
-        
-        # Check if room is already scheduled
-        for (t, c, r, d, p) in self.schedule.keys():
-            if d == day and p == period and r == room_id:
-                return False
-        
-        # Check teacher availability
-        return self.is_teacher_available(teacher_id, day, period)
+        return self.occupancy.is_free(teacher_id, class_id, room_id, day, period)
     
     def get_best_room(self, subject_id: int) -> int:
         """Get the best room for a subject"""
-        needs_lab = self.data['subjects'][subject_id]['needs_lab']
-        
-        if needs_lab:
-            available_rooms = self.data['lab_rooms']
-        else:
-            available_rooms = self.data['regular_rooms']
-        
-        if not available_rooms:
-            # Fallback to any room
-            available_rooms = list(self.data['rooms'].keys())
-        
-        return available_rooms[0] if available_rooms else 1
+        available_rooms = self.problem.rooms_for_subject(subject_id)
+        return available_rooms[0] if available_rooms else 0
     
     def calculate_fitness(self, schedule: Dict) -> float:
         """Calculate fitness score for a schedule (higher is better)"""
@@ -137,7 +69,7 @@ class FastScheduler:
         
         # Reward teacher preferences
         for (teacher_id, class_id, room_id, day, period), (subj_id, lessons) in schedule.items():
-            pref_score = self.data['preferences'].get((teacher_id, class_id), 3)
+            pref_score = self.problem.preferences[teacher_id, class_id]
             score += pref_score * 2
         
         # Penalize teacher gaps (encourage compact schedules)
@@ -164,14 +96,13 @@ class FastScheduler:
         
         # Create lesson list with priorities
         lessons_to_schedule = []
-        for class_id, subject_id, lessons_per_week in self.data['lesson_requirements']:
+        all_teachers = list(range(self.problem.num_teachers))
+        for class_id, subject_id, lessons_per_week in self.problem.lesson_requirements:
             # Get qualified teachers for this subject
-            qualified_teachers = self.data['subject_teachers'].get(subject_id, list(self.data['teachers'].keys()))
-            if not qualified_teachers:
-                qualified_teachers = list(self.data['teachers'].keys())
+            qualified_teachers = list(self.data['subject_teachers'].get(subject_id, all_teachers))
             
             # Sort teachers by preference for this class
-            qualified_teachers.sort(key=lambda t: self.data['preferences'].get((t, class_id), 3), reverse=True)
+            qualified_teachers.sort(key=lambda t: self.problem.preferences[t, class_id], reverse=True)
             
             for lesson_num in range(lessons_per_week):
                 lessons_to_schedule.append({
@@ -185,221 +116,284 @@ class FastScheduler:
         lessons_to_schedule.sort(key=lambda x: x['priority'], reverse=True)
         
         # Schedule lessons greedily
+        occupancy = self.occupancy = Occupancy.for_problem(self.problem)
+        candidates = checks = unplaced = 0
         for lesson in lessons_to_schedule:
             class_id = lesson['class_id']
             subject_id = lesson['subject_id']
             qualified_teachers = lesson['qualified_teachers']
             
-            scheduled = False
+            # Get best room for this subject
+            best_room = self.get_best_room(subject_id)
             
-            # Try each qualified teacher
+            # Try each qualified teacher, best room first, then any other room
+            slot = None
             for teacher_id in qualified_teachers:
-                if scheduled:
-                    break
-                
-                # Get best room for this subject
-                room_id = self.get_best_room(subject_id)
-                
-                # Try each time slot
-                for day in self.all_days:
-                    if scheduled:
+                slot = None
+                checks += 1
+                if not occupancy.free_slots(teacher_id, class_id):
+                    continue
+                for room_id in [best_room] + list(range(self.problem.num_rooms)):
+                    candidates += 1
+                    checks += 1
+                    slot = occupancy.first_slot(occupancy.free_slots(teacher_id, class_id, room_id))
+                    if slot is not None:
                         break
-                    for period in self.all_periods:
-                        if self.is_time_slot_free(teacher_id, class_id, room_id, day, period):
-                            key = (teacher_id, class_id, room_id, day, period)
-                            schedule[key] = (subject_id, 1)
-                            scheduled = True
-                            break
                 
-                # If room not available, try other rooms
-                if not scheduled:
-                    all_rooms = list(self.data['rooms'].keys())
-                    for room_id in all_rooms:
-                        if scheduled:
-                            break
-                        for day in self.all_days:
-                            if scheduled:
-                                break
-                            for period in self.all_periods:
-                                if self.is_time_slot_free(teacher_id, class_id, room_id, day, period):
-                                    key = (teacher_id, class_id, room_id, day, period)
-                                    schedule[key] = (subject_id, 1)
-                                    scheduled = True
-                                    break
+                if slot is not None:
+                    day, period = slot
+                    occupancy.place(teacher_id, class_id, room_id, day, period)
+                    schedule[(teacher_id, class_id, room_id, day, period)] = (subject_id, 1)
+                    break
+            unplaced += slot is None
         
+        self.profile.count('candidates_evaluated', candidates)
+        self.profile.count('conflict_checks', checks)
+        self.profile.count('lessons_unplaced', unplaced)
         return schedule
     
-    def genetic_schedule(self, population_size: int = 20, generations: int = 50) -> Dict:
-        """Genetic algorithm for scheduling optimization"""
-        
-        def create_random_schedule():
-            """Create a random valid schedule"""
-            schedule = {}
-            lessons_to_schedule = []
-            
-            for class_id, subject_id, lessons_per_week in self.data['lesson_requirements']:
-                qualified_teachers = self.data['subject_teachers'].get(subject_id, list(self.data['teachers'].keys()))
-                if not qualified_teachers:
-                    qualified_teachers = list(self.data['teachers'].keys())
-                
-                for _ in range(lessons_per_week):
-                    lessons_to_schedule.append((class_id, subject_id, random.choice(qualified_teachers)))
-            
-            random.shuffle(lessons_to_schedule)
-            
-            for class_id, subject_id, teacher_id in lessons_to_schedule:
-                room_id = self.get_best_room(subject_id)
-                
-                # Try random time slots
-                attempts = 0
-                max_attempts = 50
-                while attempts < max_attempts:
-                    day = random.randint(0, self.num_days - 1)
-                    period = random.randint(0, self.num_periods - 1)
-                    
-                    if is_time_slot_free_for_schedule(schedule, teacher_id, class_id, room_id, day, period):
-                        key = (teacher_id, class_id, room_id, day, period)
-                        schedule[key] = (subject_id, 1)
-                        break
-                    attempts += 1
-            
-            return schedule
-        
-        def is_time_slot_free_for_schedule(schedule, teacher_id, class_id, room_id, day, period):
-            """Check if time slot is free in given schedule"""
-            for (t, c, r, d, p) in schedule.keys():
-                if d == day and p == period:
-                    if t == teacher_id or c == class_id or r == room_id:
-                        return False
-            # Check teacher availability
-            return (day, period) not in self.data['teacher_availability'].get(teacher_id, set())
-        
-        def mutate_schedule(schedule):
-            """Mutate a schedule by moving random lessons"""
-            mutated = schedule.copy()
-            
-            if not mutated:
-                return mutated
+    def lesson_arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Flatten lesson requirements into per-lesson class and subject arrays"""
+        classes, subjects = [], []
+        for class_id, subject_id, lessons_per_week in self.problem.lesson_requirements:
+            classes.extend([class_id] * lessons_per_week)
+            subjects.extend([subject_id] * lessons_per_week)
+        return np.array(classes, dtype=np.int64), np.array(subjects, dtype=np.int64)
+    
+    def population_fitness(self, slots: np.ndarray, teachers: np.ndarray, 
+                           lesson_classes: np.ndarray) -> np.ndarray:
+        """
+        Fitness of every individual of an array-encoded population in one pass
+        
+        Same score as ``calculate_fitness``: completed lessons, teacher
+        preferences and a penalty per gap in each teacher's day.
+        
+        Args:
+            slots: (individuals, lessons) slot index ``day * periods + period``, -1 if unscheduled
+            teachers: (individuals, lessons) teacher index
+            lesson_classes: (lessons,) class index
+        """
+        population_size = slots.shape[0]
+        scheduled = slots >= 0
+        preferences = self.problem.preferences[teachers, lesson_classes[None, :]]
+        score = scheduled.sum(axis=1) * 10 + (preferences * scheduled).sum(axis=1) * 2
+        
+        # Teacher busy cube per individual; each run of busy periods after the first is a gap
+        busy = np.zeros((population_size, self.problem.num_teachers, self.num_days * self.num_periods), dtype=bool)
+        individuals = np.broadcast_to(np.arange(population_size)[:, None], slots.shape)
+        busy[individuals[scheduled], teachers[scheduled], slots[scheduled]] = True
+        busy = busy.reshape(population_size, self.problem.num_teachers, self.num_days, self.num_periods)
+        run_starts = busy.copy()
+        run_starts[..., 1:] &= ~busy[..., :-1]
+        gaps = np.maximum(run_starts.sum(axis=-1) - 1, 0).sum(axis=(1, 2))
+        
+        return score - gaps * 5
+    
+    def genetic_schedule(self, population_size: int = 20, generations: int = 50, 
+                         seed_schedule: Dict = None, seed: int = None) -> Dict:
+        """
+        Genetic algorithm for scheduling optimization
+        
+        Each individual is three integer arrays over the flattened lessons:
+        slot, teacher and room. Teachers and rooms are drawn once per lesson;
+        mutation moves lessons to free slots, and fitness is evaluated for the
+        whole population at once.
+        
+        Args:
+            population_size: Number of individuals
+            generations: Number of generations
+            seed_schedule: Optional schedule (e.g. from greedy) included in the first population
+            seed: Random seed
+        """
+        rng = np.random.default_rng(seed)
+        problem = self.problem
+        num_slots = self.num_days * self.num_periods
+        lesson_classes, lesson_subjects = self.lesson_arrays()
+        num_lessons = len(lesson_classes)
+        if num_lessons == 0:
+            return {}
+        
+        all_teachers = list(range(problem.num_teachers))
+        subject_teachers = [self.data['subject_teachers'].get(s, all_teachers) for s in range(problem.num_subjects)]
+        subject_rooms = [problem.rooms_for_subject(s) for s in range(problem.num_subjects)]
+        
+        def choice_table(options):
+            """Pad per-subject option lists into a table plus option counts for vectorized draws"""
+            table = np.zeros((len(options), max(len(o) for o in options)), dtype=np.int64)
+            for row, values in enumerate(options):
+                table[row, :len(values)] = values
+            return table, np.array([len(o) for o in options])
+        
+        teacher_table, teacher_counts = choice_table(subject_teachers)
+        room_table, room_counts = choice_table(subject_rooms)
+        teacher_blocked = ~problem.teacher_available.reshape(problem.num_teachers, num_slots)
+        
+        def busy_arrays(slots, teachers, rooms):
+            """Teacher, class and room busy arrays of one individual"""
+            scheduled = slots >= 0
+            teacher_busy = teacher_blocked.copy()
+            class_busy = np.zeros((problem.num_classes, num_slots), dtype=bool)
+            room_busy = np.zeros((problem.num_rooms, num_slots), dtype=bool)
+            teacher_busy[teachers[scheduled], slots[scheduled]] = True
+            class_busy[lesson_classes[scheduled], slots[scheduled]] = True
+            room_busy[rooms[scheduled], slots[scheduled]] = True
+            return teacher_busy, class_busy, room_busy
+        
+        checks = [0]
+        
+        def first_free(candidates, teacher_busy, class_busy, room_busy, t, c, r):
+            """First candidate slot where teacher, class and room are free, or -1"""
+            checks[0] += len(candidates)
+            free = ~(teacher_busy[t, candidates] | class_busy[c, candidates] | room_busy[r, candidates])
+            index = free.argmax()
+            return int(candidates[index]) if free[index] else -1
+        
+        def create_random_individual():
+            """Create a random valid individual"""
+            teacher_picks = (rng.random(num_lessons) * teacher_counts[lesson_subjects]).astype(np.int64)
+            room_picks = (rng.random(num_lessons) * room_counts[lesson_subjects]).astype(np.int64)
+            teachers = teacher_table[lesson_subjects, teacher_picks]
+            rooms = room_table[lesson_subjects, room_picks]
+            slots = np.full(num_lessons, -1, dtype=np.int64)
+            teacher_busy, class_busy, room_busy = busy_arrays(slots, teachers, rooms)
             
-            # Move 1-3 random lessons
-            num_mutations = random.randint(1, min(3, len(mutated)))
-            keys = list(mutated.keys())
+            # Try 50 random time slots per lesson in random order
+            attempts = rng.integers(0, num_slots, size=(num_lessons, 50))
+            for lesson in rng.permutation(num_lessons):
+                t, c, r = teachers[lesson], lesson_classes[lesson], rooms[lesson]
+                slot = first_free(attempts[lesson], teacher_busy, class_busy, room_busy, t, c, r)
+                if slot >= 0:
+                    slots[lesson] = slot
+                    teacher_busy[t, slot] = class_busy[c, slot] = room_busy[r, slot] = True
+            return slots, teachers, rooms
+        
+        def individual_from_schedule(schedule):
+            """Encode a schedule dict, matching each entry to an unused lesson of its class and subject"""
+            teachers = teacher_table[lesson_subjects, 0]
+            rooms = room_table[lesson_subjects, 0]
+            slots = np.full(num_lessons, -1, dtype=np.int64)
+            open_lessons = {}
+            for lesson in range(num_lessons):
+                open_lessons.setdefault((lesson_classes[lesson], lesson_subjects[lesson]), []).append(lesson)
+            for (t, c, r, d, p), (s, _) in schedule.items():
+                if open_lessons.get((c, s)):
+                    lesson = open_lessons[(c, s)].pop()
+                    slots[lesson], teachers[lesson], rooms[lesson] = d * self.num_periods + p, t, r
+            return slots, teachers, rooms
+        
+        def mutate(slots, teachers, rooms):
+            """Move 1-3 random lessons of an individual to free slots"""
+            slots = slots.copy()
+            scheduled = np.flatnonzero(slots >= 0)
+            if scheduled.size == 0:
+                return slots
+            teacher_busy, class_busy, room_busy = busy_arrays(slots, teachers, rooms)
             
-            for _ in range(num_mutations):
-                if not keys:
-                    break
-                
-                key = random.choice(keys)
-                teacher_id, class_id, room_id, old_day, old_period = key
-                subject_id, lessons = mutated[key]
+            num_mutations = rng.integers(1, min(3, scheduled.size) + 1)
+            for lesson in rng.choice(scheduled, num_mutations, replace=False):
+                t, c, r, old_slot = teachers[lesson], lesson_classes[lesson], rooms[lesson], slots[lesson]
+                teacher_busy[t, old_slot] = class_busy[c, old_slot] = room_busy[r, old_slot] = False
                 
-                # Remove old assignment
-                del mutated[key]
-                keys.remove(key)
-                
-                # Try to place in new slot
-                attempts = 0
-                max_attempts = 20
-                while attempts < max_attempts:
-                    new_day = random.randint(0, self.num_days - 1)
-                    new_period = random.randint(0, self.num_periods - 1)
-                    
-                    if is_time_slot_free_for_schedule(mutated, teacher_id, class_id, room_id, new_day, new_period):
-                        new_key = (teacher_id, class_id, room_id, new_day, new_period)
-                        mutated[new_key] = (subject_id, lessons)
-                        break
-                    attempts += 1
-                else:
-                    # Put it back if we can't find a new slot
-                    mutated[key] = (subject_id, lessons)
-            
-            return mutated
+                # Keep the old slot if none of 20 random slots is free
+                new_slot = first_free(rng.integers(0, num_slots, size=20),
+                                      teacher_busy, class_busy, room_busy, t, c, r)
+                if new_slot < 0:
+                    new_slot = old_slot
+                slots[lesson] = new_slot
+                teacher_busy[t, new_slot] = class_busy[c, new_slot] = room_busy[r, new_slot] = True
+            return slots
         
         # Initialize population
-        population = []
-        for _ in range(population_size):
-            population.append(create_random_schedule())
-        
-        best_schedule = None
+        individuals = [create_random_individual() for _ in range(population_size)]
+        if seed_schedule:
+            individuals[0] = individual_from_schedule(seed_schedule)
+        population_slots = np.array([i[0] for i in individuals])
+        population_teachers = np.array([i[1] for i in individuals])
+        population_rooms = np.array([i[2] for i in individuals])
+        
+        best = None
         best_fitness = -float('inf')
+        elite_count = max(1, population_size // 5)
         
         # Evolution
         for generation in range(generations):
-            # Evaluate fitness
-            fitness_scores = []
-            for schedule in population:
-                fitness = self.calculate_fitness(schedule)
-                fitness_scores.append(fitness)
-                
-                if fitness > best_fitness:
-                    best_fitness = fitness
-                    best_schedule = schedule.copy()
-            
-            # Selection and reproduction
-            new_population = []
-            
-            # Keep best 20%
-            elite_count = population_size // 5
-            sorted_indices = sorted(range(len(fitness_scores)), key=lambda i: fitness_scores[i], reverse=True)
-            for i in range(elite_count):
-                new_population.append(population[sorted_indices[i]])
+            # Evaluate fitness of the whole population
+            fitness_scores = self.population_fitness(population_slots, population_teachers, lesson_classes)
+            ranking = np.argsort(-fitness_scores, kind='stable')
+            if fitness_scores[ranking[0]] > best_fitness:
+                best_fitness = fitness_scores[ranking[0]]
+                best = (population_slots[ranking[0]].copy(), population_teachers[ranking[0]].copy(),
+                        population_rooms[ranking[0]].copy())
             
-            # Generate rest through mutation
-            while len(new_population) < population_size:
-                parent = random.choice(population[:elite_count * 2])  # Select from top performers
-                child = mutate_schedule(parent)
-                new_population.append(child)
-            
-            population = new_population
+            # Keep best 20%, generate the rest by mutating top performers
+            parents = np.concatenate([ranking[:elite_count],
+                                      rng.choice(ranking[:elite_count * 2], population_size - elite_count)])
+            population_teachers = population_teachers[parents]
+            population_rooms = population_rooms[parents]
+            population_slots = population_slots[parents]
+            for i in range(elite_count, population_size):
+                population_slots[i] = mutate(population_slots[i], population_teachers[i], population_rooms[i])
             
             if generation % 10 == 0:
-                print(f"Generation {generation}: Best fitness = {best_fitness:.2f}, Lessons = {len(best_schedule)}")
-        
-        return best_schedule or {}
+                print(f"Generation {generation}: Best fitness = {best_fitness:.2f}, Lessons = {int((best[0] >= 0).sum())}")
+        
+        # Every generation scores each lesson of each individual
+        self.profile.count('candidates_evaluated', generations * population_size * num_lessons)
+        self.profile.count('conflict_checks', checks[0])
+        if best is None:
+            self.profile.count('lessons_unplaced', num_lessons)
+            return {}
+        
+        # Decode the best individual
+        slots, teachers, rooms = best
+        self.profile.count('lessons_unplaced', int((best[0] < 0).sum()))
+        return {
+            (int(teachers[l]), int(lesson_classes[l]), int(rooms[l]), int(slots[l] // self.num_periods),
+             int(slots[l] % self.num_periods)): (int(lesson_subjects[l]), 1)
+            for l in np.flatnonzero(slots >= 0)
+        }
     
-    def save_schedule_to_db(self, schedule: Dict):
-        """Save schedule to database"""
-        conn = sqlite3.connect(self.db_file)
-        cursor = conn.cursor()
-        
-        # Clear existing schedules
-        cursor.execute("DELETE FROM schedules WHERE is_locked = 0")
-        
-        # Insert new schedule
-        for (teacher_id, class_id, room_id, day, period), (subject_id, lessons) in schedule.items():
-            cursor.execute("""
-                INSERT INTO schedules (class_id, teacher_id, subject_id, room_id, day_of_week, timeslot, is_locked)
-                VALUES (?, ?, ?, ?, ?, ?, 0)
-            """, (class_id, teacher_id, subject_id, room_id, day, period))
-        
-        conn.commit()
-        conn.close()
-        print(f"Saved {len(schedule)} lessons to database")
+    def save_schedule_to_db(self, schedule: Dict, solver: str = "fast_greedy") -> Dict[str, float]:
+        """Save schedule to database as a new, active schedule run"""
+        timings = save_schedule(self.db_file, self.problem, schedule, solver)
+        print(f"Saved {len(schedule)} lessons to database in {timings['total'] * 1000:.1f} ms")
+        return timings
+
 
-def solve_with_fast_scheduler(method="greedy", db_file="school_timetable.db"):
+def solve_with_fast_scheduler(method="greedy", db_file="school_timetable.db", problem: ProblemInstance = None,
+                              profile: SolverProfile = None):
     """
     Main function to solve scheduling with fast algorithms
     
     Args:
         method: "greedy", "genetic", or "hybrid"
         db_file: Database file path
+        problem: Pre-loaded problem; loaded from ``db_file`` when omitted
+        profile: Receives the phase timings and counters of the run
     """
-    scheduler = FastScheduler(db_file)
+    profile = profile if profile is not None else SolverProfile()
+    if problem is None:
+        with profile.phase('load'):
+            problem = load_problem(db_file)
+    with profile.phase('preprocessing'):
+        scheduler = FastScheduler(db_file, problem, profile)
     
     print(f"Starting {method} scheduling...")
     start_time = time.time()
     
-    if method == "greedy":
-        schedule = scheduler.greedy_schedule()
-    elif method == "genetic":
-        schedule = scheduler.genetic_schedule(population_size=30, generations=100)
-    elif method == "hybrid":
-        # Start with greedy, then optimize with genetic
-        greedy_schedule = scheduler.greedy_schedule()
-        scheduler.schedule = greedy_schedule
-        schedule = scheduler.genetic_schedule(population_size=20, generations=50)
-    else:
-        raise ValueError(f"Unknown method: {method}")
+    with profile.phase('search'):
+        if method == "greedy":
+            schedule = scheduler.greedy_schedule()
+        elif method == "genetic":
+            schedule = scheduler.genetic_schedule(population_size=30, generations=100)
+        elif method == "hybrid":
+            # Start with greedy, then optimize with genetic; only the final result counts as unplaced
+            greedy_schedule = scheduler.greedy_schedule()
+            profile.counters['lessons_unplaced'] = 0
+            scheduler.schedule = greedy_schedule
+            schedule = scheduler.genetic_schedule(population_size=20, generations=50, seed_schedule=greedy_schedule)
+        else:
+            raise ValueError(f"Unknown method: {method}")
     
     end_time = time.time()
     
@@ -407,9 +401,10 @@ def solve_with_fast_scheduler(method="greedy", db_file="school_timetable.db"):
     print(f"Generated {len(schedule)} lessons")
     
     if schedule:
-        fitness = scheduler.calculate_fitness(schedule)
+        with profile.phase('verification'):
+            fitness = scheduler.calculate_fitness(schedule)
         print(f"Schedule fitness: {fitness:.2f}")
-        scheduler.save_schedule_to_db(schedule)
+        profile.add_persistence(scheduler.save_schedule_to_db(schedule, f"fast_{method}"))
         return True
     else:
         print("No schedule generated")
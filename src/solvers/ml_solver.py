@@ -3,78 +3,52 @@ Machine Learning-Inspired Scheduler
 Uses pattern recognition and heuristics learned from scheduling data
 """
 
-import sqlite3
-import json
 import numpy as np
 import random
 import time
 from collections import defaultdict, Counter
 from typing import Dict, List, Tuple, Set
 
+from ..core.problem import ProblemInstance, load_problem
+from ..database.schedule_writer import save_schedule
+from .occupancy import Occupancy
+from .profile import SolverProfile
+
 class MLScheduler:
-    def __init__(self, db_file="school_timetable.db"):
+    def __init__(self, db_file="school_timetable.db", problem: ProblemInstance = None,
+                 profile: SolverProfile = None):
         self.db_file = db_file
-        self.data = self.load_data()
+        self.problem = problem if problem is not None else load_problem(db_file)
+        self.profile = profile if profile is not None else SolverProfile()
         
         # Scheduling parameters
-        self.num_days = 5
-        self.num_periods = 8
+        self.num_days = self.problem.num_days
+        self.num_periods = self.problem.num_periods
         
         # ML-inspired components
         self.pattern_weights = self.learn_patterns()
         self.preference_matrix = self.build_preference_matrix()
         self.conflict_penalties = self.initialize_conflict_penalties()
+        self.build_score_tables()
+        self.reset_indices()
         
-    def load_data(self):
-        """Load and preprocess data"""
-        conn = sqlite3.connect(self.db_file)
-        cursor = conn.cursor()
-        
-        data = {}
-        
-        # Load all entities
-        cursor.execute("SELECT id, name, availability_json FROM teachers")
-        teachers_data = cursor.fetchall()
-        data['teachers'] = {row[0]: row[1] for row in teachers_data}
-        data['teacher_availability'] = {}
-        
-        for row in teachers_data:
-            teacher_id = row[0]
-            data['teacher_availability'][teacher_id] = set()
-            if row[2]:
-                avail_data = json.loads(row[2])
-                for day_str, periods in avail_data.items():
-                    day = int(day_str)
-                    for period in periods:
-                        data['teacher_availability'][teacher_id].add((day, period))
-        
-        cursor.execute("SELECT id, name, grade_level FROM classes")
-        data['classes'] = {row[0]: {'name': row[1], 'grade': row[2]} for row in cursor.fetchall()}
-        
-        cursor.execute("SELECT id, name, needs_lab FROM subjects")
-        data['subjects'] = {row[0]: {'name': row[1], 'needs_lab': bool(row[2])} for row in cursor.fetchall()}
-        
-        cursor.execute("SELECT id, name, is_lab FROM rooms")
-        data['rooms'] = {row[0]: {'name': row[1], 'is_lab': bool(row[2])} for row in cursor.fetchall()}
-        
-        cursor.execute("SELECT class_id, subject_id, lessons_per_week FROM lessons")
-        data['lesson_requirements'] = cursor.fetchall()
-        
-        cursor.execute("SELECT teacher_id, class_id, preference_score FROM teacher_preferences")
-        data['preferences'] = {}
-        for teacher_id, class_id, score in cursor.fetchall():
-            data['preferences'][(teacher_id, class_id)] = score
-        
-        # Load existing schedules to learn from
-        cursor.execute("""
-            SELECT class_id, teacher_id, subject_id, room_id, day_of_week, timeslot
-            FROM schedules
-        """)
-        data['existing_schedules'] = cursor.fetchall()
-        
-        conn.close()
-        return data
+    def reset_indices(self):
+        """Start empty per-class and per-teacher day indices
+
+        ``class_subjects[class, day, period]`` holds the subject placed in
+        that slot (-1 when free) and the occupancy teacher masks give each
+        teacher's periods per day, so score terms never scan the schedule.
+        """
+        self.occupancy = Occupancy.for_problem(self.problem)
+        self.class_subjects = np.full(
+            (self.problem.num_classes, self.num_days, self.num_periods), -1, dtype=np.int64)
     
+    def record_assignment(self, teacher_id: int, class_id: int, room_id: int, 
+                          subject_id: int, day: int, period: int):
+        """Update the indices for a placed lesson"""
+        self.occupancy.place(teacher_id, class_id, room_id, day, period)
+        self.class_subjects[class_id, day, period] = subject_id
+        
     def learn_patterns(self) -> Dict:
         """Learn scheduling patterns from existing data"""
         patterns = {
@@ -85,64 +59,34 @@ class MLScheduler:
             'daily_distribution': defaultdict(lambda: defaultdict(int))
         }
         
+        # Slots each subject's category favours (e.g. Math/Science in the morning)
+        favoured = self.problem.time_affinity > 0
+        
         # Analyze existing schedules
-        for schedule_entry in self.data['existing_schedules']:
-            class_id, teacher_id, subject_id, room_id, day, period = schedule_entry
+        existing_schedules = self.problem.existing_lessons
+        for schedule_entry in existing_schedules:
+            class_id, teacher_id, subject_id, room_id, day, period, _ = schedule_entry
             
             # Time preferences
             patterns['time_preferences'][subject_id][(day, period)] += 1
             patterns['teacher_time_patterns'][teacher_id][(day, period)] += 1
             
             # Subject-time affinity (some subjects work better at certain times)
-            if subject_id in self.data['subjects']:
-                subject_name = self.data['subjects'][subject_id]['name'].lower()
-                if 'math' in subject_name or 'algebra' in subject_name:
-                    if period < 4:  # Morning preference
-                        patterns['subject_time_affinity'][subject_id][(day, period)] += 2
-                elif 'physical' in subject_name or 'art' in subject_name:
-                    if period >= 4:  # Afternoon preference
-                        patterns['subject_time_affinity'][subject_id][(day, period)] += 2
-        
-        # Default patterns if no existing schedules
-        if not self.data['existing_schedules']:
-            for subject_id in self.data['subjects']:
-                subject_name = self.data['subjects'][subject_id]['name'].lower()
-                for day in range(self.num_days):
-                    for period in range(self.num_periods):
-                        base_weight = 1
-                        
-                        # Math/Science in morning
-                        if any(keyword in subject_name for keyword in ['math', 'algebra', 'geometry', 'calculus', 'physics', 'chemistry']):
-                            if period < 4:
-                                base_weight = 3
-                        
-                        # Arts/PE in afternoon
-                        elif any(keyword in subject_name for keyword in ['art', 'music', 'physical', 'drama']):
-                            if period >= 4:
-                                base_weight = 3
-                        
-                        # Languages throughout day
-                        elif any(keyword in subject_name for keyword in ['english', 'literature', 'language']):
-                            base_weight = 2
-                        
-                        patterns['subject_time_affinity'][subject_id][(day, period)] = base_weight
+            if favoured[subject_id, day, period]:
+                patterns['subject_time_affinity'][subject_id][(day, period)] += 2
+        
+        # Default patterns if no existing schedules: favoured slots weigh 3, the others 1
+        if not existing_schedules:
+            for subject_id, day, period in np.ndindex(favoured.shape):
+                base_weight = 3 if favoured[subject_id, day, period] else 1
+                patterns['subject_time_affinity'][subject_id][(day, period)] = base_weight
         
         return patterns
     
     def build_preference_matrix(self) -> np.ndarray:
         """Build a preference matrix for teacher-class assignments"""
-        num_teachers = len(self.data['teachers'])
-        num_classes = len(self.data['classes'])
-        
-        # Initialize with neutral preferences
-        matrix = np.ones((num_teachers + 1, num_classes + 1)) * 3  # Default preference of 3
-        
-        # Fill with actual preferences
-        for (teacher_id, class_id), score in self.data['preferences'].items():
-            if teacher_id <= num_teachers and class_id <= num_classes:
-                matrix[teacher_id, class_id] = score
-        
-        return matrix
+        # Neutral preference of 3 where unset, actual preferences elsewhere
+        return self.problem.preferences.astype(float)
     
     def initialize_conflict_penalties(self) -> Dict:
         """Initialize conflict penalty weights"""
@@ -153,19 +97,98 @@ class MLScheduler:
             'availability_violation': -500,
             'lab_mismatch': -200,
             'consecutive_same_subject': -50,
-            'teacher_gap': -20,
-            'afternoon_math': -10,  # Slight penalty for math in afternoon
-            'morning_pe': -10       # Slight penalty for PE in morning
+            'teacher_gap': -20
         }
     
+    def build_score_tables(self):
+        """Precompute the time-dependent score terms as arrays for batched scoring
+
+        ``time_scores[subject, day, period]`` combines the learned
+        subject-time affinity with the subject category affinity and
+        ``teacher_time_scores[teacher, day, period]`` holds the learned
+        teacher-time pattern term.
+        """
+        shape = (self.num_days, self.num_periods)
+        subject_affinity = np.zeros((self.problem.num_subjects,) + shape)
+        teacher_patterns = np.zeros((self.problem.num_teachers,) + shape)
+        for subject_id, weights in self.pattern_weights['subject_time_affinity'].items():
+            for (day, period), weight in weights.items():
+                if day < self.num_days and period < self.num_periods:
+                    subject_affinity[subject_id, day, period] = weight
+        for teacher_id, weights in self.pattern_weights['teacher_time_patterns'].items():
+            for (day, period), weight in weights.items():
+                if day < self.num_days and period < self.num_periods:
+                    teacher_patterns[teacher_id, day, period] = weight
+        
+        self.time_scores = subject_affinity * 5 + self.problem.time_affinity
+        self.teacher_time_scores = teacher_patterns * 2
+    
+    def score_candidates(self, teachers: List[int], class_id: int, subject_id: int, 
+                         rooms: List[int]) -> np.ndarray:
+        """
+        Score every (teacher, room, day, period) candidate of a lesson at once
+        
+        Equivalent to ``calculate_assignment_score`` over all candidates, with
+        slots where the teacher, class or room is busy set to -inf.
+        
+        Returns:
+            Array of shape (len(teachers), len(rooms), days, periods)
+        """
+        occupancy = self.occupancy
+        teachers = np.asarray(teachers)
+        rooms = np.asarray(rooms)
+        teacher_busy = np.array([occupancy.slots_array(occupancy.teacher_busy[t]) for t in teachers])
+        teacher_blocked = np.array([occupancy.slots_array(occupancy.teacher_blocked[t]) for t in teachers])
+        room_busy = np.array([occupancy.slots_array(occupancy.room_busy[r]) for r in rooms])
+        class_day_subjects = self.class_subjects[class_id]
+        
+        # Teacher terms: preference, learned time patterns, availability and gaps
+        teacher_scores = (self.preference_matrix[teachers, class_id] * 10)[:, None, None]
+        teacher_scores = teacher_scores + self.teacher_time_scores[teachers]
+        teacher_scores = teacher_scores + np.where(teacher_blocked, self.conflict_penalties['availability_violation'], 0)
+        teacher_scores = teacher_scores + self.teacher_gap_penalties(teacher_busy)
+        
+        # Class terms: subject-time affinity and consecutive same subject
+        consecutive = self.consecutive_counts(class_day_subjects == subject_id)
+        slot_scores = self.time_scores[subject_id] + np.where(
+            consecutive >= 2, self.conflict_penalties['consecutive_same_subject'] * consecutive, 0)
+        
+        # Room terms: lab requirement matching
+        needs_lab = self.problem.subject_needs_lab[subject_id]
+        room_scores = np.where(self.problem.room_is_lab[rooms] == needs_lab, 20,
+                               self.conflict_penalties['lab_mismatch'])
+        
+        scores = (teacher_scores + slot_scores)[:, None] + room_scores[None, :, None, None]
+        conflicts = teacher_busy[:, None] | room_busy[None, :] | (class_day_subjects >= 0)
+        return np.where(conflicts, -np.inf, scores)
+    
+    def consecutive_counts(self, same: np.ndarray) -> np.ndarray:
+        """Length of the same-subject run through each (day, period) if a lesson is placed there"""
+        before = np.zeros(same.shape, dtype=np.int64)
+        after = np.zeros(same.shape, dtype=np.int64)
+        for p in range(1, self.num_periods):
+            before[:, p] = np.where(same[:, p - 1], before[:, p - 1] + 1, 0)
+        for p in range(self.num_periods - 2, -1, -1):
+            after[:, p] = np.where(same[:, p + 1], after[:, p + 1] + 1, 0)
+        return 1 + before + after
+    
+    def teacher_gap_penalties(self, busy: np.ndarray) -> np.ndarray:
+        """Gap penalty for each (teacher, day, period) given (teachers, days, periods) busy arrays"""
+        periods = np.arange(self.num_periods)
+        count = busy.sum(axis=-1, keepdims=True)
+        has_lessons = count > 0
+        first = np.where(has_lessons, busy.argmax(axis=-1)[..., None], self.num_periods)
+        last = np.where(has_lessons, self.num_periods - 1 - busy[..., ::-1].argmax(axis=-1)[..., None], -1)
+        gaps = np.maximum(last, periods) - np.minimum(first, periods) - count
+        return np.where(has_lessons, gaps * self.conflict_penalties['teacher_gap'], 0)
+    
     def calculate_assignment_score(self, teacher_id: int, class_id: int, subject_id: int, 
-                                 room_id: int, day: int, period: int, current_schedule: Dict) -> float:
-        """Calculate ML-inspired score for a potential assignment"""
+                                 room_id: int, day: int, period: int) -> float:
+        """Calculate ML-inspired score for a potential assignment against the current indices"""
         score = 0
         
         # Base preference score
-        if teacher_id <= len(self.data['teachers']) and class_id <= len(self.data['classes']):
-            score += self.preference_matrix[teacher_id, class_id] * 10
+        score += self.preference_matrix[teacher_id, class_id] * 10
         
         # Time-based patterns
         time_key = (day, period)
@@ -173,136 +196,105 @@ class MLScheduler:
         score += self.pattern_weights['teacher_time_patterns'][teacher_id][time_key] * 2
         
         # Check for conflicts (hard constraints)
-        conflicts = self.check_conflicts(teacher_id, class_id, room_id, day, period, current_schedule)
+        conflicts = self.check_conflicts(teacher_id, class_id, room_id, day, period)
         for conflict_type in conflicts:
             score += self.conflict_penalties[conflict_type]
         
         # Soft constraint bonuses/penalties
         
         # Lab requirement matching
-        needs_lab = self.data['subjects'][subject_id]['needs_lab']
-        room_is_lab = self.data['rooms'][room_id]['is_lab']
+        needs_lab = self.problem.subject_needs_lab[subject_id]
+        room_is_lab = self.problem.room_is_lab[room_id]
         if needs_lab == room_is_lab:
             score += 20
         else:
             score += self.conflict_penalties['lab_mismatch']
         
-        # Subject-specific time preferences
-        subject_name = self.data['subjects'][subject_id]['name'].lower()
-        
-        # Math/Science morning bonus
-        if any(keyword in subject_name for keyword in ['math', 'algebra', 'geometry', 'calculus', 'physics', 'chemistry']):
-            if period < 4:
-                score += 15
-            else:
-                score += self.conflict_penalties['afternoon_math']
-        
-        # PE afternoon bonus
-        if 'physical' in subject_name:
-            if period >= 4:
-                score += 15
-            else:
-                score += self.conflict_penalties['morning_pe']
+        # Subject category time affinity (e.g. Math/Science morning, PE afternoon)
+        score += self.problem.time_affinity[subject_id, day, period]
         
         # Consecutive same subject penalty
-        consecutive_count = self.count_consecutive_same_subject(
-            class_id, subject_id, day, period, current_schedule)
+        consecutive_count = self.count_consecutive_same_subject(class_id, subject_id, day, period)
         if consecutive_count >= 2:
             score += self.conflict_penalties['consecutive_same_subject'] * consecutive_count
         
         # Teacher gap penalty (encourage compact schedules)
-        gap_penalty = self.calculate_teacher_gap_penalty(teacher_id, day, period, current_schedule)
+        gap_penalty = self.calculate_teacher_gap_penalty(teacher_id, day, period)
         score += gap_penalty
         
         return score
     
     def check_conflicts(self, teacher_id: int, class_id: int, room_id: int, 
-                       day: int, period: int, current_schedule: Dict) -> List[str]:
-        """Check for scheduling conflicts"""
+                       day: int, period: int) -> List[str]:
+        """Check for scheduling conflicts against the current occupancy"""
         conflicts = []
+        occupancy = self.occupancy
         
         # Check existing assignments at this time
-        for (t_id, c_id, r_id, d, p), _ in current_schedule.items():
-            if d == day and p == period:
-                if t_id == teacher_id:
-                    conflicts.append('teacher_conflict')
-                if c_id == class_id:
-                    conflicts.append('class_conflict')
-                if r_id == room_id:
-                    conflicts.append('room_conflict')
+        if occupancy.teacher_conflict(teacher_id, day, period):
+            conflicts.append('teacher_conflict')
+        if occupancy.class_conflict(class_id, day, period):
+            conflicts.append('class_conflict')
+        if occupancy.room_conflict(room_id, day, period):
+            conflicts.append('room_conflict')
         
         # Check teacher availability
-        if (day, period) in self.data['teacher_availability'].get(teacher_id, set()):
+        if occupancy.teacher_unavailable(teacher_id, day, period):
             conflicts.append('availability_violation')
         
         return conflicts
     
     def count_consecutive_same_subject(self, class_id: int, subject_id: int, 
-                                     day: int, period: int, current_schedule: Dict) -> int:
+                                     day: int, period: int) -> int:
         """Count consecutive lessons of the same subject"""
+        day_subjects = self.class_subjects[class_id, day]
         count = 1  # Current lesson
         
         # Check before
-        for p in range(period - 1, -1, -1):
-            found = False
-            for (t_id, c_id, r_id, d, p_check), (subj_id, _) in current_schedule.items():
-                if c_id == class_id and d == day and p_check == p and subj_id == subject_id:
-                    count += 1
-                    found = True
-                    break
-            if not found:
-                break
+        p = period - 1
+        while p >= 0 and day_subjects[p] == subject_id:
+            count += 1
+            p -= 1
         
         # Check after
-        for p in range(period + 1, self.num_periods):
-            found = False
-            for (t_id, c_id, r_id, d, p_check), (subj_id, _) in current_schedule.items():
-                if c_id == class_id and d == day and p_check == p and subj_id == subject_id:
-                    count += 1
-                    found = True
-                    break
-            if not found:
-                break
+        p = period + 1
+        while p < self.num_periods and day_subjects[p] == subject_id:
+            count += 1
+            p += 1
         
         return count
     
-    def calculate_teacher_gap_penalty(self, teacher_id: int, day: int, period: int, 
-                                    current_schedule: Dict) -> float:
+    def calculate_teacher_gap_penalty(self, teacher_id: int, day: int, period: int) -> float:
         """Calculate penalty for teacher gaps in schedule"""
-        teacher_periods = []
+        # Periods where teacher is scheduled on this day, plus the current period
+        periods = self.occupancy.day_periods(self.occupancy.teacher_busy[teacher_id], day) | (1 << period)
         
-        # Find all periods where teacher is scheduled on this day
-        for (t_id, c_id, r_id, d, p), _ in current_schedule.items():
-            if t_id == teacher_id and d == day:
-                teacher_periods.append(p)
-        
-        # Add current period
-        teacher_periods.append(period)
-        teacher_periods.sort()
-        
-        # Calculate gaps
-        if len(teacher_periods) <= 1:
+        count = periods.bit_count()
+        if count <= 1:
             return 0
         
-        gaps = 0
-        for i in range(len(teacher_periods) - 1):
-            gap = teacher_periods[i + 1] - teacher_periods[i] - 1
-            gaps += gap
+        # Free periods between the first and last lesson
+        first = (periods & -periods).bit_length() - 1
+        last = periods.bit_length() - 1
+        gaps = last - first + 1 - count
         
         return gaps * self.conflict_penalties['teacher_gap']
     
     def ml_schedule(self) -> Dict:
         """ML-inspired scheduling algorithm"""
         schedule = {}
+        self.reset_indices()
         
         # Create prioritized lesson list
         lessons_to_schedule = []
-        for class_id, subject_id, lessons_per_week in self.data['lesson_requirements']:
+        preferences = self.problem.preferences
+        for class_id, subject_id, lessons_per_week in self.problem.lesson_requirements:
+            db_class_id = int(self.problem.class_ids[class_id])
             for lesson_num in range(lessons_per_week):
                 # Find best teachers for this subject-class combination
                 candidate_teachers = []
-                for teacher_id in self.data['teachers'].keys():
-                    pref_score = self.data['preferences'].get((teacher_id, class_id), 3)
+                for teacher_id in range(self.problem.num_teachers):
+                    pref_score = int(preferences[teacher_id, class_id])
                     if pref_score >= 2:  # Minimum acceptable preference
                         candidate_teachers.append((teacher_id, pref_score))
                 
@@ -310,83 +302,85 @@ class MLScheduler:
                 candidate_teachers.sort(key=lambda x: x[1], reverse=True)
                 
                 if not candidate_teachers:
-                    candidate_teachers = [(list(self.data['teachers'].keys())[0], 3)]
+                    candidate_teachers = [(0, 3)]
                 
                 lessons_to_schedule.append({
                     'class_id': class_id,
                     'subject_id': subject_id,
                     'candidate_teachers': candidate_teachers,
-                    'priority': lessons_per_week + (5 - class_id % 5)  # Prefer higher grades and more lessons
+                    'priority': lessons_per_week + (5 - db_class_id % 5)  # Prefer higher grades and more lessons
                 })
         
         # Sort by priority
         lessons_to_schedule.sort(key=lambda x: x['priority'], reverse=True)
         
         # Schedule each lesson using ML scoring
+        candidates = unplaced = 0
         for lesson in lessons_to_schedule:
             class_id = lesson['class_id']
             subject_id = lesson['subject_id']
             candidate_teachers = lesson['candidate_teachers']
             
-            best_assignment = None
-            best_score = -float('inf')
+            # Score top 3 teachers x top 2 rooms x all slots in one batch;
+            # slots with a teacher/class/room clash are excluded
+            teachers = [teacher_id for teacher_id, _ in candidate_teachers[:3]]
+            rooms = self.problem.rooms_for_subject(subject_id)[:2]
+            if not rooms:
+                unplaced += 1
+                continue
+            scores = self.score_candidates(teachers, class_id, subject_id, rooms)
+            candidates += scores.size
             
-            # Try top teachers and rooms only for speed
-            for teacher_id, _ in candidate_teachers[:3]:  # Only top 3 teachers
-                # Get appropriate rooms
-                needs_lab = self.data['subjects'][subject_id]['needs_lab']
-                if needs_lab:
-                    room_candidates = [rid for rid, room in self.data['rooms'].items() if room['is_lab']]
-                else:
-                    room_candidates = [rid for rid, room in self.data['rooms'].items() if not room['is_lab']]
-                
-                if not room_candidates:
-                    room_candidates = list(self.data['rooms'].keys())
-                
-                for room_id in room_candidates[:2]:  # Only top 2 rooms
-                    for day in range(self.num_days):
-                        for period in range(self.num_periods):
-                            score = self.calculate_assignment_score(
-                                teacher_id, class_id, subject_id, room_id, day, period, schedule)
-                            
-                            if score > best_score:
-                                best_score = score
-                                best_assignment = (teacher_id, class_id, room_id, day, period)
+            best = np.unravel_index(np.argmax(scores), scores.shape)
+            best_score = scores[best]
+            best_assignment = None
+            if best_score > -np.inf:
+                t, r, day, period = best
+                best_assignment = (teachers[t], class_id, rooms[r], int(day), int(period))
             
             # Make the best assignment if it's conflict-free
             if best_assignment and best_score > -500:  # Threshold for acceptable assignments
-                key = best_assignment
-                schedule[key] = (subject_id, 1)
+                teacher_id, class_id, room_id, day, period = best_assignment
+                schedule[best_assignment] = (subject_id, 1)
+                self.record_assignment(teacher_id, class_id, room_id, subject_id, day, period)
+            else:
+                unplaced += 1
         
+        # Every scored cell is also tested for clashes
+        self.profile.count('candidates_evaluated', candidates)
+        self.profile.count('conflict_checks', candidates)
+        self.profile.count('lessons_unplaced', unplaced)
         return schedule
     
-    def save_schedule_to_db(self, schedule: Dict):
-        """Save schedule to database"""
-        conn = sqlite3.connect(self.db_file)
-        cursor = conn.cursor()
-        
-        # Clear existing schedules
-        cursor.execute("DELETE FROM schedules WHERE is_locked = 0")
-        
-        # Insert new schedule
-        for (teacher_id, class_id, room_id, day, period), (subject_id, lessons) in schedule.items():
-            cursor.execute("""
-                INSERT INTO schedules (class_id, teacher_id, subject_id, room_id, day_of_week, timeslot, is_locked)
-                VALUES (?, ?, ?, ?, ?, ?, 0)
-            """, (class_id, teacher_id, subject_id, room_id, day, period))
-        
-        conn.commit()
-        conn.close()
-        print(f"Saved {len(schedule)} lessons to database")
+    def save_schedule_to_db(self, schedule: Dict, solver: str = "ml_inspired") -> Dict[str, float]:
+        """Save schedule to database as a new, active schedule run"""
+        timings = save_schedule(self.db_file, self.problem, schedule, solver)
+        print(f"Saved {len(schedule)} lessons to database in {timings['total'] * 1000:.1f} ms")
+        return timings
+
 
-def solve_with_ml_scheduler(db_file="school_timetable.db"):
-    """Solve scheduling using ML-inspired approach"""
-    scheduler = MLScheduler(db_file)
+def solve_with_ml_scheduler(db_file="school_timetable.db", problem: ProblemInstance = None,
+                            profile: SolverProfile = None):
+    """
+    Solve scheduling using ML-inspired approach
+    
+    Args:
+        db_file: Database file path
+        problem: Pre-loaded problem; loaded from ``db_file`` when omitted
+        profile: Receives the phase timings and counters of the run
+    """
+    profile = profile if profile is not None else SolverProfile()
+    if problem is None:
+        with profile.phase('load'):
+            problem = load_problem(db_file)
+    with profile.phase('preprocessing'):
+        scheduler = MLScheduler(db_file, problem, profile)
     
     print("Starting ML-inspired scheduling...")
     start_time = time.time()
     
-    schedule = scheduler.ml_schedule()
+    with profile.phase('search'):
+        schedule = scheduler.ml_schedule()
     
     end_time = time.time()
     
@@ -394,7 +388,7 @@ def solve_with_ml_scheduler(db_file="school_timetable.db"):
     print(f"Generated {len(schedule)} lessons")
     
     if schedule:
-        scheduler.save_schedule_to_db(schedule)
+        profile.add_persistence(scheduler.save_schedule_to_db(schedule))
         return True
     else:
         print("No schedule generated")
@@ -0,0 +1,157 @@
+"""
+Occupancy - Bitset conflict tracking for the heuristic solvers
+
+Keeps one integer bitmask per teacher, per class and per room over all
+(day, period) slots, so conflict checks, placements and removals are O(1)
+and the free slots shared by a teacher, class and room come from a single AND.
+"""
+
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+
+class Occupancy:
+    """Bitmask occupancy of teachers, classes and rooms
+
+    Bit ``day * num_periods + period`` of a mask is set when the resource is
+    busy in that slot. Teacher unavailability is kept in a separate blocked
+    mask so it never has to be re-parsed or re-checked per candidate.
+    """
+
+    def __init__(self, num_teachers: int, num_classes: int, num_rooms: int,
+                 num_days: int, num_periods: int, teacher_available: Optional[np.ndarray] = None):
+        """
+        Create an empty occupancy
+
+        Args:
+            num_teachers: Number of teachers
+            num_classes: Number of classes
+            num_rooms: Number of rooms
+            num_days: Number of school days per week
+            num_periods: Number of periods per day
+            teacher_available: Optional (teachers, days, periods) availability array
+        """
+        self.num_days = num_days
+        self.num_periods = num_periods
+        self.num_slots = num_days * num_periods
+        self.full_mask = (1 << self.num_slots) - 1
+
+        self.teacher_busy: List[int] = [0] * num_teachers
+        self.class_busy: List[int] = [0] * num_classes
+        self.room_busy: List[int] = [0] * num_rooms
+        self.teacher_blocked: List[int] = [0] * num_teachers
+
+        if teacher_available is not None:
+            for t in range(num_teachers):
+                self.teacher_blocked[t] = self.mask_from_array(~teacher_available[t])
+
+    @classmethod
+    def for_problem(cls, problem) -> "Occupancy":
+        """Create an empty occupancy sized for a ProblemInstance"""
+        return cls(problem.num_teachers, problem.num_classes, problem.num_rooms,
+                   problem.num_days, problem.num_periods, problem.teacher_available)
+
+    def copy(self) -> "Occupancy":
+        """Return an independent copy"""
+        other = Occupancy.__new__(Occupancy)
+        other.num_days = self.num_days
+        other.num_periods = self.num_periods
+        other.num_slots = self.num_slots
+        other.full_mask = self.full_mask
+        other.teacher_busy = list(self.teacher_busy)
+        other.class_busy = list(self.class_busy)
+        other.room_busy = list(self.room_busy)
+        other.teacher_blocked = self.teacher_blocked
+        return other
+
+    # Slot encoding
+
+    def bit(self, day: int, period: int) -> int:
+        """Bit for a (day, period) slot"""
+        return 1 << (day * self.num_periods + period)
+
+    def mask_from_array(self, slots: np.ndarray) -> int:
+        """Build a mask from a boolean (days, periods) array"""
+        mask = 0
+        for index in np.flatnonzero(slots):
+            mask |= 1 << int(index)
+        return mask
+
+    def slots_array(self, mask: int) -> np.ndarray:
+        """Boolean (days, periods) array of the slots set in ``mask``"""
+        raw = np.frombuffer(mask.to_bytes((self.num_slots + 7) // 8, 'little'), dtype=np.uint8)
+        bits = np.unpackbits(raw, count=self.num_slots, bitorder='little')
+        return bits.astype(bool).reshape(self.num_days, self.num_periods)
+
+    def iter_slots(self, mask: int) -> Iterator[Tuple[int, int]]:
+        """Yield the (day, period) slots set in ``mask`` in chronological order"""
+        while mask:
+            low = mask & -mask
+            yield divmod(low.bit_length() - 1, self.num_periods)
+            mask ^= low
+
+    def first_slot(self, mask: int) -> Optional[Tuple[int, int]]:
+        """Earliest (day, period) slot set in ``mask``, or None if empty"""
+        if not mask:
+            return None
+        return divmod((mask & -mask).bit_length() - 1, self.num_periods)
+
+    def day_periods(self, mask: int, day: int) -> int:
+        """Periods of ``day`` set in ``mask``, as a mask with bit ``period``"""
+        return (mask >> (day * self.num_periods)) & ((1 << self.num_periods) - 1)
+
+    # Queries
+
+    def is_free(self, teacher: int, class_id: int, room: int, day: int, period: int) -> bool:
+        """True if teacher, class and room are all free and the teacher is available"""
+        bit = 1 << (day * self.num_periods + period)
+        return not ((self.teacher_busy[teacher] | self.teacher_blocked[teacher]
+                     | self.class_busy[class_id] | self.room_busy[room]) & bit)
+
+    def free_slots(self, teacher: Optional[int] = None, class_id: Optional[int] = None,
+                   room: Optional[int] = None, ignore_availability: bool = False) -> int:
+        """
+        Mask of slots where every given resource is free
+
+        Resources passed as None are ignored. Teacher unavailability counts
+        as busy unless ``ignore_availability`` is set.
+        """
+        busy = 0
+        if teacher is not None:
+            busy |= self.teacher_busy[teacher]
+            if not ignore_availability:
+                busy |= self.teacher_blocked[teacher]
+        if class_id is not None:
+            busy |= self.class_busy[class_id]
+        if room is not None:
+            busy |= self.room_busy[room]
+        return ~busy & self.full_mask
+
+    def teacher_conflict(self, teacher: int, day: int, period: int) -> bool:
+        return bool(self.teacher_busy[teacher] & self.bit(day, period))
+
+    def class_conflict(self, class_id: int, day: int, period: int) -> bool:
+        return bool(self.class_busy[class_id] & self.bit(day, period))
+
+    def room_conflict(self, room: int, day: int, period: int) -> bool:
+        return bool(self.room_busy[room] & self.bit(day, period))
+
+    def teacher_unavailable(self, teacher: int, day: int, period: int) -> bool:
+        return bool(self.teacher_blocked[teacher] & self.bit(day, period))
+
+    # Updates
+
+    def place(self, teacher: int, class_id: int, room: int, day: int, period: int):
+        """Mark teacher, class and room busy in a slot"""
+        bit = 1 << (day * self.num_periods + period)
+        self.teacher_busy[teacher] |= bit
+        self.class_busy[class_id] |= bit
+        self.room_busy[room] |= bit
+
+    def remove(self, teacher: int, class_id: int, room: int, day: int, period: int):
+        """Free teacher, class and room in a slot"""
+        bit = ~(1 << (day * self.num_periods + period))
+        self.teacher_busy[teacher] &= bit
+        self.class_busy[class_id] &= bit
+        self.room_busy[room] &= bit
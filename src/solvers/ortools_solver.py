@@ -1,259 +1,362 @@
-import collections
-import sqlite3
-import json
+"""
+OR-Tools Scheduling Engine
+Sparse CP-SAT model of the weekly timetable
+
+Variables are only created for placements that can actually occur: a
+required (class, subject) lesson, taught by one of its candidate teachers,
+in a slot where that teacher is available. Rooms are not part of the model;
+the number of lab and regular lessons per slot is capped by the number of
+rooms of that type and concrete rooms are assigned after solving.
+
+The search can be warm-started from one of the ultra-fast greedy schedules,
+optionally fixing part of it as a starting assignment. Worker count, time
+limit, relative gap and random seed are configurable, and every improving
+solution can be streamed to the caller through a solution callback.
+"""
+
+import os
+import random
+from collections import defaultdict
+from typing import Callable, Dict, List, Tuple, Union
+
+import numpy as np
 from ortools.sat.python import cp_model
 from ortools.sat.python.cp_model import CpModel, CpSolver
 
-def load_data_from_database(db_file="school_timetable.db"):
-    """Load all scheduling data from the database"""
-    conn = sqlite3.connect(db_file)
-    cursor = conn.cursor()
-    
-    # Load teachers
-    cursor.execute("SELECT id, name, availability_json FROM teachers")
-    teachers_data = cursor.fetchall()
-    teachers = {row[0]: row[1] for row in teachers_data}
-    teacher_availability = {}
-    for row in teachers_data:
-        if row[2]:  # availability_json is not empty
-            avail_data = json.loads(row[2])
-            for day_str, periods in avail_data.items():
-                day = int(day_str)
-                for period in periods:
-                    teacher_availability[(row[0] - 1, day, period)] = 0  # 0 means unavailable
-    
-    # Load classes
-    cursor.execute("SELECT id, name FROM classes")
-    classes_data = cursor.fetchall()
-    classes = {row[0]: row[1] for row in classes_data}
-    
-    # Load subjects
-    cursor.execute("SELECT id, name, needs_lab FROM subjects")
-    subjects_data = cursor.fetchall()
-    subjects = {row[0]: row[1] for row in subjects_data}
-    subject_needs_lab = {row[0]: bool(row[2]) for row in subjects_data}
-    
-    # Load rooms
-    cursor.execute("SELECT id, name, is_lab FROM rooms")
-    rooms_data = cursor.fetchall()
-    rooms = {row[0]: row[1] for row in rooms_data}
-    room_is_lab = {row[0]: bool(row[2]) for row in rooms_data}
-    
-    # Load lessons requirements
-    cursor.execute("SELECT class_id, subject_id, lessons_per_week FROM lessons")
-    lessons_data = cursor.fetchall()
-    lessons = {(row[0] - 1, row[1] - 1): row[2] for row in lessons_data}  # Convert to 0-based indexing
-    
-    # Load teacher preferences
-    cursor.execute("SELECT teacher_id, class_id, preference_score FROM teacher_preferences")
-    preferences_data = cursor.fetchall()
-    teacher_preferences = {(row[0] - 1, row[1] - 1): row[2] for row in preferences_data}  # Convert to 0-based indexing
-    
-    conn.close()
-    
-    return {
-        'teachers': teachers,
-        'classes': classes,
-        'subjects': subjects,
-        'rooms': rooms,
-        'lessons': lessons,
-        'teacher_availability': teacher_availability,
-        'teacher_preferences': teacher_preferences,
-        'subject_needs_lab': subject_needs_lab,
-        'room_is_lab': room_is_lab
-    }
-
-def save_solution_to_database(solution, data, db_file="school_timetable.db"):
-    """Save the generated solution to the database"""
-    if not solution:
-        return
-    
-    conn = sqlite3.connect(db_file)
-    cursor = conn.cursor()
-    
-    # Clear existing schedules (except locked ones)
-    cursor.execute("DELETE FROM schedules WHERE is_locked = 0")
-    
-    # Save new schedule
-    for item in solution:
-        # Find the appropriate room for this lesson
-        subject_id = None
-        teacher_id = None
-        class_id = None
-        
-        # Find IDs by names
-        for sid, sname in data['subjects'].items():
-            if sname == item['subject']:
-                subject_id = sid
-                break
-        
-        for tid, tname in data['teachers'].items():
-            if tname == item['teacher']:
-                teacher_id = tid
-                break
-                
-        for cid, cname in data['classes'].items():
-            if cname == item['class']:
-                class_id = cid
-                break
-        
-        # Select appropriate room
-        room_id = 1  # Default room
-        needs_lab = data['subject_needs_lab'].get(subject_id, False)
-        
-        if needs_lab:
-            # Find a lab room
-            for rid, is_lab in data['room_is_lab'].items():
-                if is_lab:
-                    room_id = rid
-                    break
-        else:
-            # Find a regular room
-            for rid, is_lab in data['room_is_lab'].items():
-                if not is_lab:
-                    room_id = rid
-                    break
-        
-        cursor.execute("""
-            INSERT INTO schedules (class_id, teacher_id, subject_id, room_id, day_of_week, timeslot, is_locked)
-            VALUES (?, ?, ?, ?, ?, ?, 0)
-        """, (class_id, teacher_id, subject_id, room_id, item['day'], item['period']))
+from ..core.problem import ProblemInstance, load_problem
+from ..database.schedule_writer import save_assignments
+from .profile import SolverProfile
+
+def save_solution_to_database(assignments, problem: ProblemInstance, db_file="school_timetable.db"):
+    """Save the generated solution to the database
+
+    Args:
+        assignments: List of (class, teacher, subject, room, day, period) index tuples
+        problem: Problem the indices refer to
+        db_file: Path to database file
+
+    Returns:
+        Per-phase save timings, or None if there was nothing to save
+    """
+    if not assignments:
+        return None
     
-    conn.commit()
-    conn.close()
+    # Store as a new active run in one transaction, keyed on database ids
+    return save_assignments(db_file, problem, assignments, "ortools")
+
+class SparseTimetableModel:
+    """CP-SAT model with one variable per feasible (class, subject, teacher, day, period)"""
+
+    def __init__(self, problem: ProblemInstance, num_periods: int = None,
+                 max_teachers_per_lesson: int = 5):
+        """
+        Build the model
+
+        Args:
+            problem: Compiled problem to schedule
+            num_periods: Periods per day to use; defaults to all periods of the problem
+            max_teachers_per_lesson: Candidate teachers kept per lesson, best preferences first
+        """
+        self.problem = problem
+        self.num_days = problem.num_days
+        self.num_periods = problem.num_periods if num_periods is None else min(num_periods, problem.num_periods)
+        self.max_teachers_per_lesson = max_teachers_per_lesson
+
+        self.model = CpModel()
+        self.lesson_vars: Dict[Tuple[int, int, int, int, int], cp_model.IntVar] = {}
+        self.build()
+
+    def candidate_teachers(self, class_id: int, subject_id: int, qualified: np.ndarray) -> List[int]:
+        """Qualified teachers for a lesson (all teachers if none qualify), best preference first"""
+        teachers = np.flatnonzero(qualified[:, subject_id])
+        if teachers.size == 0:
+            teachers = np.arange(self.problem.num_teachers)
+        scores = self.problem.preferences[teachers, class_id]
+        order = np.argsort(-scores, kind='stable')
+        return teachers[order][:self.max_teachers_per_lesson].tolist()
+
+    def build(self):
+        """Create variables, hard constraints and the preference objective"""
+        problem = self.problem
+        model = self.model
+        available = problem.teacher_available[:, :self.num_days, :self.num_periods]
+        qualified = problem.qualified_teachers(min_score=3)
+        preferences = problem.preference_scores(default=0)
+
+        # Duplicate lesson rows for the same class and subject add up
+        demand = defaultdict(int)
+        for c, s, count in problem.lesson_requirements:
+            demand[(c, s)] += count
+
+        class_slot = defaultdict(list)
+        teacher_slot = defaultdict(list)
+        room_type_slot = defaultdict(list)
+        objective = []
+
+        # --- Variables ---
+        # lesson_vars[(c, s, t, d, p)] is true if class 'c' has subject 's' with teacher 't' on day 'd' at period 'p'.
+        for (c, s), count in demand.items():
+            needs_lab = bool(problem.subject_needs_lab[s])
+            lesson = []
+            for t in self.candidate_teachers(c, s, qualified):
+                for d, p in np.argwhere(available[t]).tolist():
+                    var = model.NewBoolVar(f'lesson_{c}_{s}_{t}_{d}_{p}')
+                    self.lesson_vars[(c, s, t, d, p)] = var
+                    lesson.append(var)
+                    class_slot[(c, d, p)].append(var)
+                    teacher_slot[(t, d, p)].append(var)
+                    room_type_slot[(needs_lab, d, p)].append(var)
+                    if preferences[t, c]:
+                        objective.append(int(preferences[t, c]) * var)
+
+            # 1. Assign the correct number of lessons per subject per week for each class
+            model.Add(sum(lesson) == count)
+
+        # --- Hard Constraints ---
+
+        # 2. Each class has at most one lesson at a time
+        for slot_vars in class_slot.values():
+            model.AddAtMostOne(slot_vars)
+
+        # 3. Each teacher teaches at most one class at a time
+        for slot_vars in teacher_slot.values():
+            model.AddAtMostOne(slot_vars)
+
+        # 4. Lessons per slot cannot exceed the rooms of the right type
+        capacity = {True: len(problem.lab_rooms), False: len(problem.regular_rooms)}
+        for (needs_lab, d, p), slot_vars in room_type_slot.items():
+            if len(slot_vars) > capacity[needs_lab]:
+                model.Add(sum(slot_vars) <= capacity[needs_lab])
+
+        # --- Soft Constraints (Objective Function) ---
+        # Maximize teacher preferences (unset preferences count as 0)
+        model.Maximize(sum(objective))
+
+    def add_hints(self, schedule: Dict, fix_fraction: float = 0.0, seed: int = None) -> int:
+        """
+        Seed the search with a heuristic schedule
+
+        Every lesson variable is hinted: true for lessons placed in ``schedule``,
+        false otherwise. Placements the model has no variable for (e.g. a
+        teacher outside the candidate list) are ignored.
+
+        Args:
+            schedule: Greedy schedule of {(teacher, class, room, day, period): (subject, 1)}
+            fix_fraction: Fraction of the hinted lessons to fix as hard constraints
+            seed: Seed for choosing which lessons are fixed
 
-def solve_school_scheduling_from_db(db_file="school_timetable.db"):
+        Returns:
+            Number of hinted lessons
+        """
+        hinted = set()
+        for (t, c, r, d, p), (s, _) in schedule.items():
+            key = (c, s, t, d, p)
+            if key in self.lesson_vars:
+                hinted.add(key)
+
+        for key, var in self.lesson_vars.items():
+            self.model.AddHint(var, key in hinted)
+
+        if fix_fraction > 0 and hinted:
+            rng = random.Random(seed)
+            fixed = rng.sample(sorted(hinted), int(len(hinted) * min(fix_fraction, 1.0)))
+            for key in fixed:
+                self.model.Add(self.lesson_vars[key] == 1)
+
+        return len(hinted)
+
+    def extract_assignments(self, solver: CpSolver) -> List[Tuple[int, int, int, int, int, int]]:
+        """
+        Read the solved lessons and assign concrete rooms slot by slot
+
+        Returns:
+            List of (class, teacher, subject, room, day, period) index tuples
+        """
+        free_rooms = {}
+        assignments = []
+        for (c, s, t, d, p), var in self.lesson_vars.items():
+            if not solver.Value(var):
+                continue
+            if (d, p) not in free_rooms:
+                free_rooms[(d, p)] = {True: list(self.problem.lab_rooms),
+                                      False: list(self.problem.regular_rooms)}
+            room = free_rooms[(d, p)][bool(self.problem.subject_needs_lab[s])].pop(0)
+            assignments.append((c, t, s, room, d, p))
+        assignments.sort(key=lambda a: (a[4], a[5], a[0]))
+        return assignments
+
+class SolutionProgressCallback(cp_model.CpSolverSolutionCallback):
+    """Forwards every improving CP-SAT solution to a progress function
+
+    The function receives a dict with the solution number, objective value,
+    best bound and wall time. It is called from a CP-SAT worker thread.
     """
-    Main function to solve school scheduling using database data
+
+    def __init__(self, on_solution: Callable[[Dict], None]):
+        super().__init__()
+        self.on_solution = on_solution
+        self.solution_count = 0
+
+    def on_solution_callback(self):
+        self.solution_count += 1
+        self.on_solution({
+            "solution": self.solution_count,
+            "objective": self.ObjectiveValue(),
+            "bound": self.BestObjectiveBound(),
+            "wall_time": self.WallTime()
+        })
+
+def configure_solver(solver: CpSolver, num_workers: int = 0, time_limit: float = 30.0,
+                     relative_gap: float = None, random_seed: int = None):
     """
-    # Load data from database
-    data = load_data_from_database(db_file)
-    
-    # Convert to lists for OR-Tools (0-based indexing)
-    teachers = [data['teachers'][i+1] for i in range(len(data['teachers']))]
-    classes = [data['classes'][i+1] for i in range(len(data['classes']))]
-    subjects = [data['subjects'][i+1] for i in range(len(data['subjects']))]
-    rooms = [data['rooms'][i+1] for i in range(len(data['rooms']))]
-    
-    # Model
-    model = CpModel()
-
-    # --- Data Structures ---
-    num_days = 5
-    num_periods = 6  # Reduced to 6 periods for more manageable scheduling
-    all_days = range(num_days)
-    all_periods = range(num_periods)
-    
-    all_teachers = range(len(teachers))
-    all_classes = range(len(classes))
-    all_subjects = range(len(subjects))
-    all_rooms = range(len(rooms))
-
-    # --- Variables ---
-    # scheduled_lesson[(c, t, s, r, d, p)] is true if class 'c' has subject 's' with teacher 't' in room 'r' on day 'd' at period 'p'.
-    scheduled_lesson = {}
-    for c in all_classes:
-        for t in all_teachers:
-            for s in all_subjects:
-                for r in all_rooms:
-                    for d in all_days:
-                        for p in all_periods:
-                            scheduled_lesson[(c, t, s, r, d, p)] = model.NewBoolVar(f'scheduled_{c}_{t}_{s}_{r}_{d}_{p}')
-
-    # --- Hard Constraints ---
-
-    # 1. Each class has at most one lesson at a time
-    for c in all_classes:
-        for d in all_days:
-            for p in all_periods:
-                model.AddAtMostOne(scheduled_lesson[(c, t, s, r, d, p)] 
-                                  for t in all_teachers for s in all_subjects for r in all_rooms)
-
-    # 2. Each teacher teaches at most one class at a time
-    for t in all_teachers:
-        for d in all_days:
-            for p in all_periods:
-                model.AddAtMostOne(scheduled_lesson[(c, t, s, r, d, p)] 
-                                  for c in all_classes for s in all_subjects for r in all_rooms)
-
-    # 3. Each room hosts at most one lesson at a time
-    for r in all_rooms:
-        for d in all_days:
-            for p in all_periods:
-                model.AddAtMostOne(scheduled_lesson[(c, t, s, r, d, p)] 
-                                  for c in all_classes for t in all_teachers for s in all_subjects)
-
-    # 4. Assign the correct number of lessons per subject per week for each class
-    for (c, s), num_lessons in data['lessons'].items():
-        model.Add(sum(scheduled_lesson[(c, t, s, r, d, p)] 
-                     for t in all_teachers for r in all_rooms for d in all_days for p in all_periods) == num_lessons)
-
-    # 5. Respect teacher availability
-    for (t, d, p), available in data['teacher_availability'].items():
-        if not available:  # teacher is not available
-            for c in all_classes:
-                for s in all_subjects:
-                    for r in all_rooms:
-                        model.Add(scheduled_lesson[(c, t, s, r, d, p)] == 0)
-
-    # 6. Subject-room compatibility (labs for lab subjects)
-    for s in all_subjects:
-        subject_id = s + 1  # Convert back to 1-based for lookup
-        needs_lab = data['subject_needs_lab'].get(subject_id, False)
-        for r in all_rooms:
-            room_id = r + 1  # Convert back to 1-based for lookup
-            is_lab = data['room_is_lab'].get(room_id, False)
-            
-            # If subject needs lab but room is not lab, or vice versa
-            if needs_lab != is_lab:
-                for c in all_classes:
-                    for t in all_teachers:
-                        for d in all_days:
-                            for p in all_periods:
-                                model.Add(scheduled_lesson[(c, t, s, r, d, p)] == 0)
-
-    # --- Soft Constraints (Objective Function) ---
-    # Maximize teacher preferences
-    preference_score = model.NewIntVar(0, 1000, 'preference_score')
-    model.Add(preference_score == sum(
-        data['teacher_preferences'].get((t, c), 0) * scheduled_lesson[(c, t, s, r, d, p)]
-        for c in all_classes for t in all_teachers for s in all_subjects 
-        for r in all_rooms for d in all_days for p in all_periods
-    ))
-    model.Maximize(preference_score)
+    Apply search parameters to a CP-SAT solver
+
+    Args:
+        solver: Solver to configure
+        num_workers: Parallel search workers; 0 uses every CPU core
+        time_limit: Time limit in seconds
+        relative_gap: Stop once (bound - objective) / objective is within this gap
+        random_seed: Seed for reproducible searches
+    """
+    solver.parameters.num_workers = num_workers or os.cpu_count() or 1
+    solver.parameters.max_time_in_seconds = time_limit
+    if relative_gap is not None:
+        solver.parameters.relative_gap_limit = relative_gap
+    if random_seed is not None:
+        solver.parameters.random_seed = random_seed
+
+def record_search_statistics(solver: CpSolver, profile: SolverProfile):
+    """Add the statistics of the last CP-SAT search to a profile"""
+    profile.count('candidates_evaluated', solver.num_branches)
+    profile.count('conflict_checks', solver.num_binary_propagations + solver.num_integer_propagations)
+    profile.count('backtracks', solver.num_conflicts)
+
+def warm_start_schedule(method: str, db_file: str, problem: ProblemInstance) -> Dict:
+    """
+    Compute a greedy schedule to warm-start CP-SAT
+
+    Args:
+        method: "ultra_fast" or "smart_greedy"
+        db_file: Database file path
+        problem: Problem to schedule
+    """
+    from .ultra_fast_solver import UltraFastScheduler
+
+    scheduler = UltraFastScheduler(db_file, problem)
+    if method == "ultra_fast":
+        return scheduler.ultra_fast_greedy()
+    elif method == "smart_greedy":
+        return scheduler.smart_greedy()
+    raise ValueError(f"Unknown warm start method: {method}")
+
+def solve_assignments(problem: ProblemInstance, db_file: str = "school_timetable.db",
+                      warm_start: str = None, fix_fraction: float = 0.0,
+                      num_workers: int = 0, time_limit: float = 30.0,
+                      relative_gap: float = None, random_seed: int = None,
+                      callback: Union[cp_model.CpSolverSolutionCallback,
+                                      Callable[[Dict], None]] = None,
+                      profile: SolverProfile = None):
+    """
+    Build and solve the sparse model without touching the schedules table
+
+    Args:
+        problem: Problem to schedule
+        db_file: Database file path, used by the warm-start heuristics
+        warm_start: Greedy method ("ultra_fast" or "smart_greedy") whose
+            schedule is passed to CP-SAT as a hint; no hint when omitted
+        fix_fraction: Fraction of the hinted lessons fixed as a starting assignment
+        num_workers: Parallel search workers; 0 uses every CPU core
+        time_limit: Time limit in seconds
+        relative_gap: Stop early once the relative optimality gap is reached
+        random_seed: Seed for reproducible searches
+        callback: CpSolverSolutionCallback, or a function receiving a dict with
+            objective, bound and wall time for each improving solution
+        profile: Receives model building and warm start time as preprocessing,
+            CP-SAT time as search, and the CP-SAT search statistics
+
+    Returns:
+        List of (class, teacher, subject, room, day, period) index tuples,
+        or None if no solution was found
+    """
+    profile = profile if profile is not None else SolverProfile()
+    with profile.phase('preprocessing'):
+        timetable_model = SparseTimetableModel(problem)
+        print(f'Built model with {len(timetable_model.lesson_vars)} lesson variables')
+
+        if warm_start:
+            hint = warm_start_schedule(warm_start, db_file, problem)
+            hinted = timetable_model.add_hints(hint, fix_fraction)
+            print(f'Warm start from {warm_start}: {hinted} hinted lessons')
+    profile.count('model_variables', len(timetable_model.lesson_vars))
 
     # --- Solve ---
     solver = CpSolver()
-    solver.parameters.max_time_in_seconds = 30.0
-    status = solver.Solve(model)
+    configure_solver(solver, num_workers, time_limit, relative_gap, random_seed)
+    if callback is not None and not isinstance(callback, cp_model.CpSolverSolutionCallback):
+        callback = SolutionProgressCallback(callback)
+    with profile.phase('search'):
+        status = solver.Solve(timetable_model.model, callback)
+    record_search_statistics(solver, profile)
+
+    remaining = time_limit - solver.WallTime()
+    if status in (cp_model.INFEASIBLE, cp_model.UNKNOWN) and warm_start and fix_fraction > 0 and remaining > 0:
+        # The fixed part of the greedy schedule cannot be completed (or not in
+        # time); keep it as a hint only for the rest of the time limit
+        print('Fixed warm start found no solution, retrying with hints only')
+        with profile.phase('preprocessing'):
+            timetable_model = SparseTimetableModel(problem)
+            timetable_model.add_hints(hint)
+        solver.parameters.max_time_in_seconds = remaining
+        with profile.phase('search'):
+            status = solver.Solve(timetable_model.model, callback)
+        record_search_statistics(solver, profile)
 
     # --- Extract Solution ---
-    timetable = []
     if status == cp_model.OPTIMAL or status == cp_model.FEASIBLE:
-        print(f'Solution found in {solver.WallTime()} seconds')
-        for d in all_days:
-            for p in all_periods:
-                for c in all_classes:
-                    for t in all_teachers:
-                        for s in all_subjects:
-                            for r in all_rooms:
-                                if solver.Value(scheduled_lesson[(c, t, s, r, d, p)]):
-                                    timetable.append({
-                                        "day": d,
-                                        "period": p,
-                                        "class": classes[c],
-                                        "teacher": teachers[t],
-                                        "subject": subjects[s],
-                                        "room": rooms[r]
-                                    })
-        
-        # Save solution to database
-        save_solution_to_database(timetable, data, db_file)
-        return timetable
-    else:
-        print('No solution found.')
+        print(f'Solution found in {solver.WallTime()} seconds '
+              f'(objective {solver.ObjectiveValue():.0f}, bound {solver.BestObjectiveBound():.0f})')
+        with profile.phase('search'):
+            assignments = timetable_model.extract_assignments(solver)
+        profile.count('lessons_unplaced', max(0, problem.total_demand - len(assignments)))
+        return assignments
+    print('No solution found.')
+    profile.count('lessons_unplaced', problem.total_demand)
+    return None
+
+def solve_school_scheduling_from_db(db_file="school_timetable.db", problem: ProblemInstance = None,
+                                    profile: SolverProfile = None, **options):
+    """
+    Main function to solve school scheduling using database data
+
+    Args:
+        db_file: Path to database file
+        problem: Pre-loaded problem; loaded from ``db_file`` when omitted
+        profile: Receives the phase timings and counters of the run
+        **options: Search options of ``solve_assignments`` (warm_start,
+            fix_fraction, num_workers, time_limit, relative_gap, random_seed, callback)
+    """
+    profile = profile if profile is not None else SolverProfile()
+    if problem is None:
+        with profile.phase('load'):
+            problem = load_problem(db_file)
+
+    assignments = solve_assignments(problem, db_file, profile=profile, **options)
+    if assignments is None:
         return None
 
+    timetable = [{
+        "day": d,
+        "period": p,
+        "class": problem.class_names[c],
+        "teacher": problem.teacher_names[t],
+        "subject": problem.subject_names[s],
+        "room": problem.room_names[r]
+    } for c, t, s, r, d, p in assignments]
+
+    # Save solution to database
+    profile.add_persistence(save_solution_to_database(assignments, problem, db_file))
+    return timetable
+
 if __name__ == '__main__':
     # Test the solver with database data
     print("Testing school scheduling solver...")
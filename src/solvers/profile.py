@@ -0,0 +1,78 @@
+"""
+Solver Profile - Per-phase timings and work counters of a solver run
+
+Every engine records where its time goes (loading the problem, building
+its lookup tables or model, searching, saving and verifying the result)
+and how much work the search did, so a slow run can be traced to SQLite,
+to Python scoring loops or to CP-SAT.
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Any, Dict
+
+# Phases in the order they happen
+PHASES = ('load', 'preprocessing', 'search', 'persistence', 'verification')
+
+# candidates_evaluated: placements considered; (teacher, room, day, period)
+#     cells for the scoring engines, (teacher, room) pairs for first-fit ones
+#     and branches for CP-SAT
+# conflict_checks: teacher/class/room clash tests; a bitmask test covering
+#     every slot at once counts once, CP-SAT counts propagations
+# backtracks: placements undone to make room for others (CP-SAT conflicts)
+# lessons_unplaced: required lessons missing from the result
+COUNTERS = ('candidates_evaluated', 'conflict_checks', 'backtracks', 'lessons_unplaced')
+
+class SolverProfile:
+    """Where a solver run spent its time and how much work it did"""
+
+    def __init__(self):
+        self.phases: Dict[str, float] = dict.fromkeys(PHASES, 0.0)
+        self.counters: Dict[str, int] = dict.fromkeys(COUNTERS, 0)
+        # Breakdown of the persistence phase as returned by the schedule writer
+        self.persistence: Dict[str, float] = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        """Add the time spent inside the block to a phase"""
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    def count(self, name: str, amount: int = 1):
+        """Add to a counter; engines may keep counters beyond ``COUNTERS``"""
+        self.counters[name] = self.counters.get(name, 0) + int(amount)
+
+    def add_persistence(self, timings: Dict[str, float]):
+        """Record the per-phase timings of a schedule writer call as persistence time"""
+        if not timings:
+            return
+        for key, seconds in timings.items():
+            self.persistence[key] = self.persistence.get(key, 0.0) + seconds
+        self.phases['persistence'] += timings['total']
+
+    def add_counters(self, counters: Dict[str, int]):
+        """Add the counters of another run, e.g. a portfolio engine"""
+        for name, amount in counters.items():
+            self.count(name, amount)
+
+    @property
+    def total(self) -> float:
+        """Seconds spent in all phases"""
+        return sum(self.phases.values())
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain dict for JSON: phases, counters and the persistence breakdown"""
+        return {
+            'phases': dict(self.phases),
+            'counters': dict(self.counters),
+            'persistence': dict(self.persistence),
+        }
+
+    def summary(self) -> str:
+        """One line per phase and counter for console output"""
+        phases = ', '.join(f"{name} {seconds * 1000:.1f} ms" for name, seconds in self.phases.items())
+        counters = ', '.join(f"{name.replace('_', ' ')} {amount}" for name, amount in self.counters.items())
+        return f"Phases: {phases}\nCounters: {counters}"
@@ -0,0 +1,303 @@
+"""
+Repair Scheduler - Incremental re-scheduling after small data changes
+
+Starts from the timetable currently shown instead of an empty one. Only the
+lessons that break a constraint after an edit (teacher availability, lesson
+requirements, deleted teachers or rooms, clashes, wrong room type) are
+unassigned and re-placed; every other lesson and every locked lesson stays
+where it is. If some lessons cannot be re-placed, the other unlocked lessons
+of their classes are freed as well and placed again. The changes are written
+back into the active run, so the work grows with the size of the edit rather
+than with the size of the school.
+"""
+
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from ..core.problem import ProblemInstance, load_problem
+from ..database.database_manager import get_database_manager
+from ..database.schedule_writer import patch_schedule
+from .occupancy import Occupancy
+from .profile import SolverProfile
+
+# A lesson to place: (class, subject, hint) where hint is the previous
+# (teacher, room, day, period) or None for new lessons
+Pending = Tuple[int, int, Optional[Tuple[int, int, int, int]]]
+
+class RepairScheduler:
+    def __init__(self, db_file="school_timetable.db", problem: ProblemInstance = None,
+                 profile: SolverProfile = None):
+        self.db_file = db_file
+        self.problem = problem if problem is not None else load_problem(db_file)
+        self.profile = profile if profile is not None else SolverProfile()
+        self.qualified = self.problem.qualified_teachers(min_score=3)
+
+    def load_current(self) -> List[Tuple]:
+        """
+        Read the shown timetable with row ids
+
+        Returns:
+            Rows of (row_id, class, teacher, subject, room, day, period, locked)
+            in dense indices; entities that no longer exist are None
+        """
+        problem = self.problem
+        conn = get_database_manager(self.db_file).connect()
+        try:
+            rows = conn.execute("""
+                SELECT id, class_id, teacher_id, subject_id, room_id, day_of_week, timeslot, is_locked
+                FROM active_schedules ORDER BY id
+            """).fetchall()
+        finally:
+            conn.close()
+        return [(row_id, problem.class_index.get(class_id), problem.teacher_index.get(teacher_id),
+                 problem.subject_index.get(subject_id), problem.room_index.get(room_id), day, period, bool(locked))
+                for row_id, class_id, teacher_id, subject_id, room_id, day, period, locked in rows]
+
+    def candidate_teachers(self, c: int, s: int, current: Dict[Tuple[int, int], List[int]],
+                           hint: Optional[int] = None) -> List[int]:
+        """Teachers for a lesson: those already teaching it, the previous teacher, then qualified by preference"""
+        problem = self.problem
+        qualified = np.flatnonzero(self.qualified[:, s])
+        if not len(qualified):
+            qualified = np.arange(problem.num_teachers)
+        ranked = qualified[np.argsort(-problem.preferences[qualified, c], kind='stable')].tolist()
+        ordered = list(current.get((c, s), []))
+        if hint is not None:
+            ordered.append(hint)
+        return list(dict.fromkeys(ordered + ranked))
+
+    def lesson_maps(self, lessons: Iterable[Tuple]) -> Tuple[Dict, Dict]:
+        """Teachers per (class, subject) and days per (class, subject) of placed lessons"""
+        current, subject_days = defaultdict(list), defaultdict(set)
+        for c, t, s, r, d, p, *_ in lessons:
+            current[(c, s)].append(t)
+            subject_days[(c, s)].add(d)
+        return current, subject_days
+
+    def day_slots(self, days: Iterable[int]) -> int:
+        """Mask of every slot on the given days"""
+        periods = self.problem.num_periods
+        mask = 0
+        for day in days:
+            mask |= ((1 << periods) - 1) << (day * periods)
+        return mask
+
+    def place_lessons(self, pending: List[Pending], occupancy: Occupancy,
+                      current: Dict[Tuple[int, int], List[int]],
+                      subject_days: Dict[Tuple[int, int], set]) -> Tuple[List[Tuple], List[Pending]]:
+        """
+        Greedily place lessons, most constrained class first
+
+        Prefers the previous slot, then days on which the class does not have
+        the subject yet, then the earliest free slot. ``occupancy``,
+        ``current`` and ``subject_days`` are updated in place.
+
+        Returns:
+            (placed (class, teacher, subject, room, day, period) tuples, lessons that did not fit)
+        """
+        problem = self.problem
+        order = sorted(pending, key=lambda lesson: (bin(occupancy.free_slots(class_id=lesson[0])).count('1'),
+                                                    not problem.subject_needs_lab[lesson[1]]))
+        placed, unplaced = [], []
+        candidates = checks = 0
+        for lesson in order:
+            c, s, hint = lesson
+            hint_teacher, hint_room = (hint[0], hint[1]) if hint else (None, None)
+            rooms = problem.rooms_for_subject(s)
+            if hint_room in rooms:
+                rooms = [hint_room] + [r for r in rooms if r != hint_room]
+            spread = ~self.day_slots(subject_days.get((c, s), ()))
+
+            choice = None
+            for t in self.candidate_teachers(c, s, current, hint_teacher):
+                checks += 1
+                free = occupancy.free_slots(t, c)
+                for r in rooms:
+                    candidates += 1
+                    checks += 1
+                    mask = free & ~occupancy.room_busy[r]
+                    if not mask:
+                        continue
+                    if hint and mask & occupancy.bit(hint[2], hint[3]):
+                        slot = (hint[2], hint[3])
+                    else:
+                        slot = occupancy.first_slot(mask & spread) or occupancy.first_slot(mask)
+                    choice = (t, r) + slot
+                    break
+                if choice:
+                    break
+
+            if choice is None:
+                unplaced.append(lesson)
+                continue
+            t, r, d, p = choice
+            occupancy.place(t, c, r, d, p)
+            current.setdefault((c, s), []).append(t)
+            subject_days.setdefault((c, s), set()).add(d)
+            placed.append((c, t, s, r, d, p))
+        self.profile.count('candidates_evaluated', candidates)
+        self.profile.count('conflict_checks', checks)
+        return placed, unplaced
+
+    def repair(self, teacher_ids: Iterable[int] = None, class_ids: Iterable[int] = None) -> Dict:
+        """
+        Work out which lessons to remove and add
+
+        Args:
+            teacher_ids: Database ids of teachers whose data changed
+            class_ids: Database ids of classes whose lesson requirements changed;
+                when neither is given the whole timetable is checked
+
+        Returns:
+            Dict with removed row ids, added (class, teacher, subject, room, day,
+            period) tuples, unplaced (class, subject) lessons and the number of
+            lessons checked
+        """
+        problem = self.problem
+        check_all = teacher_ids is None and class_ids is None
+        teachers = {problem.teacher_index[i] for i in teacher_ids or () if i in problem.teacher_index}
+        classes = {problem.class_index[i] for i in class_ids or () if i in problem.class_index}
+
+        def in_scope(c, t):
+            return check_all or c in classes or t in teachers
+
+        with self.profile.phase('load'):
+            rows = self.load_current()
+        with self.profile.phase('preprocessing'):
+            occupancy = Occupancy.for_problem(problem)
+            kept: Dict[int, Tuple] = {}
+            removed: List[int] = []
+            pending: List[Pending] = []
+            checked = 0
+
+            # Locked lessons stay put; lessons outside the change are trusted as they are
+            rows.sort(key=lambda row: (not row[7], in_scope(row[1], row[2])))
+            for row_id, c, t, s, r, d, p, locked in rows:
+                known = None not in (c, t, s, r) and 0 <= d < problem.num_days and 0 <= p < problem.num_periods
+                if locked or (known and not in_scope(c, t)):
+                    if known:
+                        occupancy.place(t, c, r, d, p)
+                        kept[row_id] = (c, t, s, r, d, p, locked)
+                    continue
+                checked += 1
+                if known and r in problem.rooms_for_subject(s) and occupancy.is_free(t, c, r, d, p):
+                    occupancy.place(t, c, r, d, p)
+                    kept[row_id] = (c, t, s, r, d, p, locked)
+                    continue
+                removed.append(row_id)
+                if c is not None and s is not None:
+                    pending.append((c, s, (t, r, d, p) if known else None))
+            self.profile.count('conflict_checks', checked)
+
+            # Match the lesson requirements of the affected classes
+            scheduled = np.zeros_like(problem.lesson_demand)
+            for c, t, s, r, d, p, locked in kept.values():
+                scheduled[c, s] += 1
+            for c, s, hint in pending:
+                scheduled[c, s] += 1
+            for c in range(problem.num_classes):
+                if not (check_all or c in classes):
+                    continue
+                for s in range(problem.num_subjects):
+                    excess = scheduled[c, s] - problem.lesson_demand[c, s]
+                    while excess > 0:
+                        index = next((i for i, lesson in enumerate(pending) if lesson[:2] == (c, s)), None)
+                        if index is not None:
+                            pending.pop(index)
+                        else:
+                            extra = [row_id for row_id, lesson in kept.items()
+                                     if lesson[0] == c and lesson[2] == s and not lesson[6]]
+                            if not extra:
+                                break
+                            row_id = extra[-1]
+                            _, t, _, r, d, p, _ = kept.pop(row_id)
+                            occupancy.remove(t, c, r, d, p)
+                            removed.append(row_id)
+                        excess -= 1
+                    for _ in range(max(0, -excess)):
+                        pending.append((c, s, None))
+
+        with self.profile.phase('search'):
+            placed, unplaced = self.place_lessons(pending, occupancy.copy(), *self.lesson_maps(kept.values()))
+
+            if unplaced:
+                # Free the neighbourhood: the other unlocked lessons of the classes that did not fit
+                affected = {c for c, s, hint in unplaced}
+                neighbourhood = [row_id for row_id, lesson in kept.items() if lesson[0] in affected and not lesson[6]]
+                wider = occupancy.copy()
+                stuck = {id(lesson) for lesson in unplaced}
+                rest = [lesson for lesson in pending if id(lesson) not in stuck]
+                for row_id in neighbourhood:
+                    c, t, s, r, d, p, _ = kept[row_id]
+                    wider.remove(t, c, r, d, p)
+                    rest.append((c, s, (t, r, d, p)))
+                freed = set(neighbourhood)
+                maps = self.lesson_maps(lesson for row_id, lesson in kept.items() if row_id not in freed)
+                # The lessons that did not fit go first; the freed ones keep their slot where they still can
+                wider_placed, wider_unplaced = self.place_lessons(unplaced, wider, *maps)
+                rest_placed, rest_unplaced = self.place_lessons(rest, wider, *maps)
+                wider_placed += rest_placed
+                wider_unplaced += rest_unplaced
+                if len(wider_unplaced) < len(unplaced):
+                    for row_id in neighbourhood:
+                        kept.pop(row_id)
+                    removed.extend(neighbourhood)
+                    placed, unplaced = wider_placed, wider_unplaced
+                self.profile.count('backtracks', len(neighbourhood))
+
+        self.profile.count('lessons_unplaced', len(unplaced))
+
+        return {
+            'removed': removed,
+            'added': placed,
+            'unplaced': [(c, s) for c, s, hint in unplaced],
+            'checked': checked,
+        }
+
+
+def repair_schedule(db_file="school_timetable.db", problem: ProblemInstance = None,
+                    teacher_ids: Iterable[int] = None, class_ids: Iterable[int] = None,
+                    profile: SolverProfile = None) -> Dict:
+    """
+    Repair the shown timetable after teachers or lesson requirements changed
+
+    Args:
+        db_file: Path to database file
+        problem: Pre-loaded problem reflecting the change; loaded from ``db_file`` when omitted
+        teacher_ids: Database ids of the changed teachers
+        class_ids: Database ids of the classes whose lesson requirements changed
+        profile: Receives the phase timings and counters of the repair
+
+    Returns:
+        Dict with the counts of removed, added, unplaced and checked lessons
+        and the save timings
+    """
+    profile = profile if profile is not None else SolverProfile()
+    if problem is None:
+        with profile.phase('load'):
+            problem = load_problem(db_file)
+    with profile.phase('preprocessing'):
+        scheduler = RepairScheduler(db_file, problem, profile)
+
+    start_time = time.time()
+    changes = scheduler.repair(teacher_ids, class_ids)
+    print(f"Repair checked {changes['checked']} lessons in {time.time() - start_time:.3f} seconds: "
+          f"{len(changes['removed'])} removed, {len(changes['added'])} placed, "
+          f"{len(changes['unplaced'])} could not be placed")
+
+    timings = {}
+    if changes['removed'] or changes['added']:
+        rows = scheduler.problem.assignment_rows(changes['added'])
+        timings = patch_schedule(db_file, changes['removed'], rows)
+        profile.add_persistence(timings)
+
+    return {
+        'removed': len(changes['removed']),
+        'added': len(changes['added']),
+        'unplaced': len(changes['unplaced']),
+        'checked': changes['checked'],
+        'timings': timings,
+    }
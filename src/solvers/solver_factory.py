@@ -3,12 +3,23 @@ Solver Factory - Central management of all scheduling algorithms
 
 This module provides a unified interface to all scheduling solvers,
 making it easy to add new algorithms and switch between them.
+Solvers can run synchronously with ``SolverFactory.solve`` or in a worker
+process with ``SolverFactory.submit``, which returns a cancellable job.
 """
 
+import atexit
+import multiprocessing
+import os
+import queue
+import signal
 import time
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Callable
 from enum import Enum
 
+from ..database.database_manager import get_database_manager
+from ..database.schedule_runs import get_active_run, update_run
+from .profile import SolverProfile
+
 class SolverType(Enum):
     """Available solver types"""
     ULTRA_FAST = "ultra_fast"
@@ -17,16 +28,236 @@ class SolverType(Enum):
     FAST_GREEDY = "fast_greedy"
     ORTOOLS = "ortools"
     SIMPLE = "simple"
+    PORTFOLIO = "portfolio"
+    REPAIR = "repair"
+
+# Engines raced by the portfolio solver unless overridden with the "engines" option
+PORTFOLIO_ENGINES = (SolverType.ULTRA_FAST, SolverType.SMART_GREEDY,
+                     SolverType.ML_INSPIRED, SolverType.FAST_GREEDY)
+# Seconds a stopped worker gets to exit on SIGTERM before it is killed
+STOP_GRACE_PERIOD = 5.0
 
 class SolverResult:
-    """Result of a scheduling operation"""
+    """Result of a scheduling operation
+    
+    ``time_taken`` covers loading, preprocessing, search and persistence;
+    ``profile`` splits it per phase, adds the verification time and holds
+    the work counters of the engine.
+    """
     def __init__(self, success: bool, lessons_count: int, 
-                 time_taken: float, algorithm: str, error: str = None):
+                 time_taken: float, algorithm: str, error: str = None,
+                 details: Dict[str, Any] = None, run_id: int = None,
+                 profile: SolverProfile = None):
         self.success = success
         self.lessons_count = lessons_count
         self.time_taken = time_taken
         self.algorithm = algorithm
         self.error = error
+        self.details = details or {}
+        self.run_id = run_id
+        self.profile = profile if profile is not None else SolverProfile()
+
+def _compute_schedule(solver_type: SolverType, db_file: str, problem,
+                      options: Optional[Dict[str, Any]] = None):
+    """
+    Run one engine without saving, for the portfolio process pool
+    
+    Returns:
+        (solver type value, schedule dict {(teacher, class, room, day, period): (subject, 1)},
+        seconds, profile of the engine)
+    """
+    start_time = time.time()
+    profile = SolverProfile()
+    if solver_type in (SolverType.ULTRA_FAST, SolverType.SMART_GREEDY):
+        from .ultra_fast_solver import UltraFastScheduler
+        with profile.phase("preprocessing"):
+            scheduler = UltraFastScheduler(db_file, problem, profile)
+        with profile.phase("search"):
+            if solver_type == SolverType.ULTRA_FAST:
+                schedule = scheduler.ultra_fast_greedy()
+            else:
+                schedule = scheduler.smart_greedy()
+    elif solver_type == SolverType.ML_INSPIRED:
+        from .ml_solver import MLScheduler
+        with profile.phase("preprocessing"):
+            scheduler = MLScheduler(db_file, problem, profile)
+        with profile.phase("search"):
+            schedule = scheduler.ml_schedule()
+    elif solver_type == SolverType.FAST_GREEDY:
+        from .fast_solver import FastScheduler
+        with profile.phase("preprocessing"):
+            scheduler = FastScheduler(db_file, problem, profile)
+        with profile.phase("search"):
+            schedule = scheduler.greedy_schedule()
+    elif solver_type == SolverType.ORTOOLS:
+        from .ortools_solver import solve_assignments
+        assignments = solve_assignments(problem, db_file, profile=profile, **(options or {})) or []
+        schedule = {(t, c, r, d, p): (s, 1) for c, t, s, r, d, p in assignments}
+    else:
+        raise ValueError(f"Solver {solver_type.value} cannot run in a portfolio")
+    return solver_type.value, schedule, time.time() - start_time, profile
+
+def schedule_quality(problem, schedule: Dict) -> Dict[str, Any]:
+    """
+    Common quality metric used to compare engines
+    
+    The score is FastScheduler's fitness (lessons, teacher preferences and
+    teacher gaps). Schedules that break a hard constraint are marked invalid.
+    """
+    from .fast_solver import FastScheduler
+    
+    teacher_slots = {(t, d, p) for (t, c, r, d, p) in schedule}
+    class_slots = {(c, d, p) for (t, c, r, d, p) in schedule}
+    room_slots = {(r, d, p) for (t, c, r, d, p) in schedule}
+    conflicts = 3 * len(schedule) - len(teacher_slots) - len(class_slots) - len(room_slots)
+    conflicts += sum(1 for (t, c, r, d, p) in schedule if not problem.teacher_available[t, d, p])
+    
+    return {
+        "lessons": len(schedule),
+        "conflicts": conflicts,
+        "valid": conflicts == 0,
+        "score": float(FastScheduler(problem=problem).calculate_fitness(schedule))
+    }
+
+def _run_portfolio_engine(solver_type: SolverType, db_file: str, problem,
+                          options: Optional[Dict[str, Any]], results: "multiprocessing.Queue"):
+    """Portfolio engine process entry point: put the computed schedule, or the error, on a queue"""
+    try:
+        results.put(("result", _compute_schedule(solver_type, db_file, problem, options)))
+    except Exception as e:
+        results.put(("error", f"{solver_type.value}: {e}"))
+
+def _run_solver_job(solver_type, db_file: str, problem, options: Optional[Dict[str, Any]],
+                    events: "multiprocessing.Queue"):
+    """Worker process entry point: solve and report progress and the result on a queue"""
+    if hasattr(os, "setpgrp"):
+        # Lead a process group so stopping the job also kills any portfolio engines
+        os.setpgrp()
+    
+    def report_progress(progress: Dict[str, Any]):
+        events.put({"type": "progress", **progress})
+    
+    result = SolverFactory.solve(solver_type, db_file, problem,
+                                 progress_callback=report_progress, options=options)
+    events.put({"type": "result", "result": result})
+
+class SolverJob:
+    """Handle to a solver running in a worker process
+    
+    Poll the job regularly (e.g. from a Tk ``after()`` callback): ``poll``
+    returns new progress events and sets ``result`` once the solver has
+    finished, failed, been cancelled or run past its deadline.
+    """
+    
+    def __init__(self, solver_type: SolverType, db_file: str, problem=None,
+                 options: Dict[str, Any] = None, timeout: float = None):
+        """
+        Start the solver in a new process
+        
+        Args:
+            solver_type: Type of solver to use
+            db_file: Path to database file
+            problem: Optional pre-loaded ProblemInstance sent to the worker
+            options: Solver-specific options, as for ``SolverFactory.solve``
+            timeout: Hard deadline in seconds after which the worker is killed
+        """
+        self.solver_type = solver_type
+        self.timeout = timeout
+        self.result: Optional[SolverResult] = None
+        self.start_time = time.time()
+        self.deadline = self.start_time + timeout if timeout else None
+        
+        # Spawn rather than fork so the worker does not inherit Tk or solver threads.
+        # The worker is not daemonic so the portfolio solver can start its own
+        # process pool; it is killed at interpreter exit if still running.
+        context = multiprocessing.get_context("spawn")
+        self._events = context.Queue()
+        self._process = context.Process(target=_run_solver_job,
+                                        args=(solver_type, db_file, problem, options, self._events))
+        self._process.start()
+        atexit.register(self.cancel)
+    
+    @property
+    def elapsed(self) -> float:
+        """Seconds since the job was started"""
+        return time.time() - self.start_time
+    
+    def done(self) -> bool:
+        """True once a result is available"""
+        return self.result is not None
+    
+    def poll(self) -> List[Dict[str, Any]]:
+        """
+        Collect events from the worker without blocking
+        
+        Returns:
+            Progress events received since the last poll
+        """
+        events = []
+        if self.done():
+            return events
+        
+        while True:
+            try:
+                event = self._events.get_nowait()
+            except queue.Empty:
+                break
+            if event["type"] == "result":
+                self._process.join(timeout=1)
+                self._finish(event["result"])
+                return events
+            events.append(event)
+        
+        if not self._process.is_alive():
+            # The result may still be in flight when the worker has just exited
+            try:
+                event = self._events.get(timeout=0.5)
+                if event["type"] == "result":
+                    self._finish(event["result"])
+                    return events
+                events.append(event)
+            except queue.Empty:
+                pass
+            self._finish(SolverResult(False, 0, self.elapsed, self.solver_type.value,
+                                      f"Solver process exited with code {self._process.exitcode}"))
+        elif self.deadline is not None and time.time() > self.deadline:
+            self._stop(f"Timed out after {self.timeout:.0f} seconds")
+        
+        return events
+    
+    def cancel(self):
+        """Kill the worker; the job finishes with a cancelled result"""
+        if not self.done():
+            self._stop("Cancelled")
+    
+    def wait(self, on_progress: Callable[[Dict[str, Any]], None] = None,
+             interval: float = 0.05) -> SolverResult:
+        """Block until the job finishes, passing progress events to ``on_progress``"""
+        while not self.done():
+            for event in self.poll():
+                if on_progress:
+                    on_progress(event)
+            time.sleep(interval)
+        return self.result
+    
+    def _stop(self, reason: str):
+        self._process.terminate()
+        self._process.join(timeout=STOP_GRACE_PERIOD)
+        if self._process.is_alive():
+            # Native code such as a CP-SAT search can outlive SIGTERM
+            self._process.kill()
+            self._process.join()
+        if hasattr(os, "killpg"):
+            # Portfolio engines started by the worker share its process group
+            try:
+                os.killpg(self._process.pid, signal.SIGKILL)
+            except (ProcessLookupError, PermissionError):
+                pass
+        self._finish(SolverResult(False, 0, self.elapsed, self.solver_type.value, reason))
+    
+    def _finish(self, result: SolverResult):
+        self.result = result
+        atexit.unregister(self.cancel)
 
 class SolverFactory:
     """Factory class for creating and managing solvers"""
@@ -76,76 +307,244 @@ class SolverFactory:
                 "typical_time": "< 2s",
                 "quality": "Good", 
                 "best_for": "Compatibility"
+            },
+            SolverType.PORTFOLIO.value: {
+                "name": "🏁 Portfolio",
+                "description": "Runs several algorithms in parallel and keeps the best\n• Typical time: 1-30 seconds\n• Quality: Best of all\n• Best for: Multi-core machines",
+                "typical_time": "1-30s",
+                "quality": "Best of all",
+                "best_for": "Multi-core machines"
+            },
+            SolverType.REPAIR.value: {
+                "name": "🩹 Repair",
+                "description": "Re-places only the lessons broken by an edit\n• Typical time: < 0.1 seconds\n• Quality: Keeps the current timetable\n• Best for: Small changes during the year",
+                "typical_time": "< 0.1s",
+                "quality": "Keeps the current timetable",
+                "best_for": "Small changes during the year"
             }
         }
     
     @staticmethod
-    def solve(solver_type: SolverType, db_file: str = "data/database/school_timetable.db") -> SolverResult:
+    def solve(solver_type: SolverType, db_file: str = "data/database/school_timetable.db",
+              problem=None, progress_callback: Callable[[Dict[str, Any]], None] = None,
+              options: Dict[str, Any] = None) -> SolverResult:
         """
         Solve scheduling using the specified algorithm
         
         Args:
             solver_type: Type of solver to use
             db_file: Path to database file
+            problem: Pre-loaded ProblemInstance to share between runs;
+                loaded from ``db_file`` when omitted
+            progress_callback: Called with a dict (solution, objective, bound,
+                wall_time) for each improving solution of solvers that report
+                progress (currently OR-Tools)
+            options: Solver-specific options; OR-Tools accepts num_workers,
+                time_limit, relative_gap, random_seed, warm_start and fix_fraction;
+                repair accepts "teachers" and "classes" (database ids of the changed entities)
             
         Returns:
-            SolverResult with success status and metrics
+            SolverResult with success status, metrics and the per-phase profile
         """
         start_time = time.time()
+        details = None
+        profile = SolverProfile()
         
         try:
+            with profile.phase("load"):
+                previous_run = get_active_run(db_file)
+                if problem is None:
+                    from ..core.problem import load_problem
+                    problem = load_problem(db_file)
+            
             if solver_type == SolverType.ULTRA_FAST:
                 from .ultra_fast_solver import solve_ultra_fast
-                success = solve_ultra_fast("ultra_fast", db_file)
+                success = solve_ultra_fast("ultra_fast", db_file, problem, profile)
                 
             elif solver_type == SolverType.SMART_GREEDY:
                 from .ultra_fast_solver import solve_ultra_fast
-                success = solve_ultra_fast("smart_greedy", db_file)
+                success = solve_ultra_fast("smart_greedy", db_file, problem, profile)
                 
             elif solver_type == SolverType.ML_INSPIRED:
                 from .ml_solver import solve_with_ml_scheduler
-                success = solve_with_ml_scheduler(db_file)
+                success = solve_with_ml_scheduler(db_file, problem, profile)
                 
             elif solver_type == SolverType.FAST_GREEDY:
                 from .fast_solver import solve_with_fast_scheduler
-                success = solve_with_fast_scheduler("greedy", db_file)
+                success = solve_with_fast_scheduler("greedy", db_file, problem, profile)
                 
             elif solver_type == SolverType.ORTOOLS:
                 try:
                     from .ortools_solver import solve_school_scheduling_from_db
-                    solution = solve_school_scheduling_from_db(db_file)
+                    ortools_options = {"warm_start": "ultra_fast"}
+                    ortools_options.update(options or {})
+                    solution = solve_school_scheduling_from_db(db_file, problem, profile, callback=progress_callback,
+                                                               **ortools_options)
                     success = solution is not None
                 except ImportError:
                     return SolverResult(False, 0, 0, solver_type.value, 
                                       "OR-Tools not available. Please install: pip install ortools")
                     
+            elif solver_type == SolverType.PORTFOLIO:
+                details = SolverFactory.solve_portfolio(db_file, problem, options, profile)
+                success = details["winner"] is not None
+                if not success:
+                    return SolverResult(False, 0, time.time() - start_time, solver_type.value,
+                                        "No engine produced a valid schedule", details, profile=profile)
+                
             elif solver_type == SolverType.SIMPLE:
                 from .greedy_solver import solve_school_scheduling_from_db
-                solution = solve_school_scheduling_from_db(db_file)
+                solution = solve_school_scheduling_from_db(db_file, problem, profile)
                 success = solution is not None
                 
+            elif solver_type == SolverType.REPAIR:
+                from .repair_solver import repair_schedule
+                options = options or {}
+                details = repair_schedule(db_file, problem, teacher_ids=options.get("teachers"),
+                                          class_ids=options.get("classes"), profile=profile)
+                success = True
+                
             else:
                 return SolverResult(False, 0, 0, solver_type.value, f"Unknown solver type: {solver_type}")
             
             end_time = time.time()
             time_taken = end_time - start_time
             
-            # Count generated lessons
+            # Count generated lessons and record how the new run was made
             lessons_count = 0
+            run_id = None
             if success:
-                import sqlite3
-                conn = sqlite3.connect(db_file)
-                cursor = conn.cursor()
-                cursor.execute("SELECT COUNT(*) FROM schedules WHERE is_locked = 0")
-                lessons_count = cursor.fetchone()[0]
-                conn.close()
+                with profile.phase("verification"):
+                    conn = get_database_manager(db_file).connect()
+                    cursor = conn.cursor()
+                    cursor.execute("SELECT COUNT(*) FROM schedules WHERE run_id = (SELECT run_id FROM active_run WHERE id = 1)")
+                    lessons_count = cursor.fetchone()[0]
+                    conn.close()
+                    run_id = get_active_run(db_file)
+                if run_id is not None and run_id != previous_run:
+                    quality = {}
+                    if solver_type == SolverType.PORTFOLIO:
+                        quality = {key: value for key, value in details["engines"][details["winner"]].items()
+                                   if key in ("score", "valid")}
+                    options = options or {}
+                    update_run(db_file, run_id, params=options,
+                               seed=options.get("random_seed", options.get("seed")),
+                               timings={"solve": time_taken, **profile.to_dict()}, quality=quality)
             
-            return SolverResult(success, lessons_count, time_taken, solver_type.value)
+            print(profile.summary())
+            return SolverResult(success, lessons_count, time_taken, solver_type.value, details=details,
+                                run_id=run_id, profile=profile)
             
         except Exception as e:
             end_time = time.time()
             time_taken = end_time - start_time
-            return SolverResult(False, 0, time_taken, solver_type.value, str(e))
+            return SolverResult(False, 0, time_taken, solver_type.value, str(e), profile=profile)
+    
+    @staticmethod
+    def solve_portfolio(db_file: str, problem, options: Dict[str, Any] = None,
+                        profile: SolverProfile = None) -> Dict[str, Any]:
+        """
+        Race several engines in a process pool and save only the best schedule
+        
+        Args:
+            db_file: Path to database file
+            problem: Loaded ProblemInstance shared by all engines
+            options: "engines" (list of SolverType values), "include_ortools"
+                (bool), "time_limit" (wall-clock budget in seconds, default 30,
+                after which engines still running are killed)
+                and "ortools" (options passed to the OR-Tools engine)
+            profile: Receives the race as search time, the quality checks as
+                verification time and the summed counters of the engines
+            
+        Returns:
+            Dict with the winning engine (None if none succeeded) and per-engine
+            quality, including each engine's own profile
+        """
+        from .fast_solver import FastScheduler
+        
+        options = options or {}
+        time_limit = options.get("time_limit", 30.0)
+        engines = [SolverType(e) for e in options.get("engines", [e.value for e in PORTFOLIO_ENGINES])]
+        engine_options = {}
+        if options.get("include_ortools") and SolverType.ORTOOLS not in engines:
+            engines.append(SolverType.ORTOOLS)
+        if SolverType.ORTOOLS in engines:
+            # Leave a core for each heuristic engine and finish inside the budget
+            ortools_options = {"warm_start": "ultra_fast", "time_limit": max(1.0, time_limit - 2),
+                               "num_workers": max(1, (os.cpu_count() or 1) - len(engines) + 1)}
+            ortools_options.update(options.get("ortools", {}))
+            engine_options[SolverType.ORTOOLS] = ortools_options
+        
+        profile = profile if profile is not None else SolverProfile()
+        finished = []
+        deadline = time.time() + time_limit
+        context = multiprocessing.get_context("spawn")
+        with profile.phase("search"):
+            engine_results = context.Queue()
+            workers = [context.Process(target=_run_portfolio_engine, daemon=True,
+                                       args=(engine, db_file, problem, engine_options.get(engine), engine_results))
+                       for engine in engines]
+            for worker in workers:
+                worker.start()
+            try:
+                for _ in workers:
+                    try:
+                        kind, payload = engine_results.get(timeout=max(0, deadline - time.time()))
+                    except queue.Empty:
+                        break
+                    if kind == "result":
+                        finished.append(payload)
+                    else:
+                        print(f"Portfolio engine failed: {payload}")
+            finally:
+                # SIGKILL engines still running at the deadline; native searches ignore SIGTERM
+                for worker in workers:
+                    if worker.is_alive():
+                        worker.kill()
+                for worker in workers:
+                    worker.join()
+        
+        results = {}
+        with profile.phase("verification"):
+            for name, schedule, seconds, engine_profile in finished:
+                quality = schedule_quality(problem, schedule)
+                quality["time_taken"] = seconds
+                quality["profile"] = engine_profile.to_dict()
+                results[name] = (quality, schedule)
+                profile.add_counters({key: amount for key, amount in engine_profile.counters.items()
+                                      if key != "lessons_unplaced"})
+                print(f"Portfolio {name}: {quality['lessons']} lessons, score {quality['score']:.0f} in {seconds:.2f}s")
+        
+        valid = {name: result for name, result in results.items() if result[0]["valid"] and result[1]}
+        winner = max(valid, key=lambda name: valid[name][0]["score"]) if valid else None
+        if winner:
+            print(f"Portfolio winner: {winner}")
+            profile.count("lessons_unplaced", max(0, problem.total_demand - len(valid[winner][1])))
+            profile.add_persistence(FastScheduler(db_file, problem).save_schedule_to_db(valid[winner][1],
+                                                                                        f"portfolio:{winner}"))
+        
+        return {
+            "winner": winner,
+            "engines": {name: quality for name, (quality, _) in results.items()}
+        }
+    
+    @staticmethod
+    def submit(solver_type: SolverType, db_file: str = "data/database/school_timetable.db",
+               problem=None, options: Dict[str, Any] = None, timeout: float = None) -> SolverJob:
+        """
+        Start a solver in a worker process without blocking
+        
+        Args:
+            solver_type: Type of solver to use
+            db_file: Path to database file
+            problem: Optional pre-loaded ProblemInstance
+            options: Solver-specific options, as for ``solve``
+            timeout: Hard deadline in seconds; the worker is killed when it passes
+            
+        Returns:
+            SolverJob to poll for progress and the result, or to cancel
+        """
+        return SolverJob(solver_type, db_file, problem, options, timeout)
     
     @staticmethod
     def get_recommended_solver(num_classes: int = 20, num_teachers: int = 50) -> SolverType:
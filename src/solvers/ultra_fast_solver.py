@@ -3,125 +3,84 @@ Ultra-Fast Scheduling Engine
 Optimized for speed with multiple fast algorithms
 """
 
-import sqlite3
-import json
 import random
 import time
 from typing import Dict, List, Tuple
-from collections import defaultdict
+
+import numpy as np
+
+from ..core.problem import ProblemInstance, load_problem
+from ..database.schedule_writer import save_schedule
+from .occupancy import Occupancy
+from .profile import SolverProfile
 
 class UltraFastScheduler:
-    def __init__(self, db_file="school_timetable.db"):
+    def __init__(self, db_file="school_timetable.db", problem: ProblemInstance = None,
+                 profile: SolverProfile = None):
         self.db_file = db_file
+        self.problem = problem if problem is not None else load_problem(db_file)
+        self.profile = profile if profile is not None else SolverProfile()
         self.data = self.load_data_optimized()
         
         # Scheduling parameters
-        self.num_days = 5
-        self.num_periods = 8
+        self.num_days = self.problem.num_days
+        self.num_periods = self.problem.num_periods
+        self.time_scores = self.build_time_scores()
         
     def load_data_optimized(self):
-        """Load data with optimized structure for fast access"""
-        conn = sqlite3.connect(self.db_file)
-        cursor = conn.cursor()
+        """Derive optimized lookups for fast access from the compiled problem"""
+        problem = self.problem
         
         data = {
-            'teachers': {},
-            'teacher_unavailable': defaultdict(set),  # teacher_id -> {(day, period)}
-            'classes': {},
-            'subjects': {},
-            'rooms': {'lab': [], 'regular': []},
-            'lesson_requirements': [],
-            'teacher_preferences': defaultdict(dict),  # teacher_id -> {class_id: score}
-            'qualified_teachers': defaultdict(list)  # subject_id -> [teacher_ids]
+            'rooms': {'lab': problem.lab_rooms, 'regular': problem.regular_rooms},
+            'qualified_teachers': {}  # subject -> [teachers]
         }
         
-        # Load teachers
-        cursor.execute("SELECT id, name, availability_json FROM teachers")
-        for teacher_id, name, availability_json in cursor.fetchall():
-            data['teachers'][teacher_id] = name
-            if availability_json:
-                avail_data = json.loads(availability_json)
-                for day_str, periods in avail_data.items():
-                    day = int(day_str)
-                    for period in periods:
-                        data['teacher_unavailable'][teacher_id].add((day, period))
-        
-        # Load classes
-        cursor.execute("SELECT id, name, grade_level FROM classes")
-        for class_id, name, grade in cursor.fetchall():
-            data['classes'][class_id] = {'name': name, 'grade': grade}
-        
-        # Load subjects
-        cursor.execute("SELECT id, name, needs_lab FROM subjects")
-        for subject_id, name, needs_lab in cursor.fetchall():
-            data['subjects'][subject_id] = {'name': name, 'needs_lab': bool(needs_lab)}
-        
-        # Load rooms
-        cursor.execute("SELECT id, name, is_lab FROM rooms")
-        for room_id, name, is_lab in cursor.fetchall():
-            if is_lab:
-                data['rooms']['lab'].append(room_id)
-            else:
-                data['rooms']['regular'].append(room_id)
-        
-        # Load lesson requirements
-        cursor.execute("SELECT class_id, subject_id, lessons_per_week FROM lessons")
-        data['lesson_requirements'] = cursor.fetchall()
-        
-        # Load teacher preferences
-        cursor.execute("SELECT teacher_id, class_id, preference_score FROM teacher_preferences")
-        for teacher_id, class_id, score in cursor.fetchall():
-            data['teacher_preferences'][teacher_id][class_id] = score
+        # Build qualified teachers map (minimum acceptable preference of 3)
+        qualified = problem.qualified_teachers(min_score=3)
+        for s in range(problem.num_subjects):
+            teachers = np.flatnonzero(qualified[:, s]).tolist()
+            if teachers:
+                data['qualified_teachers'][s] = teachers
         
-        # Build qualified teachers map
-        for teacher_id in data['teachers']:
-            for class_id in data['classes']:
-                pref_score = data['teacher_preferences'][teacher_id].get(class_id, 3)
-                if pref_score >= 3:  # Minimum acceptable preference
-                    # Find subjects for this class
-                    for c_id, s_id, _ in data['lesson_requirements']:
-                        if c_id == class_id:
-                            if teacher_id not in data['qualified_teachers'][s_id]:
-                                data['qualified_teachers'][s_id].append(teacher_id)
-        
-        conn.close()
         return data
     
+    def build_time_scores(self) -> np.ndarray:
+        """
+        Time-based score terms of ``calculate_assignment_score`` as a (subjects, days, periods) array
+        
+        The subject category affinity of the problem (e.g. Math/Science in the
+        morning, PE/Arts in the afternoon) plus a lunch-time penalty.
+        """
+        time_scores = self.problem.time_affinity.copy()
+        # Avoid lunch time (period 4)
+        time_scores[:, :, np.arange(self.num_periods) == 4] -= 10
+        return time_scores
+    
     def is_available(self, teacher_id: int, class_id: int, room_id: int, 
-                    day: int, period: int, schedule: Dict) -> bool:
-        """Ultra-fast conflict checking"""
-        # Check teacher availability
-        if (day, period) in self.data['teacher_unavailable'][teacher_id]:
-            return False
-        
-        # Check for conflicts in current schedule
-        time_key = (day, period)
-        if time_key in schedule:
-            used_teachers, used_classes, used_rooms = schedule[time_key]
-            if teacher_id in used_teachers or class_id in used_classes or room_id in used_rooms:
-                return False
-        
-        return True
+                    day: int, period: int, occupancy: Occupancy) -> bool:
+        """Ultra-fast conflict checking (availability and resource conflicts)"""
+        return occupancy.is_free(teacher_id, class_id, room_id, day, period)
     
     def ultra_fast_greedy(self) -> Dict:
         """Ultra-fast greedy algorithm with optimized data structures"""
-        # Use a different schedule structure for speed
-        # schedule[time_key] = (set(teachers), set(classes), set(rooms))
-        schedule_usage = {}
+        # Bitset occupancy: one mask per teacher, class and room
+        occupancy = Occupancy.for_problem(self.problem)
         final_schedule = {}
         
         # Create prioritized lesson list
         lessons = []
-        for class_id, subject_id, lessons_per_week in self.data['lesson_requirements']:
-            priority = lessons_per_week * 10 + (6 - (class_id % 5))  # Prefer more lessons and higher grades
+        preferences = self.problem.preferences
+        all_teachers = list(range(self.problem.num_teachers))
+        for class_id, subject_id, lessons_per_week in self.problem.lesson_requirements:
+            db_class_id = int(self.problem.class_ids[class_id])
+            priority = lessons_per_week * 10 + (6 - (db_class_id % 5))  # Prefer more lessons and higher grades
             
             # Get best teachers for this combination
-            qualified = self.data['qualified_teachers'].get(subject_id, list(self.data['teachers'].keys()))
-            if not qualified:
-                qualified = list(self.data['teachers'].keys())
+            qualified = list(self.data['qualified_teachers'].get(subject_id, all_teachers))
             
             # Sort by preference
-            qualified.sort(key=lambda t: self.data['teacher_preferences'][t].get(class_id, 3), reverse=True)
+            qualified.sort(key=lambda t: preferences[t, class_id], reverse=True)
             
             for _ in range(lessons_per_week):
                 lessons.append((priority, class_id, subject_id, qualified))
@@ -130,11 +89,12 @@ class UltraFastScheduler:
         lessons.sort(reverse=True)
         
         # Schedule greedily
+        candidates = checks = unplaced = 0
         for priority, class_id, subject_id, qualified_teachers in lessons:
             scheduled = False
             
             # Get appropriate rooms
-            needs_lab = self.data['subjects'][subject_id]['needs_lab']
+            needs_lab = self.problem.subject_needs_lab[subject_id]
             preferred_rooms = self.data['rooms']['lab'] if needs_lab else self.data['rooms']['regular']
             if not preferred_rooms:
                 preferred_rooms = self.data['rooms']['lab'] + self.data['rooms']['regular']
@@ -144,64 +104,51 @@ class UltraFastScheduler:
                 if scheduled:
                     break
                 
+                # Slots where both teacher and class are free (morning first)
+                checks += 1
+                teacher_class_free = occupancy.free_slots(teacher_id, class_id)
+                if not teacher_class_free:
+                    continue
+                
                 # Try preferred rooms first
                 for room_id in preferred_rooms:
-                    if scheduled:
-                        break
-                    
-                    # Try time slots (morning first for better quality)
-                    time_slots = [(d, p) for d in range(self.num_days) for p in range(self.num_periods)]
+                    candidates += 1
+                    checks += 1
+                    slot = occupancy.first_slot(teacher_class_free & ~occupancy.room_busy[room_id])
+                    if slot is None:
+                        continue
                     
-                    for day, period in time_slots:
-                        time_key = (day, period)
-                        
-                        # Fast availability check
-                        if (day, period) in self.data['teacher_unavailable'][teacher_id]:
-                            continue
-                        
-                        # Check conflicts
-                        if time_key in schedule_usage:
-                            teachers, classes, rooms = schedule_usage[time_key]
-                            if teacher_id in teachers or class_id in classes or room_id in rooms:
-                                continue
-                        else:
-                            schedule_usage[time_key] = (set(), set(), set())
-                        
-                        # Make assignment
-                        schedule_usage[time_key][0].add(teacher_id)
-                        schedule_usage[time_key][1].add(class_id)
-                        schedule_usage[time_key][2].add(room_id)
-                        
-                        final_schedule[(teacher_id, class_id, room_id, day, period)] = (subject_id, 1)
-                        scheduled = True
-                        break
+                    # Make assignment
+                    day, period = slot
+                    occupancy.place(teacher_id, class_id, room_id, day, period)
+                    final_schedule[(teacher_id, class_id, room_id, day, period)] = (subject_id, 1)
+                    scheduled = True
+                    break
+            unplaced += not scheduled
         
+        self.profile.count('candidates_evaluated', candidates)
+        self.profile.count('conflict_checks', checks)
+        self.profile.count('lessons_unplaced', unplaced)
         return final_schedule
     
     def smart_greedy(self) -> Dict:
         """Smart greedy with heuristics for better quality"""
         schedule = {}
         
-        # Track usage per time slot
-        time_usage = defaultdict(lambda: {'teachers': set(), 'classes': set(), 'rooms': set()})
+        # Track usage per resource as bitmasks
+        occupancy = Occupancy.for_problem(self.problem)
         
         # Create weighted lesson list
         weighted_lessons = []
-        for class_id, subject_id, lessons_per_week in self.data['lesson_requirements']:
+        for class_id, subject_id, lessons_per_week in self.problem.lesson_requirements:
             # Calculate base priority
             base_priority = lessons_per_week * 100
             
-            # Subject-specific bonuses
-            subject_name = self.data['subjects'][subject_id]['name'].lower()
-            if any(word in subject_name for word in ['math', 'algebra', 'geometry', 'calculus']):
-                base_priority += 50  # Math gets priority
-            elif any(word in subject_name for word in ['physics', 'chemistry', 'biology']):
-                base_priority += 40  # Science gets priority
-            elif 'english' in subject_name or 'literature' in subject_name:
-                base_priority += 30  # Language gets priority
+            # Subject category bonus (math, then science, then languages by default)
+            base_priority += int(self.problem.subject_priority[subject_id])
             
             # Grade level bonus (higher grades get slight priority)
-            grade = self.data['classes'][class_id]['grade']
+            grade = int(self.problem.class_grades[class_id])
             base_priority += grade * 2
             
             for lesson_num in range(lessons_per_week):
@@ -216,98 +163,100 @@ class UltraFastScheduler:
         weighted_lessons.sort(key=lambda x: x['priority'], reverse=True)
         
         # Schedule each lesson
+        preferences = self.problem.preferences
+        all_teachers = list(range(self.problem.num_teachers))
+        candidates = unplaced = 0
         for lesson in weighted_lessons:
             class_id = lesson['class_id']
             subject_id = lesson['subject_id']
             
             # Get qualified teachers
-            qualified_teachers = self.data['qualified_teachers'].get(subject_id, list(self.data['teachers'].keys()))
-            if not qualified_teachers:
-                qualified_teachers = list(self.data['teachers'].keys())
+            qualified_teachers = list(self.data['qualified_teachers'].get(subject_id, all_teachers))
             
             # Sort by preference for this class
             qualified_teachers.sort(
-                key=lambda t: self.data['teacher_preferences'][t].get(class_id, 3), 
+                key=lambda t: preferences[t, class_id], 
                 reverse=True
             )
             
             # Get appropriate rooms
-            needs_lab = self.data['subjects'][subject_id]['needs_lab']
+            needs_lab = self.problem.subject_needs_lab[subject_id]
             room_candidates = self.data['rooms']['lab'] if needs_lab else self.data['rooms']['regular']
             if not room_candidates:
                 room_candidates = self.data['rooms']['lab'] + self.data['rooms']['regular']
             
+            # Score top 5 teachers x top 3 rooms x all slots in one batch;
+            # only conflict-free, available slots are eligible
+            teachers = qualified_teachers[:5]
+            rooms = room_candidates[:3]
             best_assignment = None
-            best_score = -1
-            
-            # Try assignments and score them
-            for teacher_id in qualified_teachers[:5]:  # Top 5 teachers
-                for room_id in room_candidates[:3]:  # Top 3 rooms
-                    for day in range(self.num_days):
-                        for period in range(self.num_periods):
-                            # Check availability
-                            if (day, period) in self.data['teacher_unavailable'][teacher_id]:
-                                continue
-                            
-                            # Check conflicts
-                            usage = time_usage[(day, period)]
-                            if (teacher_id in usage['teachers'] or 
-                                class_id in usage['classes'] or 
-                                room_id in usage['rooms']):
-                                continue
-                            
-                            # Calculate score for this assignment
-                            score = self.calculate_assignment_score(
-                                teacher_id, class_id, subject_id, day, period, schedule)
-                            
-                            if score > best_score:
-                                best_score = score
-                                best_assignment = (teacher_id, class_id, room_id, day, period)
+            if teachers and rooms:
+                scores = self.score_candidates(teachers, class_id, subject_id, rooms, occupancy)
+                candidates += scores.size
+                best = np.unravel_index(np.argmax(scores), scores.shape)
+                if scores[best] > -1:
+                    t, r, day, period = best
+                    best_assignment = (teachers[t], class_id, rooms[r], int(day), int(period))
             
             # Make the best assignment
             if best_assignment:
                 teacher_id, class_id, room_id, day, period = best_assignment
                 
                 # Update usage tracking
-                usage = time_usage[(day, period)]
-                usage['teachers'].add(teacher_id)
-                usage['classes'].add(class_id)
-                usage['rooms'].add(room_id)
+                occupancy.place(teacher_id, class_id, room_id, day, period)
                 
                 # Add to schedule
                 schedule[best_assignment] = (subject_id, 1)
+            else:
+                unplaced += 1
         
+        # Every scored cell is also tested for clashes
+        self.profile.count('candidates_evaluated', candidates)
+        self.profile.count('conflict_checks', candidates)
+        self.profile.count('lessons_unplaced', unplaced)
         return schedule
     
+    def score_candidates(self, teachers: List[int], class_id: int, subject_id: int, 
+                         rooms: List[int], occupancy: Occupancy) -> np.ndarray:
+        """
+        Score every (teacher, room, day, period) candidate of a lesson at once
+        
+        Equivalent to ``calculate_assignment_score`` over all candidates, with
+        busy or unavailable slots set to -inf.
+        
+        Returns:
+            Array of shape (len(teachers), len(rooms), days, periods)
+        """
+        teacher_busy = np.array([occupancy.slots_array(occupancy.teacher_busy[t]) for t in teachers])
+        teacher_blocked = np.array([occupancy.slots_array(occupancy.teacher_blocked[t]) for t in teachers])
+        room_busy = np.array([occupancy.slots_array(occupancy.room_busy[r]) for r in rooms])
+        class_busy = occupancy.slots_array(occupancy.class_busy[class_id])
+        
+        # Compact schedule bonus: adjacent pairs among the teacher's periods
+        # that day once this lesson is added (only if the teacher already teaches)
+        adjacent = (teacher_busy[..., 1:] & teacher_busy[..., :-1]).sum(axis=-1, keepdims=True)
+        neighbours = np.zeros(teacher_busy.shape, dtype=np.int64)
+        neighbours[..., 1:] += teacher_busy[..., :-1]
+        neighbours[..., :-1] += teacher_busy[..., 1:]
+        compact = np.where(teacher_busy.any(axis=-1, keepdims=True), adjacent + neighbours, 0) * 5
+        
+        preferences = self.problem.preferences[teachers, class_id] * 10
+        teacher_scores = preferences[:, None, None] + self.time_scores[subject_id] + compact
+        
+        free = ~(teacher_busy | teacher_blocked | class_busy)[:, None] & ~room_busy[None, :]
+        return np.where(free, teacher_scores[:, None], -np.inf)
+    
     def calculate_assignment_score(self, teacher_id: int, class_id: int, subject_id: int, 
                                  day: int, period: int, current_schedule: Dict) -> float:
         """Calculate score for assignment quality"""
         score = 0
         
         # Teacher preference bonus
-        pref = self.data['teacher_preferences'][teacher_id].get(class_id, 3)
+        pref = self.problem.preferences[teacher_id, class_id]
         score += pref * 10
         
-        # Time-based bonuses
-        subject_name = self.data['subjects'][subject_id]['name'].lower()
-        
-        # Math/Science morning bonus
-        if any(word in subject_name for word in ['math', 'algebra', 'geometry', 'calculus', 'physics', 'chemistry']):
-            if period < 4:  # Morning
-                score += 20
-            else:
-                score -= 5
-        
-        # PE/Arts afternoon bonus
-        if any(word in subject_name for word in ['physical', 'art', 'music', 'drama']):
-            if period >= 4:  # Afternoon
-                score += 15
-            else:
-                score -= 5
-        
-        # Avoid lunch time (period 4)
-        if period == 4:
-            score -= 10
+        # Subject time affinity and lunch-time penalty
+        score += self.time_scores[subject_id, day, period]
         
         # Compact schedule bonus (less gaps)
         teacher_day_periods = []
@@ -325,38 +274,41 @@ class UltraFastScheduler:
         
         return score
     
-    def save_schedule_to_db(self, schedule: Dict):
-        """Save schedule to database"""
-        conn = sqlite3.connect(self.db_file)
-        cursor = conn.cursor()
-        
-        # Clear existing non-locked schedules
-        cursor.execute("DELETE FROM schedules WHERE is_locked = 0")
-        
-        # Insert new schedule
-        for (teacher_id, class_id, room_id, day, period), (subject_id, _) in schedule.items():
-            cursor.execute("""
-                INSERT INTO schedules (class_id, teacher_id, subject_id, room_id, day_of_week, timeslot, is_locked)
-                VALUES (?, ?, ?, ?, ?, ?, 0)
-            """, (class_id, teacher_id, subject_id, room_id, day, period))
-        
-        conn.commit()
-        conn.close()
+    def save_schedule_to_db(self, schedule: Dict, solver: str = "ultra_fast") -> Dict[str, float]:
+        """Save schedule to database as a new, active schedule run"""
+        timings = save_schedule(self.db_file, self.problem, schedule, solver)
+        return timings
+
 
-def solve_ultra_fast(method="ultra_fast", db_file="school_timetable.db"):
-    """Solve with ultra-fast algorithms"""
-    scheduler = UltraFastScheduler(db_file)
+def solve_ultra_fast(method="ultra_fast", db_file="school_timetable.db", problem: ProblemInstance = None,
+                     profile: SolverProfile = None):
+    """
+    Solve with ultra-fast algorithms
+    
+    Args:
+        method: "ultra_fast" or "smart_greedy"
+        db_file: Database file path
+        problem: Pre-loaded problem; loaded from ``db_file`` when omitted
+        profile: Receives the phase timings and counters of the run
+    """
+    profile = profile if profile is not None else SolverProfile()
+    if problem is None:
+        with profile.phase('load'):
+            problem = load_problem(db_file)
+    with profile.phase('preprocessing'):
+        scheduler = UltraFastScheduler(db_file, problem, profile)
     
     start_time = time.time()
     
-    if method == "ultra_fast":
-        print("Running ultra-fast greedy algorithm...")
-        schedule = scheduler.ultra_fast_greedy()
-    elif method == "smart_greedy":
-        print("Running smart greedy algorithm...")
-        schedule = scheduler.smart_greedy()
-    else:
-        raise ValueError(f"Unknown method: {method}")
+    with profile.phase('search'):
+        if method == "ultra_fast":
+            print("Running ultra-fast greedy algorithm...")
+            schedule = scheduler.ultra_fast_greedy()
+        elif method == "smart_greedy":
+            print("Running smart greedy algorithm...")
+            schedule = scheduler.smart_greedy()
+        else:
+            raise ValueError(f"Unknown method: {method}")
     
     end_time = time.time()
     
@@ -364,7 +316,7 @@ def solve_ultra_fast(method="ultra_fast", db_file="school_timetable.db"):
     print(f"Generated {len(schedule)} lessons")
     
     if schedule:
-        scheduler.save_schedule_to_db(schedule)
+        profile.add_persistence(scheduler.save_schedule_to_db(schedule, method))
         return True
     else:
         print("No schedule generated")
@@ -1,5 +1,7 @@
 """Utility Functions Package"""
 
-from .export import ExportManager
+from .export import export_schedule_to_pdf
+from .excel_export import export_schedule_to_excel
+from .pdf_export import export_timetables_to_pdf
 
-__all__ = ['ExportManager']
\ No newline at end of file
+__all__ = ['export_schedule_to_pdf', 'export_schedule_to_excel', 'export_timetables_to_pdf']
\ No newline at end of file
@@ -0,0 +1,238 @@
+"""
+Solver Benchmark - Reproducible timings for every scheduling engine
+
+Generates synthetic schools for a matrix of dataset sizes and seeds, runs
+each ``SolverType`` through ``SolverFactory.solve`` on every one of them and
+records the wall time, peak memory, lessons placed against the weekly
+demand (``SUM(lessons_per_week)``) and the schedule quality. Each run starts
+from an empty run history in a fresh worker process, so engines do not see
+each other's lessons and the memory peak belongs to a single engine.
+
+The results are written to a JSON file and can be compared with a stored
+baseline; a run that is slower than the tolerance allows, places fewer
+lessons, has more conflicts or fails where the baseline succeeded is a
+regression.
+
+Usage:
+    python -m src.utils.benchmark results.json --sizes sample double --seeds 0 1
+    python -m src.utils.benchmark results.json --baseline tests/benchmarks/baseline.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# generate_school arguments of each dataset size; "sample" matches add_sample_data
+DATASET_SIZES: Dict[str, Dict[str, int]] = {
+    'sample': {'grades': 5, 'classes_per_grade': 4, 'teachers': 50, 'rooms': 45},
+    'double': {'grades': 5, 'classes_per_grade': 8, 'teachers': 100, 'rooms': 90},
+    'large': {'grades': 5, 'classes_per_grade': 20, 'teachers': 250, 'rooms': 225},
+}
+
+# Engines benchmarked by default; repair needs an existing timetable to start from
+DEFAULT_SOLVERS = ('ultra_fast', 'smart_greedy', 'ml_inspired', 'fast_greedy', 'ortools', 'simple', 'portfolio')
+
+# Keep the search engines inside a fixed budget so runs are comparable
+DEFAULT_OPTIONS: Dict[str, Dict[str, Any]] = {
+    'ortools': {'time_limit': 10.0, 'random_seed': 0},
+    'portfolio': {'time_limit': 10.0},
+}
+
+BASELINE_FILE = os.path.join('tests', 'benchmarks', 'baseline.json')
+
+def _run_engine(solver: str, db_file: str, options: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Worker process entry point: solve once and measure it
+
+    Returns:
+        Dict with success, error, lessons, wall time, memory peaks, quality and the solver profile
+    """
+    from ..core.problem import load_problem
+    from ..database.schedule_runs import clear_runs
+    from ..solvers.solver_factory import SolverFactory, SolverType, schedule_quality
+
+    clear_runs(db_file)
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = SolverFactory.solve(SolverType(solver), db_file, options=options)
+    wall_time = time.perf_counter() - start
+    peak_traced = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    measurement = {
+        'success': result.success,
+        'error': result.error,
+        'lessons': result.lessons_count,
+        'wall_time': round(wall_time, 4),
+        'solver_time': round(result.time_taken, 4),
+        'peak_traced_mb': round(peak_traced / 2 ** 20, 2),
+        'peak_rss_mb': None,
+        'conflicts': None,
+        'score': None,
+        'profile': result.profile.to_dict(),
+    }
+    if resource is not None:
+        # ru_maxrss is in kilobytes on Linux and bytes on macOS
+        scale = 2 ** 20 if sys.platform == 'darwin' else 2 ** 10
+        measurement['peak_rss_mb'] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale, 2)
+
+    if result.success:
+        problem = load_problem(db_file)
+        schedule = {(t, c, r, d, p): (s, 1) for c, t, s, r, d, p, locked in problem.existing_lessons}
+        quality = schedule_quality(problem, schedule)
+        measurement['conflicts'] = quality['conflicts']
+        measurement['score'] = round(quality['score'], 2)
+    return measurement
+
+def run_benchmarks(sizes: Iterable[str] = ('sample', 'double'), seeds: Iterable[int] = (0, 1),
+                   solvers: Iterable[str] = DEFAULT_SOLVERS,
+                   options: Optional[Dict[str, Dict[str, Any]]] = None,
+                   work_dir: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Run every solver on every dataset of the size x seed matrix
+
+    Args:
+        sizes: Names from ``DATASET_SIZES``
+        seeds: Seeds passed to the data generator
+        solvers: ``SolverType`` values to run
+        options: Solver options by solver value; defaults to ``DEFAULT_OPTIONS``
+        work_dir: Directory for the generated databases; a temporary one when omitted
+
+    Returns:
+        Dict with the environment and one result dict per (size, seed, solver)
+    """
+    from ..database.data_generator import create_school_database
+
+    options = DEFAULT_OPTIONS if options is None else options
+    context = multiprocessing.get_context('spawn')
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for size in sizes:
+            for seed in seeds:
+                db_file = os.path.join(work_dir or tmp_dir, f"benchmark_{size}_{seed}.db")
+                school = create_school_database(db_file, seed=seed, **DATASET_SIZES[size])
+                for solver in solvers:
+                    print(f"Benchmarking {solver} on {size} (seed {seed})...")
+                    # A fresh process per run keeps memory peaks and imports independent
+                    with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                        measurement = pool.submit(_run_engine, solver, db_file, options.get(solver)).result()
+                    demand = school['weekly_lessons']
+                    results.append({
+                        'solver': solver,
+                        'size': size,
+                        'seed': seed,
+                        'teachers': school['teachers'],
+                        'classes': school['classes'],
+                        'demand': demand,
+                        **measurement,
+                        'coverage': round(measurement['lessons'] / demand, 4) if demand else 0.0,
+                    })
+                    print(f"  {measurement['lessons']}/{demand} lessons in {measurement['wall_time']:.2f} seconds")
+
+    return {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+        },
+        'options': options,
+        'results': results,
+    }
+
+def compare_results(results: Dict[str, Any], baseline: Dict[str, Any], time_tolerance: float = 1.5,
+                    time_slack: float = 0.1, coverage_tolerance: float = 0.01) -> List[str]:
+    """
+    Find regressions against a baseline
+
+    Runs are matched on (solver, size, seed); runs missing from either side
+    are ignored.
+
+    Args:
+        results: Output of ``run_benchmarks``
+        baseline: Earlier output of ``run_benchmarks``
+        time_tolerance: Allowed wall time as a multiple of the baseline
+        time_slack: Seconds always allowed on top, so tiny timings do not flap
+        coverage_tolerance: Allowed drop in the share of the demand placed
+
+    Returns:
+        One message per regression, empty when there is none
+    """
+    def key(run):
+        return run['solver'], run['size'], run['seed']
+
+    previous = {key(run): run for run in baseline.get('results', [])}
+    regressions = []
+    for run in results.get('results', []):
+        old = previous.get(key(run))
+        if old is None:
+            continue
+        name = "{} on {} (seed {})".format(*key(run))
+        if old['success'] and not run['success']:
+            regressions.append(f"{name} failed: {run['error']}")
+            continue
+        if run['wall_time'] > old['wall_time'] * time_tolerance + time_slack:
+            regressions.append(f"{name} took {run['wall_time']:.2f}s, baseline {old['wall_time']:.2f}s")
+        if run['coverage'] < old['coverage'] - coverage_tolerance:
+            regressions.append(f"{name} placed {run['coverage']:.1%} of the demand, baseline {old['coverage']:.1%}")
+        if (run['conflicts'] or 0) > (old['conflicts'] or 0):
+            regressions.append(f"{name} has {run['conflicts']} conflicts, baseline {old['conflicts']}")
+    return regressions
+
+def print_results(results: Dict[str, Any]):
+    """Print the results as a table"""
+    print(f"{'solver':<14}{'size':<8}{'seed':>5}{'lessons':>14}{'coverage':>10}"
+          f"{'time (s)':>10}{'RSS (MB)':>10}{'conflicts':>11}{'score':>10}")
+    for run in results['results']:
+        lessons = f"{run['lessons']}/{run['demand']}"
+        rss = '-' if run['peak_rss_mb'] is None else f"{run['peak_rss_mb']:.0f}"
+        conflicts = '-' if run['conflicts'] is None else run['conflicts']
+        score = '-' if run['score'] is None else f"{run['score']:.0f}"
+        print(f"{run['solver']:<14}{run['size']:<8}{run['seed']:>5}{lessons:>14}{run['coverage']:>10.1%}"
+              f"{run['wall_time']:>10.2f}{rss:>10}{conflicts:>11}{score:>10}")
+
+def main(argv=None):
+    """Command line entry point; exits with status 1 when a regression is found"""
+    parser = argparse.ArgumentParser(description="Benchmark the scheduling engines on generated schools")
+    parser.add_argument("output", help="JSON file to write the results to")
+    parser.add_argument("--sizes", nargs="+", default=['sample', 'double'], choices=sorted(DATASET_SIZES))
+    parser.add_argument("--seeds", nargs="+", type=int, default=[0, 1])
+    parser.add_argument("--solvers", nargs="+", default=list(DEFAULT_SOLVERS))
+    parser.add_argument("--baseline", help="Baseline results to compare with, e.g. " + BASELINE_FILE)
+    parser.add_argument("--time-tolerance", type=float, default=1.5,
+                        help="Allowed wall time as a multiple of the baseline")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.sizes, args.seeds, args.solvers)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print_results(results)
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_results(results, baseline, time_tolerance=args.time_tolerance)
+        for message in regressions:
+            print(f"REGRESSION: {message}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions against {args.baseline}")
+    return results
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+"""
+PDF Export - Every class, teacher and room timetable in one pass
+
+Timetables come from one ordered query (see ``timetables.iter_timetables``)
+and are rendered with ReportLab either into a single document, one page per
+timetable, or into one file per class, teacher and room. Separate files are
+rendered in chunks by a pool of worker processes, so printing hundreds of
+timetables at term start takes seconds instead of one manual export each.
+
+Usage:
+    python -m src.utils.pdf_export data/database/school_timetable.db timetables.pdf
+    python -m src.utils.pdf_export data/database/school_timetable.db timetables/ --separate
+"""
+
+import argparse
+import multiprocessing
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+from xml.sax.saxutils import escape
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import landscape, letter
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import PageBreak, Paragraph, SimpleDocTemplate, Table, TableStyle
+
+from .timetables import DAYS, KINDS, TIMES, iter_timetables
+
+KIND_LABELS = {'class': 'Class', 'teacher': 'Teacher', 'room': 'Room'}
+
+# Same look as export_schedule_to_pdf
+TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),  # Header row
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTNAME', (0, 1), (0, -1), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 1), (-1, -1), 8),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+])
+
+# (kind, name, cells) as yielded by iter_timetables
+Timetable = Tuple[str, str, List[List[str]]]
+
+def timetable_flowables(timetable: Timetable, days: Sequence[str], times: Sequence[str],
+                        corner: str, labels: Dict[str, str]) -> list:
+    """Heading and table of one timetable"""
+    kind, name, cells = timetable
+    heading = Paragraph(escape(f"{labels.get(kind, kind.title())}: {name}"), getSampleStyleSheet()['Heading2'])
+    table = Table([[corner, *days]] + [[times[period], *row] for period, row in enumerate(cells)],
+                  repeatRows=1)
+    table.setStyle(TABLE_STYLE)
+    return [heading, table]
+
+def render_document(filename: str, timetables: Sequence[Timetable], days: Sequence[str],
+                    times: Sequence[str], corner: str, labels: Dict[str, str]) -> int:
+    """Render timetables into one PDF, one page each; returns the number rendered"""
+    doc = SimpleDocTemplate(filename, pagesize=landscape(letter), title=os.path.basename(filename))
+    elements = []
+    for timetable in timetables:
+        if elements:
+            elements.append(PageBreak())
+        elements.extend(timetable_flowables(timetable, days, times, corner, labels))
+    doc.build(elements)
+    return len(timetables)
+
+def _render_files(jobs: List[Tuple[str, Timetable]], days: Sequence[str], times: Sequence[str],
+                  corner: str, labels: Dict[str, str]) -> int:
+    """Worker process entry point: render a chunk of (filename, timetable) jobs"""
+    for filename, timetable in jobs:
+        render_document(filename, [timetable], days, times, corner, labels)
+    return len(jobs)
+
+def entity_filename(kind: str, name: str) -> str:
+    """File name of a single timetable, e.g. class_Grade_9A.pdf"""
+    return f"{kind}_{re.sub(r'[^A-Za-z0-9._-]+', '_', name).strip('_') or 'unnamed'}.pdf"
+
+def export_timetables_to_pdf(db_file: str, output: str, separate: bool = False,
+                             kinds: Sequence[str] = KINDS, days: Sequence[str] = DAYS,
+                             times: Sequence[str] = TIMES, corner: str = "Time Slot",
+                             labels: Optional[Dict[str, str]] = None, workers: Optional[int] = None,
+                             chunk_size: int = 25) -> Dict[str, float]:
+    """
+    Export the timetable of every class, teacher and room
+
+    Args:
+        db_file: Path to database file
+        output: PDF file to write, or the directory for separate files
+        separate: Write one file per timetable instead of a single document
+        kinds: Entity kinds to export, in page order
+        days: Day column headers
+        times: Period row headers
+        corner: Text of the top-left header cell
+        labels: Heading prefix per kind, e.g. {'class': 'Class'}
+        workers: Processes rendering separate files; defaults to the CPU count
+        chunk_size: Timetables per worker task
+
+    Returns:
+        Number of timetables per kind, files written and the seconds taken
+    """
+    start = time.perf_counter()
+    labels = KIND_LABELS if labels is None else labels
+    timetables = list(iter_timetables(db_file, kinds, len(days), len(times)))
+    counts: Dict[str, float] = dict.fromkeys(kinds, 0)
+    for kind, _, _ in timetables:
+        counts[kind] += 1
+
+    if not separate:
+        render_document(output, timetables, days, times, corner, labels)
+        counts['files'] = 1
+    else:
+        os.makedirs(output, exist_ok=True)
+        jobs, used = [], set()
+        for kind, name, cells in timetables:
+            filename = entity_filename(kind, name)
+            # Names that only differ in punctuation would overwrite each other
+            stem, number = filename[:-4], 1
+            while filename.lower() in used:
+                number += 1
+                filename = f"{stem}_{number}.pdf"
+            used.add(filename.lower())
+            jobs.append((os.path.join(output, filename), (kind, name, cells)))
+        chunks = [jobs[i:i + chunk_size] for i in range(0, len(jobs), chunk_size)]
+        workers = min(workers or os.cpu_count() or 1, len(chunks))
+        if workers <= 1:
+            for chunk in chunks:
+                _render_files(chunk, days, times, corner, labels)
+        else:
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+                futures = [pool.submit(_render_files, chunk, days, times, corner, labels) for chunk in chunks]
+                for future in futures:
+                    future.result()
+        counts['files'] = len(jobs)
+
+    counts['seconds'] = time.perf_counter() - start
+    print(f"PDF exported to {output} ({len(timetables)} timetables in {counts['seconds']:.2f} seconds)")
+    return counts
+
+def main(argv=None):
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Export every class, teacher and room timetable to PDF")
+    parser.add_argument("db_file", help="Database file to read")
+    parser.add_argument("output", help="PDF file, or a directory with --separate")
+    parser.add_argument("--separate", action="store_true", help="Write one file per timetable")
+    parser.add_argument("--kinds", nargs="+", default=list(KINDS), choices=KINDS)
+    parser.add_argument("--workers", type=int, help="Processes rendering separate files")
+    args = parser.parse_args(argv)
+
+    return export_timetables_to_pdf(args.db_file, args.output, separate=args.separate,
+                                    kinds=args.kinds, workers=args.workers)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Timetables - Per-entity timetable grids from a single query
+
+Reads the active schedule once, ordered by entity and slot, and yields the
+day x period grid of every class, teacher and room in turn. Only one grid
+is held in memory at a time, so exporters can stream any number of
+timetables; classes, teachers and rooms without lessons still get an empty
+grid.
+"""
+
+from typing import Iterator, List, Sequence, Tuple
+
+from ..database.database_manager import get_database_manager
+
+# Entities a timetable can be drawn for, in output order
+KINDS = ('class', 'teacher', 'room')
+
+DAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
+TIMES = ["08:00-09:00", "09:00-10:00", "10:00-11:00", "11:00-12:00",
+         "12:00-13:00", "13:00-14:00", "14:00-15:00", "15:00-16:00"]
+
+# (table, schedules column) of each kind
+KIND_SOURCES = {
+    'class': ('classes', 'class_id'),
+    'teacher': ('teachers', 'teacher_id'),
+    'room': ('rooms', 'room_id'),
+}
+
+# Lines shown in a cell besides the subject, by kind
+CELL_FIELDS = {
+    'class': ('teacher', 'room'),
+    'teacher': ('class', 'room'),
+    'room': ('class', 'teacher'),
+}
+
+def timetable_query(kinds: Sequence[str]) -> str:
+    """One UNION ALL query listing every entity of ``kinds`` with its lessons, in output order"""
+    branches = []
+    for position, kind in enumerate(kinds):
+        table, column = KIND_SOURCES[kind]
+        branches.append(f"""
+            SELECT {position} AS kind, e.id AS entity_id, e.name AS entity,
+                   s.day_of_week, s.timeslot, s.id AS lesson_id,
+                   sub.name AS subject, c.name AS class, t.name AS teacher, r.name AS room
+            FROM {table} e
+            LEFT JOIN active_schedules s ON s.{column} = e.id
+            LEFT JOIN subjects sub ON sub.id = s.subject_id
+            LEFT JOIN classes c ON c.id = s.class_id
+            LEFT JOIN teachers t ON t.id = s.teacher_id
+            LEFT JOIN rooms r ON r.id = s.room_id""")
+    return " UNION ALL ".join(branches) + " ORDER BY kind, entity, entity_id, timeslot, day_of_week, lesson_id"
+
+def iter_timetables(db_file: str, kinds: Sequence[str] = KINDS, num_days: int = len(DAYS),
+                    num_periods: int = len(TIMES)) -> Iterator[Tuple[str, str, List[List[str]]]]:
+    """
+    Timetable grids of every class, teacher and room
+
+    Args:
+        db_file: Path to database file
+        kinds: Entity kinds to include, in output order
+        num_days: Days per week; later lessons are skipped
+        num_periods: Periods per day; later lessons are skipped
+
+    Yields:
+        (kind, name, cells) with ``cells[period][day]`` the text of that slot
+        (subject and the other two entities, one per line; '' when free)
+    """
+    conn = get_database_manager(db_file).connect()
+    try:
+        cursor = conn.execute(timetable_query(kinds))
+        current, current_name, cells = None, None, None
+        for kind_position, entity_id, entity, day, period, _, subject, class_name, teacher, room in cursor:
+            if (kind_position, entity_id) != current:
+                if current is not None:
+                    yield kinds[current[0]], current_name, cells
+                current, current_name = (kind_position, entity_id), entity
+                cells = [[''] * num_days for _ in range(num_periods)]
+            if day is None or not (0 <= day < num_days and 0 <= period < num_periods):
+                continue
+            names = {'class': class_name, 'teacher': teacher, 'room': room}
+            text = '\n'.join([subject or ''] + [names[field] or '' for field in CELL_FIELDS[kinds[kind_position]]])
+            # Clashing lessons share the cell
+            cells[period][day] = f"{cells[period][day]}\n\n{text}" if cells[period][day] else text
+        if current is not None:
+            yield kinds[current[0]], current_name, cells
+    finally:
+        conn.close()
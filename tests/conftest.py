@@ -0,0 +1,36 @@
+"""
+Shared test fixtures
+"""
+
+import sqlite3
+
+import pytest
+
+from src.database.database_setup import create_tables
+from src.database.schedule_writer import write_schedule
+
+
+@pytest.fixture
+def make_database(tmp_path):
+    """Factory for a school database in tmp_path
+
+    Keyword arguments name a table and give its rows as dicts of column
+    values, e.g. ``teachers=[{'id': 1, 'name': 'Mr. A'}]``. ``run`` rows of
+    (class, teacher, subject, room, day, period) are then written as the
+    active run of ``solver``. Returns the database file path.
+    """
+    def make(name="school.db", run=(), solver="ultra_fast", **tables):
+        db_file = str(tmp_path / name)
+        conn = sqlite3.connect(db_file)
+        create_tables(conn)
+        for table, rows in tables.items():
+            for row in rows:
+                conn.execute(f"INSERT INTO {table} ({', '.join(row)}) VALUES ({', '.join('?' * len(row))})",
+                             tuple(row.values()))
+        conn.commit()
+        conn.close()
+        if run:
+            write_schedule(db_file, run, solver=solver)
+        return db_file
+
+    return make
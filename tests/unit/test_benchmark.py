@@ -0,0 +1,59 @@
+"""
+Tests for the solver benchmark harness
+"""
+
+import json
+
+import pytest
+
+from src.utils.benchmark import compare_results, main, run_benchmarks
+
+
+def test_benchmark_records_every_run(tmp_path):
+    results = run_benchmarks(sizes=['sample'], seeds=[0], solvers=['ultra_fast', 'simple'], work_dir=str(tmp_path))
+
+    assert [run['solver'] for run in results['results']] == ['ultra_fast', 'simple']
+    for run in results['results']:
+        assert run['success'] and run['demand'] == 424
+        assert run['lessons'] == run['demand'] and run['coverage'] == 1.0
+        assert run['conflicts'] == 0 and run['score'] > 0
+        assert run['wall_time'] >= run['solver_time'] > 0 and run['peak_traced_mb'] > 0
+    json.dumps(results)
+
+
+def test_regressions_are_reported_against_the_baseline():
+    def run(solver, **values):
+        return {'solver': solver, 'size': 'sample', 'seed': 0, 'success': True, 'error': None,
+                'wall_time': 1.0, 'coverage': 1.0, 'conflicts': 0, **values}
+
+    baseline = {'results': [run('ultra_fast'), run('fast_greedy'), run('simple'), run('ortools')]}
+    results = {'results': [
+        run('ultra_fast', wall_time=1.5),
+        run('fast_greedy', wall_time=2.0, conflicts=3),
+        run('simple', coverage=0.9),
+        run('ortools', success=False, error='OR-Tools not available'),
+        run('portfolio', wall_time=99.0),
+    ]}
+
+    regressions = compare_results(results, baseline)
+    assert len(regressions) == 4
+    assert regressions[0].startswith('fast_greedy on sample (seed 0) took 2.00s')
+    assert 'conflicts' in regressions[1] and 'simple' in regressions[2] and 'failed' in regressions[3]
+    assert compare_results(results, baseline, time_tolerance=2.0)[0].startswith('fast_greedy on sample (seed 0) has 3')
+
+
+def test_command_line_fails_on_regression(tmp_path, capsys):
+    baseline_file = tmp_path / "baseline.json"
+    baseline_file.write_text(json.dumps({'results': [
+        {'solver': 'ultra_fast', 'size': 'sample', 'seed': 0, 'success': True,
+         'wall_time': 60.0, 'coverage': 1.0, 'conflicts': -1},
+    ]}))
+    output = tmp_path / "results.json"
+
+    with pytest.raises(SystemExit) as exit_info:
+        main([str(output), '--sizes', 'sample', '--seeds', '0', '--solvers', 'ultra_fast',
+              '--baseline', str(baseline_file)])
+    assert exit_info.value.code == 1
+
+    assert json.loads(output.read_text())['results'][0]['solver'] == 'ultra_fast'
+    assert 'REGRESSION: ultra_fast on sample (seed 0) has 0 conflicts' in capsys.readouterr().out
@@ -0,0 +1,44 @@
+"""
+Tests for the synthetic school generator
+"""
+
+import sqlite3
+
+from src.core.problem import load_problem
+from src.database.data_generator import create_school_database, section_name
+
+
+def table_rows(db_file, table):
+    conn = sqlite3.connect(db_file)
+    rows = conn.execute(f"SELECT * FROM {table} ORDER BY id").fetchall()
+    conn.close()
+    return rows
+
+
+def test_same_seed_gives_the_same_school(tmp_path):
+    first, second, other = (str(tmp_path / name) for name in ("a.db", "b.db", "c.db"))
+    create_school_database(first, seed=3)
+    create_school_database(second, seed=3)
+    create_school_database(other, seed=4)
+
+    for table in ('teachers', 'classes', 'lessons', 'teacher_preferences'):
+        assert table_rows(first, table) == table_rows(second, table)
+    assert table_rows(first, 'teacher_preferences') != table_rows(other, 'teacher_preferences')
+
+
+def test_school_is_shaped_by_the_parameters(tmp_path):
+    db_file = str(tmp_path / "school.db")
+    summary = create_school_database(db_file, grades=3, classes_per_grade=30, teachers=120, rooms=40,
+                                     lab_ratio=0.25, availability_density=0.75, num_days=4, num_periods=5)
+
+    assert (summary['teachers'], summary['classes'], summary['rooms'], summary['labs']) == (120, 90, 40, 10)
+    assert section_name(0) == 'A' and section_name(26) == 'AA'
+
+    # The grid is stored with the school, so solvers load it without being told
+    problem = load_problem(db_file)
+    assert (problem.num_days, problem.num_periods) == (4, 5)
+    assert problem.num_classes == 90 and len(problem.lab_rooms) == 10
+    # Every teacher is blocked on a quarter of the 20 slots, and no class needs more than the week
+    assert (problem.teacher_available.sum(axis=(1, 2)) == 15).all()
+    assert problem.lesson_demand.sum(axis=1).max() <= 20
+    assert summary['weekly_lessons'] == problem.total_demand
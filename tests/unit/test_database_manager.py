@@ -0,0 +1,86 @@
+"""
+Tests for the pooled DatabaseManager connections
+"""
+
+import threading
+
+from src.database.database_manager import DatabaseManager, get_database_manager
+
+
+def test_connections_are_wal_tuned(make_database):
+    manager = DatabaseManager(make_database())
+    conn = manager.connect()
+
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+    manager.close_all()
+
+
+def test_connection_is_reused_and_close_releases_it(make_database):
+    manager = DatabaseManager(make_database())
+
+    conn = manager.connect()
+    conn.execute("INSERT INTO rooms (name, is_lab) VALUES ('Room 1', 0)")
+    conn.close()
+
+    # The uncommitted insert was rolled back, but the connection stays usable
+    again = manager.connect()
+    assert again._conn is conn._conn
+    assert again.execute("SELECT COUNT(*) FROM rooms").fetchone()[0] == 0
+    manager.close_all()
+
+
+def test_threads_get_their_own_connection(make_database):
+    manager = DatabaseManager(make_database())
+    main = manager.connect()
+    seen = []
+
+    def worker():
+        with manager.get_connection() as conn:
+            conn.execute("INSERT INTO rooms (name, is_lab) VALUES ('Lab', 1)")
+            conn.commit()
+            seen.append(conn._conn)
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    thread.join()
+
+    assert seen and seen[0] is not main._conn
+    assert main.execute("SELECT COUNT(*) FROM rooms").fetchone()[0] == 1
+    manager.close_all()
+
+
+def test_shared_manager_does_not_add_sample_data(tmp_path, make_database):
+    db_file = make_database()
+    manager = get_database_manager(db_file)
+
+    assert get_database_manager(str(tmp_path / "." / "school.db")) is manager
+    assert manager.connect().execute("SELECT COUNT(*) FROM teachers").fetchone()[0] == 0
+
+
+def test_inner_borrow_does_not_roll_back_outer_transaction(make_database):
+    manager = DatabaseManager(make_database())
+    outer = manager.connect()
+    outer.execute("INSERT INTO rooms (name, is_lab) VALUES ('Room 1', 0)")
+
+    inner = manager.connect()
+    inner.execute("SELECT COUNT(*) FROM rooms").fetchone()
+    inner.close()
+    outer.commit()
+    outer.close()
+
+    assert manager.connect().execute("SELECT COUNT(*) FROM rooms").fetchone()[0] == 1
+    manager.close_all()
+
+
+def test_backup_and_restore_include_wal_content(tmp_path, make_database):
+    manager = DatabaseManager(make_database())
+    backup_file = str(tmp_path / "backup.db")
+    manager.execute_update("INSERT INTO rooms (name, is_lab) VALUES ('Room 1', 0)")
+
+    manager.backup_database(backup_file)
+    manager.execute_update("DELETE FROM rooms")
+    manager.restore_database(backup_file)
+
+    assert manager.get_rooms()[0]['name'] == 'Room 1'
+    manager.close_all()
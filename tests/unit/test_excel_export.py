@@ -0,0 +1,51 @@
+"""
+Tests for the streaming Excel export
+"""
+
+import openpyxl
+
+from src.utils.excel_export import export_schedule_to_excel, sheet_title
+from src.utils.timetables import iter_timetables
+
+
+SCHOOL = dict(
+    teachers=[{'id': 1, 'name': 'Mr. A'}, {'id': 2, 'name': 'Ms. B'}],
+    classes=[{'id': 1, 'name': 'Grade 9A', 'grade_level': 9}, {'id': 2, 'name': 'Grade 9B', 'grade_level': 9}],
+    subjects=[{'id': 1, 'name': 'Mathematics', 'needs_lab': 0}],
+    rooms=[{'id': 1, 'name': 'Room 101', 'is_lab': 0}],
+    # (class, teacher, subject, room, day, period); Grade 9B has no lessons
+    run=[(1, 1, 1, 1, 0, 0), (1, 1, 1, 1, 4, 7)],
+)
+
+
+def test_timetables_come_from_one_ordered_pass(make_database):
+    timetables = list(iter_timetables(make_database(**SCHOOL)))
+
+    assert [(kind, name) for kind, name, _ in timetables] == [
+        ('class', 'Grade 9A'), ('class', 'Grade 9B'), ('teacher', 'Mr. A'), ('teacher', 'Ms. B'), ('room', 'Room 101')]
+    cells = dict(((kind, name), cells) for kind, name, cells in timetables)
+    assert cells[('class', 'Grade 9A')][0][0] == "Mathematics\nMr. A\nRoom 101"
+    assert cells[('teacher', 'Mr. A')][7][4] == "Mathematics\nGrade 9A\nRoom 101"
+    assert cells[('room', 'Room 101')][0][0] == "Mathematics\nGrade 9A\nMr. A"
+    assert not any(any(row) for row in cells[('class', 'Grade 9B')])
+
+
+def test_workbook_has_a_sheet_per_class_teacher_and_room(tmp_path, make_database):
+    filename = str(tmp_path / "timetable.xlsx")
+    counts = export_schedule_to_excel(make_database(**SCHOOL), filename)
+
+    assert (counts['class'], counts['teacher'], counts['room']) == (2, 2, 1)
+    workbook = openpyxl.load_workbook(filename)
+    assert workbook.sheetnames == ['Grade 9A', 'Grade 9B', 'Mr. A', 'Ms. B', 'Room 101']
+    sheet = workbook['Mr. A']
+    assert [cell.value for cell in sheet[1]] == ['Time Slot', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
+    assert sheet['B2'].value == "Mathematics\nGrade 9A\nRoom 101" and sheet['B2'].style == 'timetable_lesson'
+    assert sheet['C2'].value is None and sheet['C2'].style == 'timetable_free'
+    assert sheet['A9'].value == "15:00-16:00"
+
+
+def test_sheet_titles_are_valid_and_unique():
+    used = set()
+    assert sheet_title("Grade 9/A", used) == "Grade 9-A"
+    assert sheet_title("grade 9/a", used) == "grade 9-a (2)"
+    assert len(sheet_title("x" * 40, used)) == 31
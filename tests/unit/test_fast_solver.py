@@ -0,0 +1,68 @@
+"""
+Tests for the FastScheduler genetic algorithm
+"""
+
+import json
+
+import numpy as np
+
+from src.core.problem import ProblemInstance
+from src.solvers.fast_solver import FastScheduler
+
+
+def make_scheduler():
+    teachers = [(1, 'Mr. A', json.dumps({"0": [0, 1, 2]})), (2, 'Ms. B', '{}'), (3, 'Dr. C', '{}')]
+    classes = [(1, 'Grade 9A', 9), (2, 'Grade 9B', 9)]
+    subjects = [(1, 'Mathematics', 0), (2, 'Chemistry', 1)]
+    rooms = [(1, 'Room 101', 0), (2, 'Room 102', 0), (3, 'Chem Lab', 1)]
+    lessons = [(1, 1, 5), (2, 1, 5), (1, 2, 3), (2, 2, 3)]
+    preferences = [(1, 1, 5), (2, 2, 4), (3, 1, 3)]
+    problem = ProblemInstance(teachers, classes, subjects, rooms, lessons, preferences,
+                              num_days=3, num_periods=4)
+    return FastScheduler(problem=problem)
+
+
+def test_population_fitness_matches_calculate_fitness():
+    scheduler = make_scheduler()
+    lesson_classes, lesson_subjects = scheduler.lesson_arrays()
+    # lesson -> (teacher, room, day, period); lessons 0-4 are 9A maths, 5-9 9B maths
+    individuals = [
+        {0: (0, 0, 1, 0), 5: (0, 1, 1, 2), 13: (1, 2, 2, 3)},
+        {0: (2, 0, 0, 0), 5: (2, 1, 0, 1), 10: (2, 2, 0, 3), 6: (1, 1, 2, 2)},
+        {},
+    ]
+    slots = np.full((len(individuals), len(lesson_classes)), -1)
+    teachers = np.zeros((len(individuals), len(lesson_classes)), dtype=np.int64)
+    schedules = []
+    for i, individual in enumerate(individuals):
+        schedule = {}
+        for lesson, (t, r, d, p) in individual.items():
+            slots[i, lesson] = d * scheduler.num_periods + p
+            teachers[i, lesson] = t
+            schedule[(t, int(lesson_classes[lesson]), r, d, p)] = (int(lesson_subjects[lesson]), 1)
+        schedules.append(schedule)
+
+    fitness = scheduler.population_fitness(slots, teachers, lesson_classes)
+
+    assert fitness.tolist() == [scheduler.calculate_fitness(s) for s in schedules]
+
+
+def test_genetic_schedule_is_conflict_free():
+    scheduler = make_scheduler()
+    schedule = scheduler.genetic_schedule(population_size=10, generations=20, seed=1)
+
+    assert 0 < len(schedule) <= scheduler.problem.total_demand
+    for index in range(3):
+        assert len({(key[index], key[3], key[4]) for key in schedule}) == len(schedule)
+    for (t, c, r, d, p), (s, _) in schedule.items():
+        assert scheduler.problem.teacher_available[t, d, p]
+        assert scheduler.problem.subject_needs_lab[s] == scheduler.problem.room_is_lab[r]
+
+
+def test_genetic_schedule_keeps_seed_quality():
+    scheduler = make_scheduler()
+    greedy = scheduler.greedy_schedule()
+    schedule = scheduler.genetic_schedule(population_size=6, generations=5,
+                                          seed_schedule=greedy, seed=2)
+
+    assert scheduler.calculate_fitness(schedule) >= scheduler.calculate_fitness(greedy)
@@ -0,0 +1,82 @@
+"""
+Tests for the versioned schema migrations
+"""
+
+import sqlite3
+
+import pytest
+
+from src.database.database_setup import create_tables
+from src.database.migrations import LATEST_VERSION, get_schema_version, migrate, migrate_database
+
+
+def index_names(conn):
+    return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+
+
+def test_new_database_is_created_at_latest_version():
+    conn = sqlite3.connect(":memory:")
+    create_tables(conn)
+
+    assert get_schema_version(conn) == LATEST_VERSION
+    assert {'idx_schedules_class_slot', 'idx_schedules_teacher_slot',
+            'idx_schedules_room_slot', 'idx_schedules_locked'} <= index_names(conn)
+
+
+def test_existing_database_is_upgraded_in_place(tmp_path):
+    db_file = str(tmp_path / "old.db")
+    conn = sqlite3.connect(db_file)
+    conn.execute("""
+        CREATE TABLE schedules (id INTEGER PRIMARY KEY, class_id INTEGER, teacher_id INTEGER,
+                                subject_id INTEGER, room_id INTEGER, day_of_week INTEGER,
+                                timeslot INTEGER, is_locked BOOLEAN)
+    """)
+    conn.execute("CREATE TABLE subjects (id INTEGER PRIMARY KEY, name TEXT, needs_lab BOOLEAN)")
+    conn.execute("CREATE TABLE lessons (id INTEGER PRIMARY KEY, class_id INTEGER, subject_id INTEGER)")
+    conn.execute("CREATE TABLE teacher_preferences (id INTEGER PRIMARY KEY, teacher_id INTEGER, class_id INTEGER)")
+    conn.execute("INSERT INTO schedules VALUES (1, 1, 1, 1, 1, 0, 0, 0)")
+    conn.commit()
+    conn.close()
+
+    assert migrate_database(db_file) == LATEST_VERSION
+    assert migrate_database(db_file) == LATEST_VERSION
+
+    conn = sqlite3.connect(db_file)
+    assert conn.execute("SELECT COUNT(*) FROM schedules").fetchone()[0] == 1
+    assert conn.execute("SELECT COUNT(*) FROM schema_version").fetchone()[0] == LATEST_VERSION
+    plan = conn.execute("""
+        EXPLAIN QUERY PLAN SELECT * FROM active_schedules
+        WHERE teacher_id = 1 AND day_of_week = 0 AND timeslot = 0
+    """).fetchall()
+    # Only the locked lessons and the active run are searched
+    assert any('idx_schedules_teacher_slot (run_id=? AND teacher_id=?' in row[-1] for row in plan)
+    assert not any(row[-1].startswith('SCAN') for row in plan)
+    conn.close()
+
+
+def test_migrate_is_a_no_op_when_current():
+    conn = sqlite3.connect(":memory:")
+    create_tables(conn)
+
+    assert migrate(conn) == LATEST_VERSION
+    assert conn.execute("SELECT COUNT(*) FROM schema_version").fetchone()[0] == LATEST_VERSION
+
+
+def test_failed_migration_is_rolled_back(monkeypatch):
+    from src.database import migrations
+
+    conn = sqlite3.connect(":memory:")
+    create_tables(conn)
+    broken = (LATEST_VERSION + 1, "Broken", [
+        "ALTER TABLE teachers ADD COLUMN email TEXT",
+        "CREATE TABLE notes (id INTEGER PRIMARY KEY)",
+        "INSERT INTO missing_table VALUES (1)",
+    ])
+    monkeypatch.setattr(migrations, "MIGRATIONS", migrations.MIGRATIONS + [broken])
+
+    with pytest.raises(sqlite3.OperationalError):
+        migrate(conn, LATEST_VERSION + 1)
+
+    assert get_schema_version(conn) == LATEST_VERSION
+    assert 'email' not in [row[1] for row in conn.execute("PRAGMA table_info(teachers)")]
+    assert not conn.execute("SELECT name FROM sqlite_master WHERE name = 'notes'").fetchall()
@@ -0,0 +1,59 @@
+"""
+Tests for the MLScheduler score indices
+"""
+
+import numpy as np
+
+from src.core.problem import ProblemInstance
+from src.solvers.ml_solver import MLScheduler
+
+
+def make_scheduler():
+    teachers = [(1, 'Mr. A', '{}'), (2, 'Ms. B', '{}')]
+    classes = [(1, 'Grade 9A', 9)]
+    subjects = [(1, 'Mathematics', 0), (2, 'History', 0)]
+    rooms = [(1, 'Room 101', 0), (2, 'Room 102', 0)]
+    lessons = [(1, 1, 3), (1, 2, 2)]
+    problem = ProblemInstance(teachers, classes, subjects, rooms, lessons, [])
+    return MLScheduler(problem=problem)
+
+
+def test_consecutive_same_subject_uses_class_index():
+    scheduler = make_scheduler()
+    scheduler.record_assignment(0, 0, 0, 0, 1, 2)
+    scheduler.record_assignment(0, 0, 0, 0, 1, 3)
+    scheduler.record_assignment(1, 0, 1, 1, 1, 5)
+
+    assert scheduler.count_consecutive_same_subject(0, 0, 1, 4) == 3
+    assert scheduler.count_consecutive_same_subject(0, 0, 1, 1) == 3
+    assert scheduler.count_consecutive_same_subject(0, 1, 1, 4) == 2
+    assert scheduler.count_consecutive_same_subject(0, 0, 0, 4) == 1
+
+
+def test_teacher_gap_penalty_uses_day_mask():
+    scheduler = make_scheduler()
+    penalty = scheduler.conflict_penalties['teacher_gap']
+    scheduler.record_assignment(0, 0, 0, 0, 2, 1)
+
+    assert scheduler.calculate_teacher_gap_penalty(0, 2, 2) == 0
+    assert scheduler.calculate_teacher_gap_penalty(0, 2, 4) == 2 * penalty
+    assert scheduler.calculate_teacher_gap_penalty(0, 3, 4) == 0
+    assert scheduler.calculate_teacher_gap_penalty(1, 2, 4) == 0
+
+
+def test_batched_scores_match_scalar_scores():
+    scheduler = make_scheduler()
+    scheduler.record_assignment(0, 0, 0, 0, 1, 2)
+    scheduler.record_assignment(1, 0, 1, 1, 3, 0)
+
+    scores = scheduler.score_candidates([0, 1], 0, 0, [0, 1])
+
+    for t, teacher_id in enumerate([0, 1]):
+        for r, room_id in enumerate([0, 1]):
+            for day in range(scheduler.num_days):
+                for period in range(scheduler.num_periods):
+                    if scheduler.check_conflicts(teacher_id, 0, room_id, day, period):
+                        assert scores[t, r, day, period] == -np.inf
+                    else:
+                        expected = scheduler.calculate_assignment_score(teacher_id, 0, 0, room_id, day, period)
+                        assert scores[t, r, day, period] == expected
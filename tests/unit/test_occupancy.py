@@ -0,0 +1,63 @@
+"""
+Tests for the bitset Occupancy engine
+"""
+
+import numpy as np
+
+from src.solvers.occupancy import Occupancy
+
+
+def make_occupancy():
+    available = np.ones((2, 2, 3), dtype=bool)
+    available[1, 0, 1] = False  # teacher 1 unavailable on day 0, period 1
+    return Occupancy(num_teachers=2, num_classes=2, num_rooms=2,
+                     num_days=2, num_periods=3, teacher_available=available)
+
+
+def test_place_test_and_remove():
+    occupancy = make_occupancy()
+
+    assert occupancy.is_free(0, 0, 0, 1, 2)
+    occupancy.place(0, 0, 0, 1, 2)
+    assert not occupancy.is_free(0, 1, 1, 1, 2)  # teacher busy
+    assert not occupancy.is_free(1, 0, 1, 1, 2)  # class busy
+    assert not occupancy.is_free(1, 1, 0, 1, 2)  # room busy
+    assert occupancy.is_free(1, 1, 1, 1, 2)
+
+    occupancy.remove(0, 0, 0, 1, 2)
+    assert occupancy.is_free(0, 0, 0, 1, 2)
+
+
+def test_free_slots_intersection():
+    occupancy = make_occupancy()
+    occupancy.place(0, 0, 0, 0, 0)
+    occupancy.place(0, 1, 1, 0, 2)
+
+    free = occupancy.free_slots(1, 0, 1)
+    # class 0 busy at (0, 0), room 1 busy at (0, 2), teacher 1 unavailable at (0, 1)
+    assert list(occupancy.iter_slots(free)) == [(1, 0), (1, 1), (1, 2)]
+    assert occupancy.first_slot(free) == (1, 0)
+
+    free = occupancy.free_slots(1, ignore_availability=True)
+    assert (0, 1) in list(occupancy.iter_slots(free))
+    assert occupancy.first_slot(0) is None
+
+
+def test_copy_is_independent():
+    occupancy = make_occupancy()
+    clone = occupancy.copy()
+    clone.place(0, 0, 0, 0, 0)
+
+    assert occupancy.is_free(0, 0, 0, 0, 0)
+    assert not clone.is_free(0, 0, 0, 0, 0)
+
+
+def test_slots_array_matches_mask():
+    occupancy = make_occupancy()
+    occupancy.place(0, 0, 0, 0, 2)
+    occupancy.place(0, 1, 1, 1, 1)
+
+    busy = occupancy.slots_array(occupancy.teacher_busy[0])
+    assert busy.shape == (2, 3)
+    assert np.argwhere(busy).tolist() == [[0, 2], [1, 1]]
+    assert occupancy.slots_array(occupancy.teacher_blocked[1]).tolist() == [[False, True, False], [False, False, False]]
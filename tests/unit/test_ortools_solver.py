@@ -0,0 +1,121 @@
+"""
+Tests for the sparse CP-SAT timetable model
+"""
+
+import json
+import sqlite3
+
+from ortools.sat.python import cp_model
+
+from src.core.problem import ProblemInstance
+from src.database.database_setup import create_tables
+from src.solvers.ortools_solver import SparseTimetableModel, solve_school_scheduling_from_db
+from src.solvers.ultra_fast_solver import UltraFastScheduler
+
+
+def make_problem(num_days=2):
+    teachers = [(1, 'Mr. A', json.dumps({"0": [0, 1]})), (2, 'Ms. B', '{}'), (3, 'Dr. C', '{}')]
+    classes = [(1, 'Grade 9A', 9), (2, 'Grade 9B', 9)]
+    subjects = [(1, 'Mathematics', 0), (2, 'Chemistry', 1)]
+    rooms = [(1, 'Room 101', 0), (2, 'Room 102', 0), (3, 'Chem Lab', 1)]
+    lessons = [(1, 1, 3), (2, 1, 3), (1, 2, 2), (2, 2, 2)]
+    preferences = [(1, 1, 5), (2, 2, 4), (3, 1, 1), (3, 2, 1)]
+    return ProblemInstance(teachers, classes, subjects, rooms, lessons, preferences,
+                           num_days=num_days, num_periods=3)
+
+
+def solve(problem, **kwargs):
+    timetable_model = SparseTimetableModel(problem, **kwargs)
+    solver = cp_model.CpSolver()
+    status = solver.Solve(timetable_model.model)
+    assert status == cp_model.OPTIMAL
+    return timetable_model, timetable_model.extract_assignments(solver)
+
+
+def test_variables_only_for_available_candidates():
+    problem = make_problem()
+    timetable_model = SparseTimetableModel(problem, max_teachers_per_lesson=1)
+
+    # One teacher per lesson: Mr. A for 9A, Ms. B for 9B in both subjects
+    teachers = {key[2] for key in timetable_model.lesson_vars}
+    assert teachers == {0, 1}
+    # Mr. A is unavailable on day 0, periods 0 and 1
+    assert (0, 0, 0, 0, 0) not in timetable_model.lesson_vars
+    assert (0, 0, 0, 0, 2) in timetable_model.lesson_vars
+    assert len(timetable_model.lesson_vars) == 2 * 4 + 2 * 6
+
+
+def test_solution_is_conflict_free_and_uses_matching_rooms():
+    problem = make_problem()
+    _, assignments = solve(problem)
+
+    assert len(assignments) == problem.total_demand
+    teacher_slots = [(t, d, p) for c, t, s, r, d, p in assignments]
+    class_slots = [(c, d, p) for c, t, s, r, d, p in assignments]
+    room_slots = [(r, d, p) for c, t, s, r, d, p in assignments]
+    assert len(set(teacher_slots)) == len(assignments)
+    assert len(set(class_slots)) == len(assignments)
+    assert len(set(room_slots)) == len(assignments)
+    for c, t, s, r, d, p in assignments:
+        assert problem.subject_needs_lab[s] == problem.room_is_lab[r]
+        assert problem.teacher_available[t, d, p]
+
+
+def test_fixed_hints_are_kept():
+    problem = make_problem(num_days=3)
+    greedy = UltraFastScheduler(problem=problem).ultra_fast_greedy()
+    timetable_model = SparseTimetableModel(problem)
+
+    hinted = timetable_model.add_hints(greedy, fix_fraction=1.0)
+    assert hinted == len(greedy)
+
+    solver = cp_model.CpSolver()
+    assert solver.Solve(timetable_model.model) == cp_model.OPTIMAL
+    solved = {(c, t, s, d, p) for c, t, s, r, d, p in timetable_model.extract_assignments(solver)}
+    assert {(c, t, s, d, p) for (t, c, r, d, p), (s, _) in greedy.items()} <= solved
+
+
+def test_solution_callback_streams_progress(tmp_path):
+    problem = make_problem(num_days=3)
+    db_file = str(tmp_path / "school.db")
+    conn = sqlite3.connect(db_file)
+    create_tables(conn)
+    conn.close()
+
+    events = []
+    timetable = solve_school_scheduling_from_db(db_file, problem, warm_start="ultra_fast",
+                                                num_workers=1, time_limit=10.0, random_seed=1,
+                                                callback=events.append)
+
+    assert len(timetable) == problem.total_demand
+    assert events
+    assert [e['solution'] for e in events] == list(range(1, len(events) + 1))
+    assert events[-1]['objective'] <= events[-1]['bound']
+
+
+def test_unsolved_fixed_warm_start_retries_within_the_time_limit(tmp_path, monkeypatch):
+    from src.solvers import ortools_solver
+
+    limits = []
+
+    class TimedOutFirst(cp_model.CpSolver):
+        """Reports the first search as UNKNOWN, as when the fixed hints run out of time"""
+        def Solve(self, model, callback=None):
+            limits.append(self.parameters.max_time_in_seconds)
+            if len(limits) == 1:
+                super().Solve(cp_model.CpModel())
+                return cp_model.UNKNOWN
+            return super().Solve(model, callback)
+
+    monkeypatch.setattr(ortools_solver, "CpSolver", TimedOutFirst)
+    problem = make_problem(num_days=3)
+    db_file = str(tmp_path / "school.db")
+    conn = sqlite3.connect(db_file)
+    create_tables(conn)
+    conn.close()
+
+    assignments = ortools_solver.solve_assignments(problem, db_file, warm_start="ultra_fast", fix_fraction=0.5,
+                                                   num_workers=1, time_limit=10.0)
+
+    assert len(assignments) == problem.total_demand
+    assert len(limits) == 2 and limits[0] == 10.0 and 0 < limits[1] < 10.0
@@ -0,0 +1,100 @@
+"""
+Tests for keyset-paged data-management queries
+"""
+
+import sqlite3
+
+from src.database.paged_query import PagedQuery
+
+
+def make_query(make_database):
+    db_file = make_database(
+        teachers=[{'id': i, 'name': f"Teacher {i:02d}"} for i in range(1, 6)],
+        classes=[{'id': i, 'name': f"Grade 9{c}", 'grade_level': 9} for i, c in enumerate("ABCD", 1)],
+        # Scores repeat, so pages have to break ties on the id
+        teacher_preferences=[{'teacher_id': t, 'class_id': c, 'preference_score': (t + c) % 3 + 1}
+                             for t in range(1, 6) for c in range(1, 5)])
+    return PagedQuery(db_file, """teacher_preferences tp
+        JOIN teachers t ON tp.teacher_id = t.id
+        JOIN classes c ON tp.class_id = c.id""",
+                      [('teacher', 't.name'), ('class', 'c.name'), ('preference', 'tp.preference_score')],
+                      id_expr="tp.id")
+
+
+def walk(query, **options):
+    """All rows by following next-page keys"""
+    rows, after = [], None
+    while True:
+        page = query.page(limit=3, after=after, **options)
+        if not page:
+            return rows
+        rows.extend(page)
+        after = query.sort_key(page[-1], options.get('sort'))
+
+
+def test_pages_cover_every_row_once_in_order(make_database):
+    query = make_query(make_database)
+
+    by_score = walk(query, sort='preference')
+    assert len(by_score) == query.count() == 20
+    assert [(row[3], row[0]) for row in by_score] == sorted((row[3], row[0]) for row in by_score)
+
+    descending = walk(query, sort='teacher', descending=True)
+    assert [row[0] for row in descending] == [row[0] for row in sorted(
+        by_score, key=lambda row: (row[1], row[0]), reverse=True)]
+
+
+def test_previous_page_and_filter(make_database):
+    query = make_query(make_database)
+    first = query.page(limit=4, sort='class')
+    second = query.page(limit=4, sort='class', after=query.sort_key(first[-1], 'class'))
+
+    assert query.page(limit=4, sort='class', before=query.sort_key(second[0], 'class')) == first
+
+    matching = query.page(limit=100, filter_text='9C')
+    assert len(matching) == query.count('9C') == 5
+    assert {row[2] for row in matching} == {'Grade 9C'}
+
+
+def test_single_row_reads(make_database):
+    query = make_query(make_database)
+    row = query.row(1)
+
+    assert row[:3] == (1, 'Teacher 01', 'Grade 9A')
+    assert query.row(999) is None
+
+
+def test_null_values_page_in_both_directions(make_database):
+    # Availability repeats and is missing for every third teacher
+    db_file = make_database(teachers=[{'id': i, 'name': f"Teacher {i:02d}",
+                                       'availability_json': None if i % 3 == 0 else f"{i % 2}"}
+                                      for i in range(1, 11)])
+    query = PagedQuery(db_file, "teachers", [('name', 'name'), ('availability', 'availability_json')])
+
+    ascending = walk(query, sort='availability')
+    descending = walk(query, sort='availability', descending=True)
+
+    assert [row[0] for row in ascending] == [3, 6, 9, 2, 4, 8, 10, 1, 5, 7]
+    assert descending == ascending[::-1]
+    first = query.page(limit=4, sort='availability', descending=True)
+    second = query.page(limit=4, sort='availability', descending=True,
+                        after=query.sort_key(first[-1], 'availability'))
+    assert query.page(limit=4, sort='availability', descending=True,
+                      before=query.sort_key(second[0], 'availability')) == first
+
+
+def test_next_page_seeks_an_index(make_database):
+    query = PagedQuery(make_database(classes=[{'id': i, 'name': f"Grade {i}", 'grade_level': 9}
+                                              for i in range(1, 6)]), "classes", [('name', 'name')])
+    queries = []
+    fetch = query._fetch
+    query._fetch = lambda sql, params: queries.append((sql, params)) or fetch(sql, params)
+
+    query.page(limit=2, sort='name', after=('Grade 2', 2))
+    query.page(limit=2, after=(2, 2))
+
+    conn = sqlite3.connect(query.db_file)
+    plans = [' '.join(row[-1] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params))
+             for sql, params in queries]
+    conn.close()
+    assert all(plan.startswith('SEARCH') and 'TEMP B-TREE' not in plan for plan in plans)
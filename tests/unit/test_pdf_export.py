@@ -0,0 +1,43 @@
+"""
+Tests for the bulk PDF export
+"""
+
+import os
+import re
+
+from src.utils.pdf_export import entity_filename, export_timetables_to_pdf
+
+
+SCHOOL = dict(
+    teachers=[{'id': 1, 'name': 'Mr. A'}, {'id': 2, 'name': 'Ms. B'}],
+    classes=[{'id': 1, 'name': 'Grade 9A', 'grade_level': 9}, {'id': 2, 'name': 'Grade 9B', 'grade_level': 9},
+             {'id': 3, 'name': 'Grade 9/B', 'grade_level': 9}],
+    subjects=[{'id': 1, 'name': 'Mathematics', 'needs_lab': 0}],
+    rooms=[{'id': 1, 'name': 'Room 101', 'is_lab': 0}],
+    run=[(1, 1, 1, 1, 0, 0), (2, 2, 1, 1, 0, 1)],
+)
+
+
+def page_count(filename):
+    with open(filename, 'rb') as f:
+        return len(re.findall(rb'/Type /Page\b', f.read()))
+
+
+def test_single_document_has_a_page_per_timetable(tmp_path, make_database):
+    filename = str(tmp_path / "all.pdf")
+    counts = export_timetables_to_pdf(make_database(**SCHOOL), filename)
+
+    assert (counts['class'], counts['teacher'], counts['room'], counts['files']) == (3, 2, 1, 1)
+    assert page_count(filename) == 6
+
+
+def test_separate_files_are_rendered_in_parallel(tmp_path, make_database):
+    output = str(tmp_path / "timetables")
+    counts = export_timetables_to_pdf(make_database(**SCHOOL), output, separate=True,
+                                      kinds=('class', 'teacher'), workers=2, chunk_size=2)
+
+    assert counts['files'] == 5
+    assert sorted(os.listdir(output)) == ['class_Grade_9A.pdf', 'class_Grade_9B.pdf', 'class_Grade_9_B.pdf',
+                                          'teacher_Mr._A.pdf', 'teacher_Ms._B.pdf']
+    assert all(page_count(os.path.join(output, name)) == 1 for name in os.listdir(output))
+    assert entity_filename('room', 'Lab #1') == 'room_Lab_1.pdf'
@@ -0,0 +1,111 @@
+"""
+Tests for the compiled ProblemInstance
+"""
+
+import json
+import sqlite3
+
+from src.core.problem import DEFAULT_PREFERENCE, ProblemInstance, load_problem
+from src.database.database_setup import create_tables
+
+
+def make_problem():
+    teachers = [(10, 'Mr. A', json.dumps({"1": [2, 3]})), (20, 'Ms. B', '{}')]
+    classes = [(5, 'Grade 9A', 9), (6, 'Grade 9B', 9)]
+    subjects = [(1, 'Mathematics', 0), (2, 'Chemistry', 1)]
+    rooms = [(1, 'Room 101', 0), (2, 'Chem Lab', 1)]
+    lessons = [(5, 1, 4), (6, 2, 2)]
+    preferences = [(10, 5, 5), (20, 6, 1)]
+    return ProblemInstance(teachers, classes, subjects, rooms, lessons, preferences)
+
+
+def test_dense_indices_and_arrays():
+    problem = make_problem()
+
+    assert problem.teacher_index == {10: 0, 20: 1}
+    assert problem.class_index == {5: 0, 6: 1}
+    assert problem.lesson_requirements == [(0, 0, 4), (1, 1, 2)]
+    assert problem.lesson_demand.tolist() == [[4, 0], [0, 2]]
+    assert problem.total_demand == 6
+    assert problem.lab_rooms == [1]
+    assert problem.regular_rooms == [0]
+    assert problem.rooms_for_subject(1) == [1]
+
+
+def test_availability_and_preferences():
+    problem = make_problem()
+
+    assert not problem.teacher_available[0, 1, 2]
+    assert not problem.teacher_available[0, 1, 3]
+    assert problem.teacher_available[0, 1, 4]
+    assert problem.teacher_available[1].all()
+
+    assert problem.preferences.tolist() == [[5, DEFAULT_PREFERENCE], [DEFAULT_PREFERENCE, 1]]
+    assert problem.preference_scores(default=0).tolist() == [[5, 0], [0, 1]]
+
+
+def test_qualified_teachers():
+    problem = make_problem()
+
+    # Mr. A likes Grade 9A (maths), Ms. B dislikes Grade 9B (chemistry)
+    assert problem.qualified_teachers(min_score=3, explicit_only=True).tolist() == [[True, False], [False, False]]
+    # Without explicit preferences the default score of 3 qualifies
+    assert problem.qualified_teachers(min_score=3).tolist() == [[True, True], [True, False]]
+
+
+def test_load_problem_from_database(tmp_path):
+    db_file = str(tmp_path / "school.db")
+    conn = sqlite3.connect(db_file)
+    create_tables(conn)
+    cursor = conn.cursor()
+    cursor.execute("INSERT INTO teachers (id, name, availability_json) VALUES (3, 'Mr. A', '{\"0\": [0]}')")
+    cursor.execute("INSERT INTO classes (id, name, grade_level) VALUES (7, 'Grade 10A', 10)")
+    cursor.execute("INSERT INTO subjects (id, name, needs_lab) VALUES (4, 'Biology', 1)")
+    cursor.execute("INSERT INTO rooms (id, name, is_lab) VALUES (9, 'Biology Lab', 1)")
+    cursor.execute("INSERT INTO lessons (class_id, subject_id, lessons_per_week) VALUES (7, 4, 3)")
+    cursor.execute("""
+        INSERT INTO schedules (class_id, teacher_id, subject_id, room_id, day_of_week, timeslot, is_locked)
+        VALUES (7, 3, 4, 9, 2, 1, 1)
+    """)
+    conn.commit()
+    conn.close()
+
+    problem = load_problem(db_file)
+
+    assert problem.num_teachers == 1
+    assert problem.lesson_requirements == [(0, 0, 3)]
+    assert not problem.teacher_available[0, 0, 0]
+    assert problem.existing_lessons == [(0, 0, 0, 0, 2, 1, True)]
+
+
+def test_subject_categories_and_time_affinity():
+    problem = make_problem()
+
+    assert [problem.category_names[c] for c in problem.subject_category] == ['math', 'physical_science']
+    assert problem.subject_priority.tolist() == [50, 40]
+    assert problem.time_affinity.shape == (2, 5, 8)
+    assert problem.time_affinity[0, :, :4].min() == 20 and problem.time_affinity[0, :, 4:].max() == -5
+
+
+def test_subject_categories_are_configured_in_the_database(tmp_path):
+    db_file = str(tmp_path / "school.db")
+    conn = sqlite3.connect(db_file)
+    create_tables(conn)
+    cursor = conn.cursor()
+    cursor.execute("INSERT INTO subjects (id, name, needs_lab) VALUES (1, 'Algebra', 0)")
+    cursor.execute("INSERT INTO subjects (id, name, needs_lab, category_id) VALUES (2, 'Drama Club', 0, 1)")
+    cursor.execute("INSERT INTO subjects (id, name, needs_lab) VALUES (3, 'Woodwork', 0)")
+    cursor.execute("""
+        INSERT INTO category_time_affinity (category_id, day_of_week, first_period, last_period, weight)
+        VALUES (1, 4, 7, 7, -100)
+    """)
+    conn.commit()
+    conn.close()
+
+    problem = load_problem(db_file)
+
+    # The explicit category wins over the "drama" keyword; unmatched subjects have no category
+    assert problem.subject_category.tolist()[:2] == [0, 0] and problem.subject_category[2] == -1
+    assert problem.subject_priority.tolist() == [50, 50, 0]
+    assert problem.time_affinity[0, 4, 7] == -105 and problem.time_affinity[0, 3, 7] == -5
+    assert not problem.time_affinity[2].any()
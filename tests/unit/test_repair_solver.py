@@ -0,0 +1,94 @@
+"""
+Tests for incremental schedule repair
+"""
+
+import json
+import sqlite3
+
+from src.core.problem import load_problem
+from src.database.schedule_writer import write_schedule
+from src.solvers.profile import SolverProfile
+from src.solvers.repair_solver import repair_schedule
+
+
+def school(lessons, preferences=()):
+    """Two teachers, one class, subjects 1 and 2, one room"""
+    return dict(
+        teachers=[{'id': 1, 'name': 'Mr. A', 'availability_json': '{}'},
+                  {'id': 2, 'name': 'Ms. B', 'availability_json': '{}'}],
+        classes=[{'id': 1, 'name': 'Grade 9A', 'grade_level': 9}],
+        subjects=[{'id': 1, 'name': 'Mathematics', 'needs_lab': 0}, {'id': 2, 'name': 'History', 'needs_lab': 0}],
+        rooms=[{'id': 1, 'name': 'Room 101', 'is_lab': 0}],
+        lessons=[{'class_id': 1, 'subject_id': subject, 'lessons_per_week': count} for subject, count in lessons],
+        teacher_preferences=[{'teacher_id': teacher, 'class_id': 1, 'preference_score': score}
+                             for teacher, score in preferences],
+    )
+
+
+def active_lessons(db_file):
+    conn = sqlite3.connect(db_file)
+    rows = conn.execute("""
+        SELECT teacher_id, subject_id, day_of_week, timeslot, is_locked FROM active_schedules
+        ORDER BY day_of_week, timeslot
+    """).fetchall()
+    conn.close()
+    return rows
+
+
+def set_unavailable(db_file, teacher_id, unavailable):
+    conn = sqlite3.connect(db_file)
+    conn.execute("UPDATE teachers SET availability_json = ? WHERE id = ?", (json.dumps(unavailable), teacher_id))
+    conn.commit()
+    conn.close()
+
+
+def test_only_lessons_broken_by_availability_move(make_database):
+    db_file = make_database(**school([(1, 2), (2, 1)]))
+    conn = sqlite3.connect(db_file)
+    conn.execute("""
+        INSERT INTO schedules (class_id, teacher_id, subject_id, room_id, day_of_week, timeslot, is_locked)
+        VALUES (1, 2, 2, 1, 0, 2, 1)
+    """)
+    conn.commit()
+    conn.close()
+    write_schedule(db_file, [(1, 1, 1, 1, 0, 0), (1, 1, 1, 1, 1, 0)])
+
+    set_unavailable(db_file, 1, {"1": [0]})
+    result = repair_schedule(db_file, teacher_ids=[1])
+
+    assert (result['removed'], result['added'], result['unplaced']) == (1, 1, 0)
+    lessons = active_lessons(db_file)
+    assert (1, 1, 0, 0, 0) in lessons and (2, 2, 0, 2, 1) in lessons
+    assert (1, 1, 1, 0, 0) not in lessons and len(lessons) == 3
+
+
+def test_lesson_requirement_changes_add_and_remove_lessons(make_database):
+    db_file = make_database(**school([(1, 3), (2, 1)]))
+    write_schedule(db_file, [(1, 1, 1, 1, 0, 0), (1, 1, 1, 1, 1, 0), (1, 2, 2, 1, 0, 1)])
+
+    result = repair_schedule(db_file, class_ids=[1])
+    assert (result['removed'], result['added']) == (0, 1)
+
+    conn = sqlite3.connect(db_file)
+    conn.execute("UPDATE lessons SET lessons_per_week = 0 WHERE subject_id = 2")
+    conn.commit()
+    conn.close()
+    result = repair_schedule(db_file, class_ids=[1])
+
+    assert (result['removed'], result['added']) == (1, 0)
+    assert [lesson[1] for lesson in active_lessons(db_file)] == [1, 1, 1]
+
+
+def test_neighbourhood_is_freed_when_a_lesson_does_not_fit(make_database):
+    # Only Mr. A may teach; Ms. B keeps her history lesson only as its previous teacher
+    db_file = make_database(**school([(1, 1), (2, 1)], preferences=[(1, 5), (2, 1)]))
+    write_schedule(db_file, [(1, 1, 1, 1, 0, 0), (1, 2, 2, 1, 0, 1)])
+    set_unavailable(db_file, 1, {"0": [0]})
+
+    problem = load_problem(db_file, num_days=1, num_periods=2)
+    profile = SolverProfile()
+    result = repair_schedule(db_file, problem, teacher_ids=[1], profile=profile)
+
+    assert result['unplaced'] == 0
+    assert profile.counters['backtracks'] == 1 and profile.counters['lessons_unplaced'] == 0
+    assert active_lessons(db_file) == [(2, 2, 0, 0, 0), (1, 1, 0, 1, 0)]
@@ -0,0 +1,104 @@
+"""
+Tests for the in-memory schedule model
+"""
+
+import sqlite3
+
+from src.database.schedule_model import ScheduleModel
+
+
+SCHOOL = dict(
+    teachers=[{'id': 1, 'name': 'Mr. A'}, {'id': 2, 'name': 'Ms. B'}],
+    classes=[{'id': 1, 'name': 'Grade 9A', 'grade_level': 9}, {'id': 2, 'name': 'Grade 9B', 'grade_level': 9}],
+    subjects=[{'id': 1, 'name': 'Mathematics', 'needs_lab': 0}, {'id': 2, 'name': 'English', 'needs_lab': 0}],
+    rooms=[{'id': 1, 'name': 'Room 101', 'is_lab': 0}, {'id': 2, 'name': 'Room 102', 'is_lab': 0}],
+    # (class, teacher, subject, room, day, period)
+    run=[(1, 1, 1, 1, 0, 0), (2, 2, 2, 2, 0, 0), (2, 1, 1, 1, 0, 1)],
+)
+
+
+def stored_slots(db_file):
+    conn = sqlite3.connect(db_file)
+    rows = conn.execute("SELECT id, day_of_week, timeslot FROM active_schedules ORDER BY id").fetchall()
+    conn.close()
+    return rows
+
+
+def test_lessons_are_indexed_by_class_teacher_room_and_slot(make_database):
+    model = ScheduleModel(make_database(**SCHOOL)).load()
+
+    assert len(model.lessons) == 3
+    assert sorted(model.timetable('teacher', 'Mr. A')) == [(0, 0), (0, 1)]
+    lesson = model.timetable('class', 'Grade 9B')[(0, 0)]
+    assert (lesson['subject'], lesson['teacher'], lesson['room']) == ('English', 'Ms. B', 'Room 102')
+    assert model.timetable('room', 'Room 101')[(0, 1)]['class'] == 'Grade 9B'
+    assert len(model.lessons_at(0, 0)) == 2
+    assert model.timetable('teacher', 'Nobody') == {}
+
+
+def test_move_and_remove_update_the_database_and_indexes(make_database):
+    db_file = make_database(**SCHOOL)
+    model = ScheduleModel(db_file).load()
+    lesson = model.timetable('class', 'Grade 9A')[(0, 0)]
+
+    # Mr. A already teaches Grade 9B in period 1; Room 102 is taken in period 0
+    assert model.move_conflict(lesson, 0, 1) == "Teacher Mr. A is already busy at this time"
+    assert model.move_conflict(lesson, 0, 0) is None
+    assert model.move_conflict(model.timetable('class', 'Grade 9B')[(0, 1)], 0, 0).startswith("Teacher")
+
+    model.move(lesson['id'], 2, 3)
+    assert model.timetable('class', 'Grade 9A') == {(2, 3): lesson}
+    assert (0, 0) not in model.timetable('room', 'Room 101')
+    assert [entry['id'] for entry in model.lessons_at(0, 0)] == [model.timetable('class', 'Grade 9B')[(0, 0)]['id']]
+    assert (lesson['id'], 2, 3) in stored_slots(db_file)
+
+    model.remove(lesson['id'])
+    assert 'Grade 9A' not in {entry['class'] for entry in model.lessons.values()}
+    assert model.timetable('class', 'Grade 9A') == {}
+    assert model.lessons_at(2, 3) == []
+
+    # The in-place updates match a fresh load
+    fresh = ScheduleModel(db_file).load()
+    assert fresh.lessons == model.lessons
+    assert len(stored_slots(db_file)) == 2
+
+
+def test_move_targets_and_swaps(make_database):
+    db_file = make_database(**SCHOOL)
+    model = ScheduleModel(db_file).load()
+    lesson = model.timetable('class', 'Grade 9A')[(0, 0)]
+    blocker = model.timetable('class', 'Grade 9B')[(0, 1)]
+
+    targets = model.move_targets(lesson, 5, 8)
+    assert len(targets) == 40
+    assert targets[(0, 0)] == 'current' and targets[(3, 3)] == 'free'
+    # Mr. A teaches Grade 9B in period 1, but Grade 9B is busy in period 0, so it cannot trade
+    assert targets[(0, 1)] == 'busy'
+    assert model.swap_partner(lesson, 0, 1) is None
+
+    # Once Grade 9B is free in period 0 the lessons can swap
+    model.remove(model.timetable('class', 'Grade 9B')[(0, 0)]['id'])
+    assert model.move_targets(lesson, 5, 8)[(0, 1)] == 'swap'
+    assert model.swap_partner(lesson, 0, 1) is blocker
+
+    model.swap(lesson['id'], blocker['id'])
+    assert model.timetable('class', 'Grade 9A') == {(0, 1): lesson}
+    assert model.timetable('teacher', 'Mr. A') == {(0, 0): blocker, (0, 1): lesson}
+    assert (lesson['id'], 0, 1) in stored_slots(db_file) and (blocker['id'], 0, 0) in stored_slots(db_file)
+
+
+def test_locked_lesson_is_not_a_swap_partner(make_database):
+    db_file = make_database(**SCHOOL)
+    model = ScheduleModel(db_file).load()
+    model.remove(model.timetable('class', 'Grade 9B')[(0, 0)]['id'])
+    blocker = model.timetable('class', 'Grade 9B')[(0, 1)]
+    conn = sqlite3.connect(db_file)
+    conn.execute("UPDATE schedules SET is_locked = 1 WHERE id = ?", (blocker['id'],))
+    conn.commit()
+    conn.close()
+
+    model = ScheduleModel(db_file).load()
+    lesson = model.timetable('class', 'Grade 9A')[(0, 0)]
+
+    assert model.swap_partner(lesson, 0, 1) is None
+    assert model.move_targets(lesson, 5, 8)[(0, 1)] == 'busy'
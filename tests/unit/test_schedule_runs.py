@@ -0,0 +1,121 @@
+"""
+Tests for the schedule run history
+"""
+
+import sqlite3
+
+import pytest
+
+from src.database.migrations import migrate_database
+from src.database.schedule_runs import (activate_run, clear_runs, delete_run, diff_runs, get_active_run,
+                                        get_run, list_runs, pin_run, update_run)
+from src.database.schedule_writer import write_schedule
+
+
+LOCKED_LESSON = [{'class_id': 1, 'teacher_id': 1, 'subject_id': 1, 'room_id': 1,
+                  'day_of_week': 0, 'timeslot': 0, 'is_locked': 1}]
+
+
+def active_lessons(db_file):
+    conn = sqlite3.connect(db_file)
+    rows = conn.execute("""
+        SELECT class_id, teacher_id, day_of_week, timeslot FROM active_schedules
+        ORDER BY day_of_week, timeslot
+    """).fetchall()
+    conn.close()
+    return rows
+
+
+def test_switching_runs_is_a_pointer_flip(make_database):
+    db_file = make_database(schedules=LOCKED_LESSON)
+    write_schedule(db_file, [(1, 2, 1, 1, 0, 1)], solver="ultra_fast", params={"method": "greedy"}, seed=7)
+    first = get_active_run(db_file)
+    write_schedule(db_file, [(1, 2, 1, 1, 1, 1)], solver="ortools")
+    second = get_active_run(db_file)
+
+    assert second != first
+    assert active_lessons(db_file) == [(1, 1, 0, 0), (1, 2, 1, 1)]
+
+    activate_run(db_file, first)
+    assert active_lessons(db_file) == [(1, 1, 0, 0), (1, 2, 0, 1)]
+
+    runs = list_runs(db_file)
+    assert [run['solver'] for run in runs] == ["ortools", "ultra_fast"]
+    assert runs[1]['active'] and runs[1]['params'] == {"method": "greedy"} and runs[1]['seed'] == 7
+
+    with pytest.raises(ValueError):
+        activate_run(db_file, 999)
+
+
+def test_run_quality_counts_clashes_with_locked_lessons(make_database):
+    db_file = make_database(schedules=LOCKED_LESSON)
+    # Teacher 1 and room 1 are already taken by the locked lesson in slot (0, 0)
+    write_schedule(db_file, [(2, 1, 1, 1, 0, 0), (2, 3, 1, 2, 0, 1)])
+
+    quality = get_run(db_file, get_active_run(db_file))['quality']
+    assert quality == {'lessons': 2, 'teacher_conflicts': 1, 'class_conflicts': 0, 'room_conflicts': 1}
+
+
+def test_update_diff_and_delete(make_database):
+    db_file = make_database(schedules=LOCKED_LESSON)
+    write_schedule(db_file, [(1, 2, 1, 1, 0, 1), (1, 2, 1, 1, 0, 2)])
+    old = get_active_run(db_file)
+    write_schedule(db_file, [(1, 2, 1, 1, 0, 1), (1, 2, 1, 1, 0, 3)])
+    new = get_active_run(db_file)
+
+    update_run(db_file, new, timings={"solve": 1.5}, quality={"score": 10})
+    run = get_run(db_file, new)
+    assert run['timings'] == {"solve": 1.5}
+    assert run['quality']['score'] == 10 and run['quality']['lessons'] == 2
+
+    assert diff_runs(db_file, old, new) == {'added': [(1, 2, 1, 1, 0, 3)], 'removed': [(1, 2, 1, 1, 0, 2)]}
+
+    delete_run(db_file, new)
+    assert get_active_run(db_file) is None
+    assert active_lessons(db_file) == [(1, 1, 0, 0)]
+
+    assert clear_runs(db_file) == 2
+    assert list_runs(db_file) == []
+
+
+def test_old_runs_are_pruned_unless_pinned(make_database):
+    db_file = make_database(schedules=LOCKED_LESSON)
+    write_schedule(db_file, [(1, 2, 1, 1, 0, 1)])
+    pinned = get_active_run(db_file)
+    pin_run(db_file, pinned)
+    for period in range(2, 7):
+        write_schedule(db_file, [(1, 2, 1, 1, 0, period)], keep_runs=2)
+    newest = get_active_run(db_file)
+
+    runs = list_runs(db_file)
+    assert [run['id'] for run in runs] == [newest, newest - 1, newest - 2, pinned]
+    assert [run['pinned'] for run in runs] == [False, False, False, True]
+    conn = sqlite3.connect(db_file)
+    run_ids = {row[0] for row in conn.execute("SELECT DISTINCT run_id FROM schedules")}
+    conn.close()
+    assert run_ids == {None, pinned, newest, newest - 1, newest - 2}
+
+    with pytest.raises(ValueError):
+        pin_run(db_file, 999)
+
+
+def test_existing_lessons_become_the_first_run(tmp_path):
+    db_file = str(tmp_path / "old.db")
+    conn = sqlite3.connect(db_file)
+    conn.execute("""
+        CREATE TABLE schedules (id INTEGER PRIMARY KEY, class_id INTEGER, teacher_id INTEGER,
+                                subject_id INTEGER, room_id INTEGER, day_of_week INTEGER,
+                                timeslot INTEGER, is_locked BOOLEAN)
+    """)
+    conn.execute("CREATE TABLE subjects (id INTEGER PRIMARY KEY, name TEXT, needs_lab BOOLEAN)")
+    conn.execute("CREATE TABLE lessons (id INTEGER PRIMARY KEY, class_id INTEGER, subject_id INTEGER)")
+    conn.execute("CREATE TABLE teacher_preferences (id INTEGER PRIMARY KEY, teacher_id INTEGER, class_id INTEGER)")
+    conn.execute("INSERT INTO schedules VALUES (1, 1, 1, 1, 1, 0, 0, 1), (2, 1, 1, 1, 1, 0, 1, 0)")
+    conn.commit()
+    conn.close()
+
+    migrate_database(db_file)
+
+    runs = list_runs(db_file)
+    assert [(run['solver'], run['active']) for run in runs] == [("imported", True)]
+    assert active_lessons(db_file) == [(1, 1, 0, 0), (1, 1, 0, 1)]
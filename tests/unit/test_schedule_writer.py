@@ -0,0 +1,45 @@
+"""
+Tests for the bulk schedule writer
+"""
+
+import sqlite3
+
+from src.core.problem import ProblemInstance
+from src.database.schedule_writer import save_schedule, write_schedule
+
+LOCKED_LESSON = [{'class_id': 1, 'teacher_id': 1, 'subject_id': 1, 'room_id': 1,
+                  'day_of_week': 0, 'timeslot': 0, 'is_locked': 1}]
+
+
+def read_schedules(db_file, table="active_schedules"):
+    conn = sqlite3.connect(db_file)
+    rows = conn.execute(f"""
+        SELECT class_id, teacher_id, subject_id, room_id, day_of_week, timeslot, is_locked
+        FROM {table} ORDER BY day_of_week, timeslot
+    """).fetchall()
+    conn.close()
+    return rows
+
+
+def test_write_schedule_adds_an_active_run(make_database):
+    db_file = make_database(schedules=LOCKED_LESSON)
+
+    write_schedule(db_file, [(1, 1, 1, 1, 0, 1)])
+    timings = write_schedule(db_file, [(2, 3, 4, 5, 1, 2), (2, 3, 4, 5, 1, 3)])
+
+    # The earlier run is kept but only the locked lesson and the new run are shown
+    assert read_schedules(db_file) == [(1, 1, 1, 1, 0, 0, 1), (2, 3, 4, 5, 1, 2, 0), (2, 3, 4, 5, 1, 3, 0)]
+    assert len(read_schedules(db_file, "schedules")) == 4
+    assert set(timings) == {'connect', 'run', 'insert', 'quality', 'prune', 'commit', 'total'}
+    assert timings['total'] >= timings['insert']
+
+
+def test_save_schedule_maps_indices_to_ids(make_database):
+    db_file = make_database(schedules=LOCKED_LESSON)
+    problem = ProblemInstance([(10, 'Mr. A', '{}'), (20, 'Ms. B', '{}')], [(7, 'Grade 9A', 9)],
+                              [(3, 'Mathematics', 0)], [(8, 'Room 101', 0)], [(7, 3, 2)], [])
+
+    timings = save_schedule(db_file, problem, {(1, 0, 0, 2, 5): (0, 1)})
+
+    assert read_schedules(db_file) == [(1, 1, 1, 1, 0, 0, 1), (7, 20, 3, 8, 2, 5, 0)]
+    assert 'prepare' in timings
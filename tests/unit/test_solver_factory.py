@@ -0,0 +1,180 @@
+"""
+Tests for the SolverFactory job API
+"""
+
+import multiprocessing
+import os
+import signal
+import sqlite3
+import time
+
+import pytest
+
+from src.database.data_generator import generate_school
+from src.solvers.solver_factory import SolverFactory, SolverType
+
+
+SCHOOL = dict(
+    teachers=[{'id': 1, 'name': 'Mr. A', 'availability_json': '{}'}],
+    classes=[{'id': 1, 'name': 'Grade 9A', 'grade_level': 9}],
+    subjects=[{'id': 1, 'name': 'Mathematics', 'needs_lab': 0}],
+    rooms=[{'id': 1, 'name': 'Room 101', 'is_lab': 0}],
+    lessons=[{'class_id': 1, 'subject_id': 1, 'lessons_per_week': 4}],
+)
+
+
+def test_submitted_job_returns_result(make_database):
+    db_file = make_database(**SCHOOL)
+
+    job = SolverFactory.submit(SolverType.ULTRA_FAST, db_file, timeout=60)
+    result = job.wait()
+
+    assert job.done()
+    assert result.success, result.error
+    assert result.lessons_count == 4
+
+
+def test_job_can_be_cancelled(make_database):
+    db_file = make_database(**SCHOOL)
+
+    job = SolverFactory.submit(SolverType.ULTRA_FAST, db_file)
+    job.cancel()
+
+    assert job.done()
+    assert not job.result.success
+    assert job.result.error == "Cancelled"
+
+
+def test_job_deadline_kills_worker(make_database):
+    db_file = make_database(**SCHOOL)
+
+    job = SolverFactory.submit(SolverType.ULTRA_FAST, db_file, timeout=0.001)
+    result = job.wait()
+
+    assert not result.success
+    assert result.error.startswith("Timed out")
+
+
+def ignore_sigterm(ready):
+    """Job worker stand-in that, like a native search, does not stop on SIGTERM"""
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    ready.set()
+    time.sleep(60)
+
+
+def test_cancel_kills_a_worker_that_ignores_sigterm(make_database, monkeypatch):
+    from src.solvers import solver_factory
+
+    monkeypatch.setattr(solver_factory, "STOP_GRACE_PERIOD", 0.2)
+    job = SolverFactory.submit(SolverType.ULTRA_FAST, make_database(**SCHOOL))
+    job._process.kill()
+    job._process.join()
+    context = multiprocessing.get_context("spawn")
+    ready = context.Event()
+    job._process = context.Process(target=ignore_sigterm, args=(ready,))
+    job._process.start()
+    assert ready.wait(30)
+
+    job.cancel()
+
+    assert job.result.error == "Cancelled"
+    assert not job._process.is_alive()
+
+
+def test_portfolio_saves_best_valid_schedule(make_database):
+    db_file = make_database(**SCHOOL)
+
+    result = SolverFactory.solve(SolverType.PORTFOLIO, db_file,
+                                 options={"engines": ["ultra_fast", "fast_greedy"], "time_limit": 60})
+
+    assert result.success, result.error
+    assert result.lessons_count == 4
+    engines = result.details["engines"]
+    assert set(engines) == {"ultra_fast", "fast_greedy"}
+    assert result.details["winner"] == max(engines, key=lambda name: engines[name]["score"])
+    assert all(quality["valid"] for quality in engines.values())
+    assert all(quality["profile"]["counters"]["candidates_evaluated"] > 0 for quality in engines.values())
+    assert result.profile.phases["search"] > 0 and result.profile.phases["persistence"] > 0
+
+
+def make_school(make_database):
+    """A generated school large enough that CP-SAT keeps improving for its whole time limit"""
+    db_file = make_database()
+    conn = sqlite3.connect(db_file)
+    generate_school(conn)
+    conn.commit()
+    conn.close()
+    return db_file
+
+
+def live_group_members(pgid):
+    """Processes of a process group that have not exited (zombies excluded)"""
+    members = []
+    for pid in filter(str.isdigit, os.listdir("/proc")):
+        try:
+            with open(f"/proc/{pid}/stat") as stat:
+                fields = stat.read().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        if int(fields[2]) == pgid and fields[0] != "Z":
+            members.append(int(pid))
+    return members
+
+
+def test_portfolio_kills_engines_at_deadline(make_database):
+    db_file = make_school(make_database)
+
+    start = time.time()
+    result = SolverFactory.solve(SolverType.PORTFOLIO, db_file,
+                                 options={"engines": ["ortools"], "time_limit": 2, "ortools": {"time_limit": 60}})
+
+    assert time.time() - start < 10
+    assert not result.success
+    assert result.details["winner"] is None
+    assert multiprocessing.active_children() == []
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc"), reason="needs /proc to inspect process groups")
+def test_stopped_portfolio_job_kills_its_engines(make_database):
+    job = SolverFactory.submit(SolverType.PORTFOLIO, make_school(make_database), timeout=3,
+                               options={"engines": ["ortools"], "time_limit": 60, "ortools": {"time_limit": 60}})
+
+    assert job.wait().error.startswith("Timed out")
+    assert live_group_members(job._process.pid) == []
+
+
+def test_every_engine_reports_a_profile(make_database):
+    from src.database.schedule_runs import get_run
+
+    db_file = make_database(**SCHOOL)
+    for solver_type in (SolverType.ULTRA_FAST, SolverType.SMART_GREEDY, SolverType.ML_INSPIRED,
+                        SolverType.FAST_GREEDY, SolverType.SIMPLE, SolverType.ORTOOLS):
+        result = SolverFactory.solve(solver_type, db_file)
+        assert result.success, result.error
+
+        profile = result.profile
+        assert all(profile.phases[phase] > 0 for phase in ("load", "search", "persistence", "verification"))
+        if solver_type == SolverType.ORTOOLS:
+            # Presolve alone settles a model this small
+            assert profile.counters["model_variables"] > 0
+        else:
+            assert profile.counters["candidates_evaluated"] > 0 and profile.counters["conflict_checks"] > 0
+        assert profile.counters["lessons_unplaced"] == 4 - result.lessons_count
+        assert set(profile.persistence) >= {"insert", "commit", "total"}
+        # Everything but the verification afterwards happens within time_taken
+        assert profile.total - profile.phases["verification"] <= result.time_taken + 0.001
+        assert get_run(db_file, result.run_id)["timings"]["phases"] == profile.phases
+
+
+def test_schedule_quality_flags_conflicts():
+    from src.core.problem import ProblemInstance
+    from src.solvers.solver_factory import schedule_quality
+
+    problem = ProblemInstance([(1, 'Mr. A', '{}')], [(1, 'Grade 9A', 9), (2, 'Grade 9B', 9)],
+                              [(1, 'Mathematics', 0)], [(1, 'Room 101', 0)], [(1, 1, 2)], [])
+
+    assert schedule_quality(problem, {(0, 0, 0, 0, 0): (0, 1), (0, 0, 0, 0, 1): (0, 1)})["valid"]
+    # Same teacher and room in two classes at once
+    quality = schedule_quality(problem, {(0, 0, 0, 0, 0): (0, 1), (0, 1, 0, 0, 0): (0, 1)})
+    assert quality["conflicts"] == 2
+    assert not quality["valid"]
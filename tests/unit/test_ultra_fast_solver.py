@@ -0,0 +1,56 @@
+"""
+Tests for the UltraFastScheduler greedy algorithms
+"""
+
+import json
+
+import numpy as np
+
+from src.core.problem import ProblemInstance
+from src.solvers.occupancy import Occupancy
+from src.solvers.ultra_fast_solver import UltraFastScheduler
+
+
+def make_scheduler():
+    teachers = [(1, 'Mr. A', json.dumps({"0": [5]})), (2, 'Ms. B', '{}')]
+    classes = [(1, 'Grade 9A', 9), (2, 'Grade 10A', 10)]
+    subjects = [(1, 'Mathematics', 0), (2, 'Physical Education', 0)]
+    rooms = [(1, 'Room 101', 0), (2, 'Gym', 0)]
+    lessons = [(1, 1, 4), (1, 2, 2), (2, 1, 4), (2, 2, 2)]
+    preferences = [(1, 1, 5), (2, 2, 4)]
+    problem = ProblemInstance(teachers, classes, subjects, rooms, lessons, preferences)
+    return UltraFastScheduler(problem=problem)
+
+
+def test_batched_scores_match_scalar_scores():
+    scheduler = make_scheduler()
+    occupancy = Occupancy.for_problem(scheduler.problem)
+    schedule = {}
+    for key, subject_id in [((0, 0, 0, 0, 1), 0), ((0, 1, 1, 0, 3), 1), ((1, 1, 0, 2, 4), 0)]:
+        occupancy.place(*key)
+        schedule[key] = (subject_id, 1)
+
+    for subject_id in range(2):
+        scores = scheduler.score_candidates([0, 1], 0, subject_id, [0, 1], occupancy)
+        for t, teacher_id in enumerate([0, 1]):
+            for r, room_id in enumerate([0, 1]):
+                for day in range(scheduler.num_days):
+                    for period in range(scheduler.num_periods):
+                        if not occupancy.is_free(teacher_id, 0, room_id, day, period):
+                            assert scores[t, r, day, period] == -np.inf
+                        else:
+                            expected = scheduler.calculate_assignment_score(
+                                teacher_id, 0, subject_id, day, period, schedule)
+                            assert scores[t, r, day, period] == expected
+
+
+def test_smart_greedy_is_conflict_free():
+    scheduler = make_scheduler()
+    schedule = scheduler.smart_greedy()
+
+    assert len(schedule) == scheduler.problem.total_demand
+    teacher_slots = {(t, d, p) for (t, c, r, d, p) in schedule}
+    class_slots = {(c, d, p) for (t, c, r, d, p) in schedule}
+    room_slots = {(r, d, p) for (t, c, r, d, p) in schedule}
+    assert len(teacher_slots) == len(class_slots) == len(room_slots) == len(schedule)
+    assert (0, 0, 5) not in teacher_slots